@@ -0,0 +1,242 @@
+"""
+Quản lý context cho vocab_agent: giới hạn history theo token budget
+
+- System prompt không bị động tới (giữ nguyên từng byte để prompt caching phía
+  provider luôn hit)
+- Các lượt cũ (STEP đã hoàn thành) được gộp thành một message tóm tắt ngắn đặt
+  ngay sau system prompt; chỉ giữ nguyên văn vài lượt gần nhất
+- Token được ước lượng bằng số ký tự / 4 (không cần tokenizer)
+
+WindowedAgent override hook nội bộ của agno (_get_run_messages/_aget_run_messages),
+nên agno được pin trong requirements.txt; tests/test_agent_context.py chạy qua hook
+thật của agno để phát hiện thay đổi khi nâng version.
+"""
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from agno.agent import Agent
+from agno.models.message import Message
+
+
+# Token budget cho phần history (không tính system prompt và message hiện tại)
+HISTORY_TOKEN_BUDGET = int(os.getenv("VOCAB_AGENT_HISTORY_TOKENS", "1500"))
+# Số lượt (user + tutor) gần nhất luôn được giữ nguyên văn nếu còn trong budget
+HISTORY_KEEP_TURNS = int(os.getenv("VOCAB_AGENT_HISTORY_KEEP_TURNS", "2"))
+# Độ dài tối đa (ký tự) của mỗi đoạn trích trong message tóm tắt
+SUMMARY_SNIPPET_CHARS = 160
+
+# Overhead ước lượng cho mỗi message (role, phân tách)
+_MESSAGE_OVERHEAD_TOKENS = 4
+_META_RE = re.compile(r"<meta>.*?</meta>", re.DOTALL)
+_HINT_RE = re.compile(r"<hint>(.*?)</hint>", re.DOTALL)
+
+# Thống kê prompt token theo từng lượt (ước lượng) trong worker
+_context_stats = {
+    "turns": 0,
+    "history_tokens_before": 0,
+    "history_tokens_after": 0,
+    "collapsed_turns": 0,
+    "last_turn": None,
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Ước lượng số token của text (~4 ký tự / token)
+    """
+    return (len(text) + 3) // 4
+
+
+def _message_tokens(message: Message) -> int:
+    return estimate_tokens(message.get_content_string()) + _MESSAGE_OVERHEAD_TOKENS
+
+
+def _snippet(text: str, limit: int = SUMMARY_SNIPPET_CHARS) -> str:
+    text = " ".join(text.split())
+    if len(text) <= limit:
+        return text
+    return text[:limit - 1].rstrip() + "…"
+
+
+def _step_label(tutor_text: str) -> Optional[str]:
+    """
+    Nhận diện STEP của lượt tutor dựa trên các tag đặc trưng trong system prompt
+    """
+    if "<state>" in tutor_text:
+        return "STEP 7 (finished)"
+    if "<audio>" in tutor_text:
+        return "STEP 3 (pronunciation) done"
+    if "<meta></meta>" in tutor_text.replace(" ", "").replace("\n", ""):
+        return "STEP 5 (practice request) done"
+    return None
+
+
+def _group_turns(history: List[Message]) -> List[List[Message]]:
+    """
+    Chia history thành các lượt, mỗi lượt bắt đầu bằng một user message
+    """
+    turns: List[List[Message]] = []
+    for message in history:
+        if message.role == "user" or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return turns
+
+
+def summarize_turn(turn: List[Message], number: int) -> str:
+    """
+    Tóm tắt một lượt thành một dòng: STEP (nếu nhận diện được), lời tutor, hints, trả lời của learner
+    """
+    learner = " ".join(m.get_content_string() for m in turn if m.role == "user")
+    tutor = "\n".join(m.get_content_string() for m in turn if m.role == "assistant")
+    narration = _META_RE.sub("", tutor)
+    hints = [_snippet(hint, 40) for hint in _HINT_RE.findall(tutor)]
+
+    parts = [f"Turn {number}"]
+    label = _step_label(tutor)
+    if label:
+        parts[0] += f" [{label}]"
+    if learner.strip():
+        parts.append(f"learner: {_snippet(learner)}")
+    if narration.strip():
+        parts.append(f"tutor: {_snippet(narration)}")
+    if hints:
+        parts.append(f"hints offered: {', '.join(hints)}")
+    return "- " + "; ".join(parts)
+
+
+def _build_summary(turns: List[List[Message]], max_tokens: int) -> Optional[Message]:
+    """
+    Message tóm tắt các lượt đã gộp, bỏ bớt dòng cũ nhất nếu vượt budget
+    """
+    if not turns:
+        return None
+    header = "Summary of earlier turns in this session (already completed, do not repeat them):"
+    lines = [summarize_turn(turn, number) for number, turn in enumerate(turns, start=1)]
+    while lines and estimate_tokens("\n".join([header] + lines)) + _MESSAGE_OVERHEAD_TOKENS > max_tokens:
+        lines.pop(0)
+    if not lines:
+        return None
+    # Đánh dấu from_history để message không bị lưu lại như một phần của run hiện tại
+    return Message(role="user", content="\n".join([header] + lines), from_history=True)
+
+
+def window_history(
+    messages: List[Message],
+    max_tokens: int = HISTORY_TOKEN_BUDGET,
+    keep_turns: int = HISTORY_KEEP_TURNS,
+) -> Tuple[List[Message], Dict[str, Any]]:
+    """
+    Giới hạn phần history trong messages theo token budget
+
+    System message (đầu list) và các message của lượt hiện tại được giữ nguyên;
+    history (from_history=True) được giữ nguyên văn tối đa `keep_turns` lượt gần
+    nhất, phần còn lại gộp thành một message tóm tắt.
+
+    Args:
+        messages: Messages agno chuẩn bị gửi cho model
+        max_tokens: Token budget cho history (kể cả message tóm tắt)
+        keep_turns: Số lượt gần nhất giữ nguyên văn
+
+    Returns:
+        Tuple (messages mới, report token ước lượng)
+    """
+    history = [m for m in messages if m.from_history]
+    report = {
+        "prompt_tokens_before": sum(_message_tokens(m) for m in messages),
+        "history_tokens_before": sum(_message_tokens(m) for m in history),
+        "collapsed_turns": 0,
+    }
+    if not history:
+        report["prompt_tokens_after"] = report["prompt_tokens_before"]
+        report["history_tokens_after"] = 0
+        return messages, report
+
+    turns = _group_turns(history)
+    kept = turns[-keep_turns:] if keep_turns > 0 else []
+    collapsed = turns[:len(turns) - len(kept)]
+    # Lượt giữ nguyên văn vẫn vượt budget thì gộp tiếp lượt cũ nhất
+    while kept and sum(_message_tokens(m) for turn in kept for m in turn) > max_tokens:
+        collapsed.append(kept.pop(0))
+
+    kept_tokens = sum(_message_tokens(m) for turn in kept for m in turn)
+    summary = _build_summary(collapsed, max_tokens - kept_tokens)
+
+    new_history: List[Message] = [summary] if summary is not None else []
+    new_history += [m for turn in kept for m in turn]
+
+    # History luôn nằm liền sau system message (và extra messages) trong list của agno
+    first = next(i for i, m in enumerate(messages) if m.from_history)
+    rest = [m for m in messages[first:] if not m.from_history]
+    windowed = messages[:first] + new_history + rest
+
+    report["collapsed_turns"] = len(collapsed)
+    report["history_tokens_after"] = sum(_message_tokens(m) for m in new_history)
+    report["prompt_tokens_after"] = sum(_message_tokens(m) for m in windowed)
+    return windowed, report
+
+
+def _record(report: Dict[str, Any]) -> None:
+    _context_stats["turns"] += 1
+    _context_stats["history_tokens_before"] += report["history_tokens_before"]
+    _context_stats["history_tokens_after"] += report["history_tokens_after"]
+    _context_stats["collapsed_turns"] += report["collapsed_turns"]
+    _context_stats["last_turn"] = report
+
+
+def get_context_stats() -> Dict[str, Any]:
+    """
+    Thống kê prompt token (ước lượng) của vocab_agent: tổng và lượt gần nhất
+    """
+    stats = dict(_context_stats)
+    before = stats["history_tokens_before"]
+    stats["history_tokens_saved_ratio"] = (
+        round(1 - stats["history_tokens_after"] / before, 4) if before else 0.0
+    )
+    return stats
+
+
+@dataclass(init=False)
+class WindowedAgent(Agent):
+    """
+    Agent giới hạn history theo token budget trước mỗi lần gọi model
+
+    Report token của mỗi lượt được gắn vào run_response.metadata["context_window"].
+    Khai báo dataclass để các field mới được giữ lại khi AgentOS deep_copy agent.
+    """
+
+    history_token_budget: int = HISTORY_TOKEN_BUDGET
+    history_keep_turns: int = HISTORY_KEEP_TURNS
+
+    def __init__(
+        self,
+        *args: Any,
+        history_token_budget: int = HISTORY_TOKEN_BUDGET,
+        history_keep_turns: int = HISTORY_KEEP_TURNS,
+        **kwargs: Any,
+    ):
+        super().__init__(*args, **kwargs)
+        self.history_token_budget = history_token_budget
+        self.history_keep_turns = history_keep_turns
+
+    def _apply_window(self, run_messages: Any, run_response: Any) -> Any:
+        run_messages.messages, report = window_history(
+            run_messages.messages,
+            max_tokens=self.history_token_budget,
+            keep_turns=self.history_keep_turns,
+        )
+        _record(report)
+        if run_response is not None:
+            run_response.metadata = {**(run_response.metadata or {}), "context_window": report}
+        return run_messages
+
+    def _get_run_messages(self, *args: Any, **kwargs: Any):
+        run_messages = super()._get_run_messages(*args, **kwargs)
+        return self._apply_window(run_messages, kwargs.get("run_response"))
+
+    async def _aget_run_messages(self, *args: Any, **kwargs: Any):
+        run_messages = await super()._aget_run_messages(*args, **kwargs)
+        return self._apply_window(run_messages, kwargs.get("run_response"))
@@ -0,0 +1,81 @@
+"""
+Model Azure OpenAI của vocab_agent, mọi async LLM call đi qua llm_scheduler
+
+Lượt tutor là tương tác trực tiếp nên có priority cao nhất (Priority.TUTOR):
+khi gần chạm RPM/TPM của deployment, cache miss và pre-warm phải chờ trước.
+"""
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, List
+
+from agno.models.azure import AzureOpenAI
+from openai import AsyncAzureOpenAI
+from agno.models.message import Message
+from agno.models.response import ModelResponse
+
+from llm_scheduler import LLMSlot, Priority, estimate_tokens, get_llm_scheduler
+
+
+@dataclass
+class ScheduledAzureOpenAI(AzureOpenAI):
+    """
+    AzureOpenAI (agno) với admission control của llm_scheduler cho ainvoke/ainvoke_stream
+
+    Retry của async openai client bị tắt (max_retries=0), scheduler tự retry 429/5xx
+    để AIMD thấy được rate limit. Call đồng bộ (invoke) không đi qua scheduler nên
+    client đồng bộ giữ retry mặc định của openai.
+    """
+
+    priority: Priority = Priority.TUTOR
+    # Completion token dự kiến của một lượt tutor (cho TPM budget trước khi có usage thật)
+    expected_completion_tokens: int = 600
+
+    def get_async_client(self) -> AsyncAzureOpenAI:
+        client = super().get_async_client()
+        if client.max_retries != 0:
+            # Bản copy dùng chung connection pool, agno giữ lại cho các call sau
+            self.async_client = client = client.with_options(max_retries=0)
+        return client
+
+    def _estimate_call_tokens(self, messages: List[Message]) -> int:
+        prompt_tokens = sum(estimate_tokens(str(message.content or "")) for message in messages)
+        return prompt_tokens + self.expected_completion_tokens
+
+    @staticmethod
+    def _record_usage(slot: LLMSlot, response: ModelResponse) -> None:
+        usage = response.response_usage
+        if usage is not None and usage.total_tokens:
+            slot.record_usage(usage.total_tokens)
+
+    async def ainvoke(self, messages: List[Message], assistant_message: Message, *args: Any, **kwargs: Any) -> ModelResponse:
+        async def call(slot: LLMSlot) -> ModelResponse:
+            response = await super(ScheduledAzureOpenAI, self).ainvoke(messages, assistant_message, *args, **kwargs)
+            self._record_usage(slot, response)
+            return response
+
+        return await get_llm_scheduler().run(
+            call,
+            priority=self.priority,
+            estimated_tokens=self._estimate_call_tokens(messages),
+        )
+
+    async def ainvoke_stream(
+        self, messages: List[Message], assistant_message: Message, *args: Any, **kwargs: Any
+    ) -> AsyncIterator[ModelResponse]:
+        scheduler = get_llm_scheduler()
+        estimated_tokens = self._estimate_call_tokens(messages)
+        attempt = 0
+        while True:
+            started = False
+            try:
+                # Giữ slot trong suốt stream
+                async with scheduler.slot(self.priority, estimated_tokens) as slot:
+                    async for response in super().ainvoke_stream(messages, assistant_message, *args, **kwargs):
+                        started = True
+                        self._record_usage(slot, response)
+                        yield response
+                return
+            except Exception as e:
+                # Chỉ retry khi chưa stream phần nào cho client
+                if started or not await scheduler.backoff(e, attempt):
+                    raise
+                attempt += 1
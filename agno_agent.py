@@ -2,11 +2,11 @@ import json
 import os
 import random
 
-from agno.agent import Agent
-from agno.models.azure import AzureOpenAI
 from dotenv import load_dotenv
 from agno.db.mongo import MongoDb
 from system_prompt import SYSTEM_PROMPT
+from agent_context import WindowedAgent
+from agent_model import ScheduledAzureOpenAI
 
 load_dotenv()
 
@@ -39,8 +39,10 @@ except Exception as e:
     print("Note: API will still work, but without caching")
     db = None
 
-vocab_agent = Agent(
-    model=AzureOpenAI(id="gpt-4.1"),
+# History được giới hạn theo token budget, các STEP cũ được gộp thành tóm tắt;
+# LLM call đi qua llm_scheduler với priority cao nhất (tutor)
+vocab_agent = WindowedAgent(
+    model=ScheduledAzureOpenAI(id="gpt-4.1"),
     markdown=True,
     instructions=SYSTEM_PROMPT,
     id='vocab_agent',
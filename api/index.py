@@ -1,2 +1,7 @@
-from main import app
+import os
 
+# Serverless: load agent stack lazy để request vocab/audio không phải trả cold start của agno
+if os.getenv("VOCAB_LAZY_STARTUP", "true").lower() in ("1", "true", "yes"):
+    from lazy_app import app
+else:
+    from main import app
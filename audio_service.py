@@ -0,0 +1,64 @@
+"""
+Resolve từ vựng sang file audio phát âm (dựa trên sounds.json)
+"""
+import os
+from typing import Optional
+from urllib.parse import quote
+
+from sound_words import load_sounds, resolve_sound_key
+
+
+# Thư mục chứa các file mp3 trong sounds.json
+AUDIO_DIR = os.getenv(
+    "VOCAB_AUDIO_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "sounds"),
+)
+# Nếu có, audio được phục vụ từ CDN/static host này (redirect), Python không phải đọc file
+AUDIO_BASE_URL = os.getenv("VOCAB_AUDIO_BASE_URL", "").rstrip("/")
+AUDIO_CACHE_MAX_AGE = int(os.getenv("VOCAB_AUDIO_CACHE_MAX_AGE", "604800"))
+
+if not AUDIO_BASE_URL and not os.path.isdir(AUDIO_DIR):
+    # Thư mục sounds/ không nằm trong repo: không cấu hình nguồn nào thì mọi từ đều 404
+    print(
+        f"Warning: VOCAB_AUDIO_BASE_URL is not set and VOCAB_AUDIO_DIR ({AUDIO_DIR}) does not exist, "
+        "/api/audio will return 404 for every vocab"
+    )
+
+
+def get_audio_filename(vocab: str) -> Optional[str]:
+    """
+    Tên file mp3 của từ vựng
+    
+    Args:
+        vocab: Từ vựng (không phân biệt hoa thường, khoảng trắng hay "_")
+        
+    Returns:
+        Tên file trong sounds.json, None nếu không có audio
+    """
+    sound_key = resolve_sound_key(vocab)
+    if sound_key is None:
+        return None
+    return load_sounds()[sound_key]
+
+
+def get_audio_path(filename: str) -> str:
+    """
+    Đường dẫn file audio trên disk
+    """
+    return os.path.join(AUDIO_DIR, os.path.basename(filename))
+
+
+def get_audio_url(vocab: str) -> Optional[str]:
+    """
+    URL để client phát audio của từ vựng
+    
+    Returns:
+        URL trên CDN nếu cấu hình VOCAB_AUDIO_BASE_URL, nếu không thì URL của
+        endpoint /api/audio; None nếu không có audio
+    """
+    sound_key = resolve_sound_key(vocab)
+    if sound_key is None:
+        return None
+    if AUDIO_BASE_URL:
+        return f"{AUDIO_BASE_URL}/{quote(load_sounds()[sound_key])}"
+    return f"/api/audio/{quote(sound_key)}"
@@ -0,0 +1,95 @@
+"""
+Benchmark cold start: import time và time-to-first-response của api/index.py
+
+Mỗi lần chạy là một Python process mới (giống một cold start serverless):
+- eager: VOCAB_LAZY_STARTUP=false, `from main import app` (agno, AgentOS, agent)
+- lazy: VOCAB_LAZY_STARTUP=true, chỉ load vocab_routes; agent stack load khi cần
+
+Request đầu tiên là một cache hit của GET /api/vocab/info (entry được seed vào
+L1 trước khi đo, không cần MongoDB/LLM).
+
+Chạy từ thư mục gốc repo:
+    python -m benchmarks.cold_start --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Code chạy trong process con, in ra một dòng JSON
+_CHILD = r"""
+import asyncio, json, os, sys, time
+started = time.perf_counter()
+sys.path.insert(0, "api")
+import index
+imported = time.perf_counter()
+
+import httpx
+from benchmarks.fake_llm_server import build_vocab_payload
+from vocab_cache import save_vocab_info_to_cache
+
+async def first_response():
+    await save_vocab_info_to_cache("abide", "Vietnamese", build_vocab_payload("abide", "Vietnamese"))
+    request_started = time.perf_counter()
+    transport = httpx.ASGITransport(app=index.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get("/api/vocab/info/Vietnamese/abide")
+        response.raise_for_status()
+    return time.perf_counter() - request_started
+
+first = asyncio.run(first_response())
+print(json.dumps({
+    "import_s": imported - started,
+    "first_response_s": first,
+    "agno_loaded": "agno" in sys.modules,
+    "openai_loaded": "openai" in sys.modules,
+}))
+"""
+
+
+def _run_once(lazy: bool) -> dict:
+    env = dict(os.environ, VOCAB_LAZY_STARTUP="true" if lazy else "false")
+    # Không kết nối MongoDB thật khi benchmark
+    env.pop("AGNO_MONGO_URL", None)
+    result = subprocess.run(
+        [sys.executable, "-c", _CHILD],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _summarize(mode: str, runs: list) -> dict:
+    import_times = [run["import_s"] for run in runs]
+    first_times = [run["first_response_s"] for run in runs]
+    totals = [run["import_s"] + run["first_response_s"] for run in runs]
+    report = {
+        "mode": mode,
+        "runs": len(runs),
+        "import_ms_median": round(statistics.median(import_times) * 1000, 1),
+        "first_response_ms_median": round(statistics.median(first_times) * 1000, 1),
+        "cold_total_ms_median": round(statistics.median(totals) * 1000, 1),
+        "agno_loaded": runs[-1]["agno_loaded"],
+        "openai_loaded": runs[-1]["openai_loaded"],
+    }
+    print(report)
+    return report
+
+
+def main(runs: int) -> None:
+    # Chạy một lần trước để có .pyc, các lần đo không tính compile
+    _run_once(lazy=False)
+    eager = _summarize("eager", [_run_once(lazy=False) for _ in range(runs)])
+    lazy = _summarize("lazy", [_run_once(lazy=True) for _ in range(runs)])
+    print(f"Cold start saved: {eager['cold_total_ms_median'] - lazy['cold_total_ms_median']:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Số process cho mỗi mode")
+    args = parser.parse_args()
+    main(args.runs)
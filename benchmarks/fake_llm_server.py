@@ -0,0 +1,222 @@
+"""
+Fake OpenAI/Azure OpenAI compatible server dùng cho benchmark
+
+Trả về một vocab info JSON hợp lệ sau một độ trễ cấu hình được,
+để đo throughput của các LLM call mà không tốn tiền gọi Azure thật.
+"""
+import asyncio
+import json
+import random
+import re
+import socket
+import threading
+import time
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def build_vocab_payload(vocab: str, language: str) -> dict:
+    """
+    Tạo vocab info giả nhưng hợp lệ với VocabInfoResponse
+    """
+    return {
+        "vocab": vocab,
+        "language": language,
+        "examples": [
+            {"level": "easy", "sentence": f"I {vocab} every day.", "translation": f"[{language}] easy"},
+            {"level": "medium", "sentence": f"She tried to {vocab} it.", "translation": f"[{language}] medium"},
+            {"level": "hard", "sentence": f"They will {vocab} despite everything.", "translation": f"[{language}] hard"},
+        ],
+        "synonyms": [
+            {"word": f"{vocab}-like", "meaning": f"[{language}] synonym"},
+        ],
+        "origin": {
+            "etymology": f"[{language}] etymology of {vocab}",
+            "historical_context": None,
+        },
+    }
+
+
+def build_multilingual_payload(vocab: str, languages: list) -> dict:
+    """
+    Tạo vocab info nhiều ngôn ngữ giả nhưng hợp lệ với MultilingualVocabInfo
+    """
+    def localized(label: str) -> list:
+        return [{"language": language, "text": f"[{language}] {label}"} for language in languages]
+
+    single = build_vocab_payload(vocab, "")
+    return {
+        "vocab": vocab,
+        "examples": [
+            {"level": item["level"], "sentence": item["sentence"], "translations": localized(item["level"])}
+            for item in single["examples"]
+        ],
+        "synonyms": [{"word": item["word"], "meanings": localized("synonym")} for item in single["synonyms"]],
+        "origin": {"etymology": localized(f"etymology of {vocab}"), "historical_context": []},
+    }
+
+
+def _prompt_text(body: dict) -> str:
+    return " ".join(
+        m.get("content") or "" for m in body.get("messages", []) if isinstance(m.get("content"), str)
+    )
+
+
+def _build_content(body: dict) -> str:
+    """
+    Tạo nội dung completion phù hợp với loại prompt (một hay nhiều ngôn ngữ)
+    """
+    prompt = _prompt_text(body)
+    multi = re.search(r'"(?P<vocab>[^"]+)" và trả về thông tin chi tiết cho NHIỀU ngôn ngữ đích cùng lúc: (?P<languages>.+)\.', prompt)
+    if multi:
+        languages = re.findall(r'"([^"]+)"', multi.group("languages"))
+        payload = build_multilingual_payload(multi.group("vocab"), languages)
+    else:
+        payload = build_vocab_payload(*_extract_vocab_language(body))
+    return json.dumps(payload, ensure_ascii=False)
+
+
+def _extract_vocab_language(body: dict) -> tuple:
+    """
+    Lấy vocab và language từ prompt (dòng đầu tiên của vocab info prompt)
+    """
+    prompt = _prompt_text(body)
+    match = re.search(r'"(?P<vocab>[^"]+)" và trả về thông tin chi tiết bằng ngôn ngữ (?P<language>[^.\n]+)\.', prompt)
+    if match:
+        return match.group("vocab"), match.group("language")
+    return "word", "English"
+
+
+class FakeLLMServer:
+    """
+    Chạy fake LLM server trong background thread
+
+    Args:
+        latency: Độ trễ trung bình của mỗi completion (giây)
+        jitter: Độ lệch ngẫu nhiên cộng thêm vào latency (giây)
+        concurrency_limit: Quá số request đồng thời này thì trả về 429 + Retry-After
+            (giả lập rate limit của deployment, None = không giới hạn)
+        retry_after: Giá trị header Retry-After của response 429 (giây)
+    """
+
+    def __init__(
+        self,
+        latency: float = 1.0,
+        jitter: float = 0.0,
+        port: Optional[int] = None,
+        stream_chunk_size: int = 40,
+        concurrency_limit: Optional[int] = None,
+        retry_after: float = 1.0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.stream_chunk_size = stream_chunk_size
+        self.concurrency_limit = concurrency_limit
+        self.retry_after = retry_after
+        self.rate_limited = 0
+        self.port = port or _free_port()
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self.app = self._build_app()
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/{path:path}")
+        async def chat_completions(path: str, request: Request):
+            body = await request.json()
+            if self.concurrency_limit is not None and self.in_flight >= self.concurrency_limit:
+                self.rate_limited += 1
+                return JSONResponse(
+                    status_code=429,
+                    content={"error": {"code": "429", "message": "Rate limit is exceeded."}},
+                    headers={"Retry-After": str(self.retry_after)},
+                )
+            self.calls += 1
+            content = _build_content(body)
+            delay = max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+            if body.get("stream"):
+                return StreamingResponse(self._stream(content, delay), media_type="text/event-stream")
+
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                self.in_flight -= 1
+            return {
+                "id": f"chatcmpl-{self.calls}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": content},
+                    }
+                ],
+                "usage": {"prompt_tokens": 500, "completion_tokens": 300, "total_tokens": 800},
+            }
+
+        return app
+
+    async def _stream(self, content: str, delay: float):
+        """
+        Stream content theo từng chunk, tổng thời gian xấp xỉ delay
+        """
+        pieces = [
+            content[i:i + self.stream_chunk_size] for i in range(0, len(content), self.stream_chunk_size)
+        ]
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            for piece in pieces:
+                await asyncio.sleep(delay / len(pieces))
+                chunk = {
+                    "id": f"chatcmpl-{self.calls}",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": "fake",
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            yield "data: [DONE]\n\n"
+        finally:
+            self.in_flight -= 1
+
+    def start(self) -> "FakeLLMServer":
+        config = uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def reset_counters(self) -> None:
+        self.calls = 0
+        self.max_in_flight = 0
+        self.rate_limited = 0
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
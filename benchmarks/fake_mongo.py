@@ -0,0 +1,272 @@
+"""
+MongoDB stand-in trong bộ nhớ cho benchmark
+
+Chỉ hỗ trợ phần API motor mà vocab_cache và jobs dùng (find_one, find,
+find_one_and_update, update_one, insert_one, delete_one, create_index) với
+filter/update đơn giản, kèm độ trễ cấu hình được cho mỗi thao tác để giống
+một Mongo thật qua mạng.
+"""
+import asyncio
+import copy
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pymongo
+
+
+def _matches_condition(value: Any, condition: Any) -> bool:
+    if not isinstance(condition, dict) or not any(key.startswith("$") for key in condition):
+        return value == condition
+    for operator, operand in condition.items():
+        if operator == "$in":
+            if value not in operand:
+                return False
+        elif operator == "$ne":
+            if value == operand:
+                return False
+        elif operator == "$exists":
+            if (value is not None) != bool(operand):
+                return False
+        elif operator in ("$lt", "$lte", "$gt", "$gte"):
+            if value is None:
+                return False
+            if operator == "$lt" and not value < operand:
+                return False
+            if operator == "$lte" and not value <= operand:
+                return False
+            if operator == "$gt" and not value > operand:
+                return False
+            if operator == "$gte" and not value >= operand:
+                return False
+        else:
+            raise NotImplementedError(f"Operator {operator} is not supported by the in-memory stand-in")
+    return True
+
+
+def _matches(document: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(_matches(document, branch) for branch in condition):
+                return False
+        elif not _matches_condition(document.get(field), condition):
+            return False
+    return True
+
+
+def _project(document: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    document = copy.deepcopy(document)
+    if not projection:
+        return document
+    include = {field for field, flag in projection.items() if flag and field != "_id"}
+    exclude_id = projection.get("_id", 1) == 0
+    if include:
+        projected = {field: document[field] for field in include if field in document}
+        if not exclude_id and "_id" in document:
+            projected["_id"] = document["_id"]
+        return projected
+    for field, flag in projection.items():
+        if not flag:
+            document.pop(field, None)
+    return document
+
+
+def _apply_update(document: Dict[str, Any], update: Dict[str, Any], inserting: bool) -> None:
+    for operator, fields in update.items():
+        if operator == "$set" or (operator == "$setOnInsert" and inserting):
+            for field, value in fields.items():
+                document[field] = copy.deepcopy(value)
+        elif operator == "$setOnInsert":
+            continue
+        elif operator == "$inc":
+            for field, value in fields.items():
+                document[field] = document.get(field, 0) + value
+        elif operator == "$unset":
+            for field in fields:
+                document.pop(field, None)
+        else:
+            raise NotImplementedError(f"Update operator {operator} is not supported by the in-memory stand-in")
+
+
+class InMemoryCursor:
+    """
+    Async cursor tối giản (limit + async for)
+    """
+
+    def __init__(self, documents: List[Dict[str, Any]], latency: float):
+        self._documents = documents
+        self._latency = latency
+
+    def limit(self, count: int) -> "InMemoryCursor":
+        if count:
+            self._documents = self._documents[:count]
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        for document in self._documents:
+            yield document
+
+
+class InMemoryCollection:
+    """
+    Collection trong bộ nhớ, mỗi thao tác chờ `latency` giây
+
+    Args:
+        latency: Độ trễ giả lập cho mỗi round trip (giây)
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.documents: Dict[Any, Dict[str, Any]] = {}
+        self.operations = 0
+
+    async def _round_trip(self) -> None:
+        self.operations += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _matching(self, query: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+        if set(query) == {"_id"} and not isinstance(query["_id"], dict):
+            document = self.documents.get(query["_id"])
+            return [document] if document is not None else []
+        return [document for document in self.documents.values() if _matches(document, query)]
+
+    async def find_one(self, query: Dict[str, Any], projection: Optional[Dict[str, Any]] = None, **kwargs: Any):
+        await self._round_trip()
+        for document in self._matching(query):
+            return _project(document, projection)
+        return None
+
+    def find(self, query: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None, **kwargs: Any):
+        self.operations += 1
+        documents = [_project(document, projection) for document in self._matching(query or {})]
+        return InMemoryCursor(documents, self.latency)
+
+    async def find_one_and_update(
+        self,
+        query: Dict[str, Any],
+        update: Dict[str, Any],
+        projection: Optional[Dict[str, Any]] = None,
+        sort: Optional[List[Tuple[str, int]]] = None,
+        upsert: bool = False,
+        return_document: bool = pymongo.ReturnDocument.BEFORE,
+        **kwargs: Any,
+    ):
+        await self._round_trip()
+        documents = list(self._matching(query))
+        for field, direction in reversed(sort or []):
+            documents.sort(key=lambda document: document.get(field), reverse=direction < 0)
+        if documents:
+            document = documents[0]
+            before = _project(document, projection)
+            _apply_update(document, update, inserting=False)
+        elif upsert:
+            before = None
+            document = {field: value for field, value in query.items() if not isinstance(value, dict)}
+            _apply_update(document, update, inserting=True)
+            self.documents[document["_id"]] = document
+        else:
+            return None
+        return _project(document, projection) if return_document == pymongo.ReturnDocument.AFTER else before
+
+    async def insert_one(self, document: Dict[str, Any]):
+        await self._round_trip()
+        if document["_id"] in self.documents:
+            raise pymongo.errors.DuplicateKeyError(f"E11000 duplicate key: {document['_id']}")
+        self.documents[document["_id"]] = copy.deepcopy(document)
+        return SimpleNamespace(inserted_id=document["_id"])
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False):
+        await self._round_trip()
+        for document in self._matching(query):
+            _apply_update(document, update, inserting=False)
+            return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if not upsert:
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+        document = {field: value for field, value in query.items() if not isinstance(value, dict)}
+        _apply_update(document, update, inserting=True)
+        if document["_id"] in self.documents:
+            # Như MongoDB: upsert theo _id nhưng filter khác không khớp document đã có
+            raise pymongo.errors.DuplicateKeyError(f"E11000 duplicate key: {document['_id']}")
+        self.documents[document["_id"]] = document
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=document["_id"])
+
+    async def replace_one(self, query: Dict[str, Any], replacement: Dict[str, Any], upsert: bool = False):
+        await self._round_trip()
+        for document in self._matching(query):
+            self.documents[document["_id"]] = {**copy.deepcopy(replacement), "_id": document["_id"]}
+            return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if not upsert:
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+        document = copy.deepcopy(replacement)
+        document.setdefault("_id", query.get("_id"))
+        self.documents[document["_id"]] = document
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=document["_id"])
+
+    async def delete_many(self, query: Dict[str, Any]):
+        await self._round_trip()
+        matched = [document["_id"] for document in self._matching(query)]
+        for document_id in matched:
+            del self.documents[document_id]
+        return SimpleNamespace(deleted_count=len(matched))
+
+    async def delete_one(self, query: Dict[str, Any]):
+        await self._round_trip()
+        for document in self._matching(query):
+            del self.documents[document["_id"]]
+            return SimpleNamespace(deleted_count=1)
+        return SimpleNamespace(deleted_count=0)
+
+    async def create_index(self, *args: Any, **kwargs: Any) -> str:
+        await self._round_trip()
+        return "in_memory_index"
+
+    def clear(self) -> None:
+        self.documents.clear()
+        self.operations = 0
+
+
+class InMemoryDatabase:
+    """
+    Tập collection theo tên, thay cho database của motor client
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.collections: Dict[str, InMemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        if name not in self.collections:
+            self.collections[name] = InMemoryCollection(self.latency)
+        return self.collections[name]
+
+    def clear(self) -> None:
+        for collection in self.collections.values():
+            collection.clear()
+
+
+def install(latency: float = 0.0) -> InMemoryDatabase:
+    """
+    Cho vocab_cache dùng database trong bộ nhớ thay vì MongoDB (vẫn đi qua circuit breaker)
+
+    Args:
+        latency: Độ trễ giả lập cho mỗi round trip (giây)
+
+    Returns:
+        InMemoryDatabase đã cài vào vocab_cache
+    """
+    import vocab_cache
+
+    database = InMemoryDatabase(latency)
+
+    def _get_collection(name: str = vocab_cache.CACHE_COLLECTION):
+        if not vocab_cache._breaker.allow_request():
+            return None
+        return database[name]
+
+    vocab_cache._get_collection = _get_collection
+    return database
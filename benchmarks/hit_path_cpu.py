@@ -0,0 +1,76 @@
+"""
+Micro-benchmark: CPU cho mỗi request trên cache-hit path của /api/vocab/info
+
+So sánh:
+- before: dict từ cache -> VocabInfoResponse(**data) -> response_model validate -> JSON encode
+- after: trả thẳng payload bytes đã serialize lúc lưu cache
+
+Chạy từ thư mục gốc repo:
+    python -m benchmarks.hit_path_cpu --requests 5000
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import Response
+
+from benchmarks.fake_llm_server import build_vocab_payload
+from models.vocab_info import VocabInfoRequest, VocabInfoResponse
+from vocab_cache import encode_payload
+
+
+def _build_app(data: dict, payload: bytes) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/before", response_model=VocabInfoResponse)
+    async def before(request: VocabInfoRequest):
+        return VocabInfoResponse(**data)
+
+    @app.post("/after", response_model=VocabInfoResponse)
+    async def after(request: VocabInfoRequest):
+        return Response(content=payload, media_type="application/json")
+
+    return app
+
+
+async def _measure(client: httpx.AsyncClient, path: str, n: int) -> dict:
+    body = {"vocab": "abide", "language": "Vietnamese"}
+    # Warm up
+    for _ in range(50):
+        await client.post(path, json=body)
+
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    for _ in range(n):
+        response = await client.post(path, json=body)
+        response.raise_for_status()
+    cpu = time.process_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+    report = {
+        "path": path,
+        "requests": n,
+        "cpu_us_per_request": round(cpu / n * 1e6, 1),
+        "wall_us_per_request": round(wall / n * 1e6, 1),
+        "response_bytes": len(response.content),
+    }
+    print(report)
+    return report
+
+
+async def main(n: int) -> None:
+    data = VocabInfoResponse(**build_vocab_payload("abide", "Vietnamese")).model_dump(mode="json")
+    app = _build_app(data, encode_payload(data))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        before = await _measure(client, "/before", n)
+        after = await _measure(client, "/after", n)
+    print(f"CPU saved per hit: {before['cpu_us_per_request'] - after['cpu_us_per_request']:.1f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="Số request cho mỗi path")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
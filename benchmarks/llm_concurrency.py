@@ -0,0 +1,89 @@
+"""
+Load test: throughput của các cache miss đồng thời trên /api/vocab/info service
+
+So sánh:
+- before: sync AzureOpenAI client gọi trong async function (block event loop)
+- after: vocab_info_service.get_vocab_info dùng AsyncAzureOpenAI
+
+Chạy từ thư mục gốc repo:
+    python -m benchmarks.llm_concurrency --requests 50 --latency 1.0
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.fake_llm_server import FakeLLMServer
+
+
+async def _legacy_get_vocab_info(client, vocab: str, language: str) -> dict:
+    """
+    Tái hiện code path cũ: async function nhưng gọi sync client
+    """
+    from vocab_info_prompt import get_vocab_info_prompt
+    from vocab_info_service import _extract_json_from_response
+
+    resp = client.chat.completions.create(
+        model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o-mini"),
+        messages=[
+            {"role": "system", "content": "You are a helpful language expert."},
+            {"role": "user", "content": get_vocab_info_prompt(vocab, language)},
+        ],
+    )
+    return _extract_json_from_response(resp.choices[0].message.content)
+
+
+async def _run(label: str, make_call, n: int, server: FakeLLMServer) -> dict:
+    server.reset_counters()
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(make_call(f"word{i}", "Vietnamese") for i in range(n)), return_exceptions=True
+    )
+    elapsed = time.perf_counter() - started
+    errors = sum(1 for r in results if isinstance(r, Exception))
+    report = {
+        "label": label,
+        "requests": n,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(n / elapsed, 2),
+        "max_in_flight_llm": server.max_in_flight,
+    }
+    print(report)
+    return report
+
+
+async def main(n: int, latency: float, jitter: float) -> None:
+    server = FakeLLMServer(latency=latency, jitter=jitter).start()
+    os.environ["AZURE_OPENAI_ENDPOINT"] = server.endpoint
+    os.environ.setdefault("AZURE_OPENAI_API_KEY", "fake-key")
+    # Không có Mongo => mọi request đều là cache miss
+    os.environ["AGNO_MONGO_URL"] = ""
+
+    try:
+        from openai import AzureOpenAI
+        import vocab_info_service
+
+        sync_client = AzureOpenAI(
+            api_key=os.environ["AZURE_OPENAI_API_KEY"],
+            api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview"),
+            azure_endpoint=server.endpoint,
+        )
+        await _run(
+            "before (sync client)",
+            lambda vocab, language: _legacy_get_vocab_info(sync_client, vocab, language),
+            n,
+            server,
+        )
+        await _run("after (async client)", vocab_info_service.get_vocab_info, n, server)
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50, help="Số cache miss đồng thời")
+    parser.add_argument("--latency", type=float, default=1.0, help="Độ trễ của fake LLM (giây)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Jitter của fake LLM (giây)")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.latency, args.jitter))
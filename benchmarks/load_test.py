@@ -0,0 +1,305 @@
+"""
+Load test tái lập được cho main.app với LLM và MongoDB giả lập
+
+- LLM: benchmarks.fake_llm_server (OpenAI-compatible, latency/jitter cấu hình được)
+- MongoDB: benchmarks.fake_mongo (trong bộ nhớ), hoặc Mongo thật qua --mongo-url
+  (dùng database riêng, các collection cache bị xoá giữa các scenario)
+- Traffic: GET /api/vocab/info/{language}/{vocab}, từ vựng lấy từ sounds.json
+  theo phân phối Zipf (seed cố định => cùng chuỗi request mỗi lần chạy)
+
+Scenario:
+- hit_heavy: phần đầu phân phối được seed sẵn vào cache, phân phối lệch mạnh
+- miss_heavy: cache rỗng, nhiều từ, phân phối ít lệch
+- burst: rất nhiều request đồng thời cho vài từ khi cache rỗng (single-flight)
+
+Kết quả (throughput, p50/p95/p99, số lần gọi LLM, hit ratio) được in ra và ghi
+vào một file JSON.
+
+Chạy từ thư mục gốc repo:
+    python -m benchmarks.load_test --requests 2000 --concurrency 50 --latency 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from bisect import bisect_left
+from datetime import datetime
+from itertools import accumulate
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.fake_llm_server import FakeLLMServer, build_vocab_payload
+
+SCENARIOS = ("hit_heavy", "miss_heavy", "burst")
+LANGUAGE = "Vietnamese"
+
+
+class ZipfSampler:
+    """
+    Chọn từ theo phân phối Zipf: từ thứ hạng k có xác suất tỉ lệ với 1 / k^s
+
+    Args:
+        words: Danh sách từ theo thứ hạng (từ phổ biến nhất trước)
+        exponent: Độ lệch s (càng lớn thì càng tập trung vào các từ đầu)
+        seed: Seed cho random
+    """
+
+    def __init__(self, words: List[str], exponent: float, seed: int):
+        self.words = words
+        self._cum_weights = list(accumulate(1 / rank ** exponent for rank in range(1, len(words) + 1)))
+        self._random = random.Random(seed)
+
+    def sample(self, n: int) -> List[str]:
+        return self._random.choices(self.words, cum_weights=self._cum_weights, k=n)
+
+    def head_for_mass(self, mass: float) -> List[str]:
+        """
+        Các từ đầu chiếm tổng xác suất `mass`
+        """
+        index = bisect_left(self._cum_weights, mass * self._cum_weights[-1])
+        return self.words[: index + 1]
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(percentile / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _cache_counters() -> Dict[str, float]:
+    from metrics import CACHE_REQUESTS
+
+    return {
+        f"{tier}_{result}": CACHE_REQUESTS.get(tier=tier, result=result)
+        for tier in ("l1", "mongo")
+        for result in ("hit", "miss", "error", "skipped")
+    }
+
+
+class LoadTest:
+    """
+    Chạy các scenario trên main.app qua ASGI transport (không qua network stack)
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.server: Optional[FakeLLMServer] = None
+        self.database = None
+        self.app = None
+        self.words: List[str] = []
+
+    async def setup(self) -> None:
+        args = self.args
+        self.server = FakeLLMServer(
+            latency=args.latency,
+            jitter=args.jitter,
+            concurrency_limit=args.llm_concurrency_limit,
+        ).start()
+        os.environ["AZURE_OPENAI_ENDPOINT"] = self.server.endpoint
+        os.environ.setdefault("AZURE_OPENAI_API_KEY", "fake-key")
+        os.environ["VOCAB_REQUEST_LOG"] = "false"
+        if args.mongo_url:
+            os.environ["AGNO_MONGO_URL"] = args.mongo_url
+            os.environ["MONGODB_DATABASE_NAME"] = args.mongo_database
+        else:
+            os.environ["AGNO_MONGO_URL"] = ""
+
+        # Import sau khi đã set env (các module đọc config lúc import)
+        import main
+        from sound_words import load_sound_vocabs
+
+        if not args.mongo_url:
+            from benchmarks import fake_mongo
+
+            self.database = fake_mongo.install(latency=args.mongo_latency)
+        self.app = main.app
+        self.words = load_sound_vocabs()
+        # Thứ hạng phổ biến giả lập: hoán vị cố định của sounds.json
+        random.Random(args.seed).shuffle(self.words)
+
+    async def teardown(self) -> None:
+        if self.server is not None:
+            self.server.stop()
+
+    async def reset(self) -> None:
+        """
+        Đưa cache về trạng thái rỗng trước mỗi scenario
+        """
+        import vocab_cache
+
+        vocab_cache._l1_cache.clear()
+        vocab_cache._negative_l1_cache.clear()
+        if self.database is not None:
+            self.database.clear()
+        else:
+            client = vocab_cache._get_client()
+            for name in (vocab_cache.CACHE_COLLECTION, vocab_cache.LEASE_COLLECTION):
+                await client[vocab_cache.DATABASE_NAME][name].delete_many({})
+        self.server.reset_counters()
+
+    async def seed(self, words: List[str]) -> None:
+        from vocab_cache import save_vocab_info_to_cache
+
+        for vocab in words:
+            await save_vocab_info_to_cache(vocab, LANGUAGE, build_vocab_payload(vocab, LANGUAGE))
+        # Chỉ giữ trong L2 để phần đầu của scenario đo cả đường Mongo
+        import vocab_cache
+
+        vocab_cache._l1_cache.clear()
+
+    async def drive(self, words: List[str], concurrency: int) -> Dict[str, Any]:
+        """
+        Gửi request cho từng từ trong `words` với tối đa `concurrency` request đồng thời
+        """
+        latencies: List[float] = []
+        statuses: Dict[str, int] = {}
+        queue = iter(words)
+        transport = httpx.ASGITransport(app=self.app)
+        timeout = httpx.Timeout(self.args.latency * 10 + 30)
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+
+            async def worker() -> None:
+                for vocab in queue:
+                    started = time.perf_counter()
+                    try:
+                        response = await client.get(f"/api/vocab/info/{LANGUAGE}/{vocab}")
+                        status = str(response.status_code)
+                    except Exception as e:
+                        status = type(e).__name__
+                    latencies.append(time.perf_counter() - started)
+                    statuses[status] = statuses.get(status, 0) + 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            "requests": len(latencies),
+            "concurrency": concurrency,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(_percentile(latencies, 50) * 1000, 2),
+                "p95": round(_percentile(latencies, 95) * 1000, 2),
+                "p99": round(_percentile(latencies, 99) * 1000, 2),
+                "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+            },
+            "status_codes": statuses,
+            "errors": sum(count for status, count in statuses.items() if status != "200"),
+        }
+
+    async def run_scenario(self, name: str) -> Dict[str, Any]:
+        args = self.args
+        await self.reset()
+        config: Dict[str, Any]
+        if name == "hit_heavy":
+            sampler = ZipfSampler(self.words[: args.vocab_size], args.zipf_hot, args.seed)
+            seeded = sampler.head_for_mass(args.seed_mass)
+            await self.seed(seeded)
+            words = sampler.sample(args.requests)
+            concurrency = args.concurrency
+            config = {"vocab_size": len(sampler.words), "zipf_exponent": args.zipf_hot, "seeded": len(seeded)}
+        elif name == "miss_heavy":
+            sampler = ZipfSampler(self.words, args.zipf_cold, args.seed)
+            words = sampler.sample(args.requests)
+            concurrency = args.concurrency
+            config = {"vocab_size": len(sampler.words), "zipf_exponent": args.zipf_cold, "seeded": 0}
+        else:
+            hot = self.words[: args.burst_words]
+            words = random.Random(args.seed).choices(hot, k=args.burst_requests)
+            concurrency = args.burst_requests
+            config = {"vocab_size": len(hot), "seeded": 0}
+
+        counters_before = _cache_counters()
+        self.server.reset_counters()
+        report = await self.drive(words, concurrency)
+        counters = {
+            key: value - counters_before[key] for key, value in _cache_counters().items() if value - counters_before[key]
+        }
+        lookups = counters.get("l1_hit", 0) + counters.get("l1_miss", 0)
+        hits = counters.get("l1_hit", 0) + counters.get("mongo_hit", 0)
+        report = {
+            "scenario": name,
+            **config,
+            **report,
+            "distinct_words": len(set(words)),
+            "llm_calls": self.server.calls,
+            "llm_max_in_flight": self.server.max_in_flight,
+            "llm_rate_limited": self.server.rate_limited,
+            "cache_hit_ratio": round(hits / lookups, 4) if lookups else None,
+            "cache_counters": counters,
+        }
+        print(report)
+        return report
+
+
+async def main(args: argparse.Namespace) -> None:
+    load_test = LoadTest(args)
+    await load_test.setup()
+    try:
+        scenarios = [await load_test.run_scenario(name) for name in args.scenarios]
+    finally:
+        await load_test.teardown()
+
+    result = {
+        "benchmark": "load_test",
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "config": {
+            "llm_latency_s": args.latency,
+            "llm_jitter_s": args.jitter,
+            "llm_concurrency_limit": args.llm_concurrency_limit,
+            "mongo": "real" if args.mongo_url else "in_memory",
+            "mongo_latency_s": None if args.mongo_url else args.mongo_latency,
+            "language": LANGUAGE,
+            "seed": args.seed,
+        },
+        "scenarios": scenarios,
+    }
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"load_test-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS), help="Scenario cần chạy")
+    parser.add_argument("--requests", type=int, default=2000, help="Số request cho hit_heavy/miss_heavy")
+    parser.add_argument("--concurrency", type=int, default=50, help="Số client đồng thời cho hit_heavy/miss_heavy")
+    parser.add_argument("--latency", type=float, default=0.5, help="Độ trễ của fake LLM (giây)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Jitter của fake LLM (giây)")
+    parser.add_argument(
+        "--llm-concurrency-limit", type=int, default=None, help="Fake LLM trả về 429 khi vượt số request đồng thời này"
+    )
+    parser.add_argument("--mongo-latency", type=float, default=0.002, help="Độ trễ mỗi thao tác của Mongo giả lập (giây)")
+    parser.add_argument("--mongo-url", default="", help="Dùng MongoDB thật thay vì Mongo giả lập")
+    parser.add_argument("--mongo-database", default="vocab_load_test", help="Database dùng khi có --mongo-url")
+    parser.add_argument("--vocab-size", type=int, default=2000, help="Số từ của hit_heavy")
+    parser.add_argument("--zipf-hot", type=float, default=1.2, help="Độ lệch Zipf của hit_heavy")
+    parser.add_argument("--zipf-cold", type=float, default=0.6, help="Độ lệch Zipf của miss_heavy")
+    parser.add_argument("--seed-mass", type=float, default=0.9, help="Phần xác suất được seed sẵn cho hit_heavy")
+    parser.add_argument("--burst-words", type=int, default=5, help="Số từ của burst")
+    parser.add_argument("--burst-requests", type=int, default=500, help="Số request đồng thời của burst")
+    parser.add_argument("--seed", type=int, default=42, help="Seed cho traffic")
+    parser.add_argument("--output", default="", help="File JSON kết quả (mặc định benchmarks/results/...)")
+    asyncio.run(main(parser.parse_args()))
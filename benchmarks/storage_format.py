@@ -0,0 +1,242 @@
+"""
+Benchmark định dạng lưu cache: bytes mỗi entry và thời gian decode ra response bytes
+
+So sánh:
+- legacy: document lưu cả data (dict) và payload (JSON bytes), L1 giữ cả hai
+- zstd: JSON payload nén zstd, không dictionary
+- zstd+dict: JSON payload nén zstd với dictionary train trên tập mẫu (định dạng hiện tại)
+- msgpack+zstd+dict: data dạng msgpack nén zstd với dictionary (cần `pip install msgpack`),
+  decode phải chuyển lại sang JSON để trả cho client
+
+Bytes mỗi entry tính trên BSON của phần nội dung trong document MongoDB; L1 là
+bộ nhớ Python của một entry (deep sizeof). Decode đo từ BSON bytes (như nhận từ
+MongoDB) tới response bytes, và từ L1 entry tới response bytes. Các định dạng
+compact chỉ áp dụng cho MongoDB: L1 giữ CacheEntry đã giải mã (response bytes).
+
+Payload mặc định là dữ liệu giả lập (câu ghép từ các từ trong sounds.json), nên
+kết quả thật phụ thuộc nội dung LLM sinh ra: dùng --payloads với file JSON lines
+export từ cache thật để đo chính xác.
+
+Chạy từ thư mục gốc repo:
+    python -m benchmarks.storage_format --entries 5000
+    python -m benchmarks.storage_format --payloads export.jsonl
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import bson
+import zstandard
+
+from sound_words import load_sound_vocabs
+from vocab_cache import CacheEntry, encode_payload
+from vocab_codec import (
+    COMPRESSION_LEVEL,
+    PAYLOAD_FORMAT_ZSTD,
+    decode_blob,
+    encode_blob,
+    register_dictionary,
+    train_dictionary,
+)
+
+# Từ tiếng Việt thông dụng để giả lập phần dịch/giải thích
+_VIETNAMESE_WORDS = (
+    "của và là có không được người một những này cho với các trong đã khi để "
+    "đến từ nghĩa câu thường dùng chỉ việc hành động trạng thái diễn tả sự "
+    "cách nói nguồn gốc tiếng latin thế kỷ xuất hiện ban đầu mang ý rằng"
+).split()
+_LANGUAGES = ("Vietnamese", "Japanese", "Korean", "Simplified Chinese", "French")
+
+
+def _sentence(rng: random.Random, pool: List[str], low: int, high: int) -> str:
+    return " ".join(rng.choice(pool) for _ in range(rng.randint(low, high))).capitalize() + "."
+
+
+def _synthetic_payloads(n: int, seed: int) -> List[Dict[str, Any]]:
+    """
+    Vocab info giả lập có độ dài gần với output thật của LLM
+    """
+    rng = random.Random(seed)
+    words = load_sound_vocabs()
+    payloads = []
+    for _ in range(n):
+        vocab = rng.choice(words)
+        payloads.append({
+            "vocab": vocab,
+            "language": rng.choice(_LANGUAGES),
+            "examples": [
+                {
+                    "level": level,
+                    "sentence": _sentence(rng, words, 8, 16),
+                    "translation": _sentence(rng, _VIETNAMESE_WORDS, 10, 22),
+                }
+                for level in ("easy", "medium", "hard")
+            ],
+            "synonyms": [
+                {"word": rng.choice(words), "meaning": _sentence(rng, _VIETNAMESE_WORDS, 6, 14)}
+                for _ in range(rng.randint(2, 5))
+            ],
+            "origin": {
+                "etymology": _sentence(rng, _VIETNAMESE_WORDS, 25, 50),
+                "historical_context": _sentence(rng, _VIETNAMESE_WORDS, 0, 40) if rng.random() < 0.7 else None,
+            },
+        })
+    return payloads
+
+
+def _load_payloads(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _deep_sizeof(value: Any) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_sizeof(key) + _deep_sizeof(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_deep_sizeof(item) for item in value)
+    elif hasattr(value, "__slots__"):
+        size += sum(_deep_sizeof(getattr(value, slot)) for slot in value.__slots__)
+    return size
+
+
+def _time_per_item(items: List[Any], decode: Callable[[Any], bytes], repeat: int) -> float:
+    """
+    Thời gian decode trung bình mỗi item (micro giây)
+    """
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            decode(item)
+    return (time.perf_counter() - started) / (repeat * len(items)) * 1e6
+
+
+def _measure(
+    name: str,
+    datas: List[Dict[str, Any]],
+    encode: Callable[[Dict[str, Any]], Tuple[Dict[str, Any], Any]],
+    decode_doc: Callable[[Dict[str, Any]], bytes],
+    decode_l1: Callable[[Any], bytes],
+    repeat: int,
+) -> Dict[str, Any]:
+    """
+    Đo một định dạng
+
+    Args:
+        encode: data -> (các field lưu trong document, L1 entry)
+        decode_doc: document (đã decode BSON) -> response bytes
+        decode_l1: L1 entry -> response bytes
+    """
+    encoded = [encode(data) for data in datas]
+    documents = [bson.encode(fields) for fields, _ in encoded]
+    entries = [entry for _, entry in encoded]
+
+    expected = encode_payload(datas[0])
+    assert decode_doc(bson.decode(documents[0])) == expected, name
+    assert decode_l1(entries[0]) == expected, name
+
+    report = {
+        "format": name,
+        "entries": len(datas),
+        "mongo_bytes_per_entry": round(sum(map(len, documents)) / len(documents), 1),
+        "l1_bytes_per_entry": round(sum(map(_deep_sizeof, entries)) / len(entries), 1),
+        "decode_from_mongo_us": round(_time_per_item(documents, lambda doc: decode_doc(bson.decode(doc)), repeat), 2),
+        "decode_from_l1_us": round(_time_per_item(entries, decode_l1, repeat), 2),
+    }
+    print(report)
+    return report
+
+
+def main(args: argparse.Namespace) -> None:
+    datas = _load_payloads(args.payloads) if args.payloads else _synthetic_payloads(args.entries + args.train, args.seed)
+    # Dictionary được train trên tập riêng, đo trên phần còn lại
+    train_datas, datas = datas[:args.train], datas[args.train:]
+    if not datas:
+        raise SystemExit("Not enough payloads after the training split")
+    dictionary = train_dictionary([encode_payload(data) for data in train_datas], size=args.dict_size)
+    # zstd+dict đi qua đúng code path của cache (vocab_codec + CacheEntry)
+    register_dictionary(dictionary.as_bytes(), current=True)
+    print(f"Trained {args.dict_size}-byte dictionary on {len(train_datas)} payloads, measuring {len(datas)} entries")
+
+    plain_compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL)
+    plain_decompressor = zstandard.ZstdDecompressor()
+
+    def legacy(data: Dict[str, Any]) -> Tuple[Dict[str, Any], Any]:
+        payload = encode_payload(data)
+        return {"data": data, "payload": payload}, {"data": data, "payload": payload}
+
+    def plain(data: Dict[str, Any]) -> Tuple[Dict[str, Any], Any]:
+        payload = encode_payload(data)
+        blob = plain_compressor.compress(payload)
+        return {"blob": blob, "payload_format": PAYLOAD_FORMAT_ZSTD}, CacheEntry(payload)
+
+    def current(data: Dict[str, Any]) -> Tuple[Dict[str, Any], Any]:
+        payload = encode_payload(data)
+        blob, payload_format = encode_blob(payload)
+        return {"blob": blob, "payload_format": payload_format}, CacheEntry(payload)
+
+    reports = [
+        _measure(
+            "legacy", datas, legacy,
+            lambda doc: doc["payload"],
+            lambda entry: entry["payload"],
+            args.repeat,
+        ),
+        _measure(
+            "zstd", datas, plain,
+            lambda doc: plain_decompressor.decompress(doc["blob"]),
+            lambda entry: entry.payload,
+            args.repeat,
+        ),
+        _measure(
+            "zstd+dict", datas, current,
+            lambda doc: decode_blob(doc["blob"], doc["payload_format"]),
+            lambda entry: entry.payload,
+            args.repeat,
+        ),
+    ]
+
+    try:
+        import msgpack
+    except ImportError:
+        print("Info: msgpack is not installed, skipping msgpack+zstd+dict")
+    else:
+        packed_set = [msgpack.packb(data) for data in train_datas]
+        packed_dictionary = zstandard.train_dictionary(args.dict_size, packed_set, level=COMPRESSION_LEVEL)
+        packed_compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL, dict_data=packed_dictionary)
+        packed_decompressor = zstandard.ZstdDecompressor(dict_data=packed_dictionary)
+
+        def msgpack_encode(data: Dict[str, Any]) -> Tuple[Dict[str, Any], Any]:
+            blob = packed_compressor.compress(msgpack.packb(data))
+            return {"blob": blob, "payload_format": 2}, CacheEntry(encode_payload(data))
+
+        def msgpack_decode(blob: bytes) -> bytes:
+            return encode_payload(msgpack.unpackb(packed_decompressor.decompress(blob)))
+
+        reports.append(_measure(
+            "msgpack+zstd+dict", datas, msgpack_encode,
+            lambda doc: msgpack_decode(doc["blob"]),
+            lambda entry: entry.payload,
+            args.repeat,
+        ))
+
+    legacy_report, current = reports[0], reports[2]
+    print(
+        f"zstd+dict vs legacy: Mongo {legacy_report['mongo_bytes_per_entry'] / current['mongo_bytes_per_entry']:.1f}x smaller, "
+        f"L1 {legacy_report['l1_bytes_per_entry'] / current['l1_bytes_per_entry']:.1f}x smaller, "
+        f"+{current['decode_from_l1_us'] - legacy_report['decode_from_l1_us']:.1f} us per L1 hit"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=5000, help="Số entry giả lập để đo")
+    parser.add_argument("--train", type=int, default=2000, help="Số payload dùng để train dictionary (không đo)")
+    parser.add_argument("--payloads", default=None, help="File JSON lines vocab info thật (thay cho dữ liệu giả lập)")
+    parser.add_argument("--dict-size", type=int, default=16384, help="Kích thước dictionary (bytes)")
+    parser.add_argument("--repeat", type=int, default=5, help="Số lần lặp khi đo decode")
+    parser.add_argument("--seed", type=int, default=42, help="Seed của dữ liệu giả lập")
+    main(parser.parse_args())
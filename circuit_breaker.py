@@ -0,0 +1,133 @@
+"""
+Circuit breaker cho các dependency có thể chậm/chết (ví dụ: MongoDB cache)
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker 3 trạng thái: closed -> open -> half_open -> closed
+
+    - closed: mọi request đi qua, đếm lỗi liên tiếp
+    - open: sau failure_threshold lỗi liên tiếp, bỏ qua dependency hoàn toàn;
+      nếu có probe, một background task probe định kỳ và đóng lại khi thành công
+    - half_open: sau recovery_timeout (khi không probe được), cho một request thử
+
+    Args:
+        name: Tên dependency (dùng khi log)
+        failure_threshold: Số lỗi liên tiếp để mở breaker
+        recovery_timeout: Thời gian (giây) trước khi cho request thử khi không có probe
+        probe: Coroutine function kiểm tra dependency, raise nếu chưa phục hồi
+        probe_interval: Khoảng cách (giây) giữa các lần probe
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        recovery_timeout: float = 30.0,
+        probe: Optional[Callable[[], Awaitable[Any]]] = None,
+        probe_interval: float = 5.0,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.probe = probe
+        self.probe_interval = probe_interval
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.short_circuited = 0
+        self.opened_count = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def allow_request(self) -> bool:
+        """
+        True nếu được phép gọi dependency
+        """
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and self._probe_task is None:
+            # Không có background probe: sau recovery_timeout cho một request thử
+            if self.opened_at is not None and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self.state = self.HALF_OPEN
+                return True
+        self.short_circuited += 1
+        return False
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            print(f"Info: Circuit breaker '{self.name}' closed, dependency recovered")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+
+    def record_failure(self, error: Optional[BaseException] = None) -> None:
+        self.consecutive_failures += 1
+        self.total_failures += 1
+        if error is not None:
+            self.last_error = str(error)[:200]
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        if self.state != self.OPEN:
+            self.opened_count += 1
+            print(
+                f"Warning: Circuit breaker '{self.name}' opened after "
+                f"{self.consecutive_failures} consecutive failures: {self.last_error}"
+            )
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self._start_probe()
+
+    def _start_probe(self) -> None:
+        if self.probe is None or self._probe_task is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._probe_task = loop.create_task(self._probe_loop())
+
+    async def _probe_loop(self) -> None:
+        """
+        Probe dependency định kỳ cho tới khi phục hồi
+        """
+        try:
+            while self.state != self.CLOSED:
+                await asyncio.sleep(self.probe_interval)
+                try:
+                    await self.probe()
+                except Exception as e:
+                    self.last_error = str(e)[:200]
+                    continue
+                self.record_success()
+        finally:
+            self._probe_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Trạng thái của breaker (dùng cho health/metrics endpoint)
+        """
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "total_failures": self.total_failures,
+            "short_circuited": self.short_circuited,
+            "opened_count": self.opened_count,
+            "open_for_seconds": (
+                round(time.monotonic() - self.opened_at, 1) if self.opened_at is not None else None
+            ),
+            "last_error": self.last_error,
+        }
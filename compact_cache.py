@@ -0,0 +1,172 @@
+"""
+Chuyển document vocab_cache sang định dạng compact (vocab_codec), train dictionary zstd
+
+- --train-dictionary: lấy mẫu payload từ cache, train dictionary và lưu vào
+  collection vocab_codec_dicts (mọi worker nạp dictionary từ đây khi cần)
+- Document cũ (data + payload) hoặc nén bằng dictionary khác được mã hoá lại
+  bằng dictionary hiện tại. Mặc định chỉ báo cáo (dry run), thêm --apply để ghi.
+  Document chưa chuyển vẫn đọc được bình thường và được chuyển khi refresh.
+
+Chạy từ thư mục gốc repo:
+    python compact_cache.py --train-dictionary --samples 5000
+    python compact_cache.py --apply
+"""
+import argparse
+import asyncio
+import json
+from typing import Any, Dict, List
+
+import bson
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from vocab_cache import (
+    _ENTRY_PROJECTION,
+    _ensure_codec_dictionary,
+    _entry_from_doc,
+    _get_collection,
+    _has_entry,
+    save_codec_dictionary,
+)
+from vocab_codec import (
+    COMPRESSION_ENABLED,
+    PAYLOAD_FORMAT_JSON,
+    PAYLOAD_FORMAT_ZSTD,
+    blob_dict_id,
+    current_dict_id,
+    encode_blob,
+    train_dictionary,
+)
+
+
+def _needs_compaction(cached_doc: Dict[str, Any]) -> bool:
+    """
+    Document chưa ở định dạng/dictionary hiện tại
+    """
+    if "blob" not in cached_doc:
+        return True
+    payload_format = cached_doc.get("payload_format", PAYLOAD_FORMAT_ZSTD)
+    if payload_format != (PAYLOAD_FORMAT_ZSTD if COMPRESSION_ENABLED else PAYLOAD_FORMAT_JSON):
+        return True
+    if payload_format != PAYLOAD_FORMAT_ZSTD:
+        return False
+    try:
+        return blob_dict_id(cached_doc["blob"]) != current_dict_id()
+    except ValueError:
+        # Blob hỏng: để _entry_from_doc báo undecodable
+        return True
+
+
+def _stored_size(cached_doc: Dict[str, Any]) -> int:
+    """
+    Số bytes BSON của phần nội dung (data/payload hoặc blob) trong document
+    """
+    fields = ("blob", "payload_format") if "blob" in cached_doc else ("data", "payload")
+    return len(bson.encode({field: cached_doc[field] for field in fields if field in cached_doc}))
+
+
+async def _sample_payloads(collection: AsyncIOMotorCollection, samples: int) -> List[bytes]:
+    payloads = []
+    cursor = collection.find({"negative": {"$exists": False}}, _ENTRY_PROJECTION).limit(samples)
+    async for cached_doc in cursor:
+        cached_entry = await _entry_from_doc(cached_doc) if _has_entry(cached_doc) else None
+        if cached_entry is not None:
+            payloads.append(cached_entry.payload)
+    return payloads
+
+
+async def compact_cache(
+    collection: AsyncIOMotorCollection,
+    apply: bool = False,
+    train: bool = False,
+    samples: int = 5000,
+    dict_size: int = 16384,
+) -> Dict[str, Any]:
+    """
+    Train dictionary (tuỳ chọn) rồi mã hoá lại các document chưa compact
+
+    Args:
+        collection: Collection vocab_cache
+        apply: False để chỉ báo cáo, không ghi
+        train: Train dictionary mới từ mẫu payload trước khi mã hoá lại
+        samples: Số payload mẫu để train dictionary
+        dict_size: Kích thước dictionary (bytes)
+
+    Returns:
+        Dict thống kê (số document, số document cần chuyển, bytes trước/sau)
+    """
+    stats: Dict[str, Any] = {"applied": apply}
+    await _ensure_codec_dictionary()
+    if train:
+        payloads = await _sample_payloads(collection, samples)
+        if len(payloads) < 10:
+            print(f"Warning: Only {len(payloads)} cached payloads, not enough to train a dictionary")
+        else:
+            await save_codec_dictionary(train_dictionary(payloads, size=dict_size).as_bytes())
+            stats["dictionary_samples"] = len(payloads)
+    stats["dict_id"] = current_dict_id()
+
+    documents = to_compact = undecodable = bytes_before = bytes_after = 0
+    cursor = collection.find({"negative": {"$exists": False}}, _ENTRY_PROJECTION)
+    async for cached_doc in cursor:
+        if not _has_entry(cached_doc):
+            continue
+        documents += 1
+        if not _needs_compaction(cached_doc):
+            continue
+        cached_entry = await _entry_from_doc(cached_doc)
+        if cached_entry is None:
+            # Để nguyên: cache miss khi đọc, được ghi đè khi generate lại
+            undecodable += 1
+            continue
+        to_compact += 1
+        blob, payload_format = encode_blob(cached_entry.payload)
+        bytes_before += _stored_size(cached_doc)
+        bytes_after += _stored_size({"blob": blob, "payload_format": payload_format})
+        if apply:
+            await collection.update_one(
+                {"_id": cached_doc["_id"]},
+                {
+                    "$set": {"blob": blob, "payload_format": payload_format},
+                    "$unset": {"data": "", "payload": ""},
+                },
+            )
+
+    stats.update({
+        "documents": documents,
+        "to_compact": to_compact,
+        "undecodable": undecodable,
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "bytes_per_entry_before": round(bytes_before / to_compact, 1) if to_compact else 0.0,
+        "bytes_per_entry_after": round(bytes_after / to_compact, 1) if to_compact else 0.0,
+    })
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apply", action="store_true", help="Ghi thay đổi (mặc định chỉ báo cáo)")
+    parser.add_argument("--train-dictionary", action="store_true", help="Train dictionary zstd mới từ cache")
+    parser.add_argument("--samples", type=int, default=5000, help="Số payload mẫu để train dictionary")
+    parser.add_argument("--dict-size", type=int, default=16384, help="Kích thước dictionary (bytes)")
+    args = parser.parse_args()
+
+    collection = _get_collection()
+    if collection is None:
+        print("Warning: MongoDB cache is not configured (AGNO_MONGO_URL), nothing to compact")
+        return
+
+    stats = asyncio.run(compact_cache(
+        collection,
+        apply=args.apply,
+        train=args.train_dictionary,
+        samples=args.samples,
+        dict_size=args.dict_size,
+    ))
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+    if not args.apply and stats["to_compact"]:
+        print("Info: Dry run, rerun with --apply to rewrite documents")
+
+
+if __name__ == "__main__":
+    main()
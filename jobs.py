@@ -0,0 +1,456 @@
+"""
+Generate vocab info bất đồng bộ: job queue trong MongoDB + worker pool
+
+- Cache miss ở chế độ job: enqueue job và trả về 202 + job ID ngay, HTTP
+  connection không phải giữ trong suốt LLM call
+- Worker (process riêng `python -m jobs`, hoặc asyncio task trong process nếu
+  bật VOCAB_JOB_IN_PROCESS_WORKERS) claim job từ collection vocab_jobs bằng
+  find_one_and_update, generate rồi lưu kết quả vào job (và cache như bình thường)
+- Worker đang chạy job gia hạn lease định kỳ, job chỉ bị worker khác claim lại
+  khi worker giữ nó ngừng gia hạn (chết/treo)
+- Client poll / long-poll GET /api/vocab/jobs/{job_id}
+
+Job ID suy ra từ cache key nên các miss cùng (vocab, language) dùng chung một job.
+"""
+import asyncio
+import hashlib
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import pymongo
+from pymongo import ReturnDocument
+
+from metrics import Counter
+import vocab_cache
+from vocab_cache import _CONNECTION_ERRORS, _breaker, _generate_cache_key
+from vocab_info_service import get_vocab_info
+
+
+JOBS_COLLECTION = "vocab_jobs"
+# Cache miss trả về 202 + job mặc định (không cần header "Prefer: respond-async")
+ASYNC_JOBS_DEFAULT = os.getenv("VOCAB_ASYNC_JOBS", "false").lower() in ("1", "true", "yes")
+# Số worker task trong mỗi process
+JOB_WORKERS = int(os.getenv("VOCAB_JOB_WORKERS", "2"))
+# Chạy worker trong process API (chỉ cho server chạy lâu: trên serverless task nền
+# bị dừng sau khi trả response, production chạy `python -m jobs` riêng)
+JOB_IN_PROCESS_WORKERS = os.getenv("VOCAB_JOB_IN_PROCESS_WORKERS", "false").lower() in ("1", "true", "yes")
+# Worker không có job thì chờ bao lâu trước khi claim lại (giây)
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("VOCAB_JOB_POLL_INTERVAL_SECONDS", "1"))
+# Job running không được gia hạn trong thời gian này (worker chết) thì worker khác được claim lại
+JOB_LEASE_SECONDS = float(os.getenv("VOCAB_JOB_LEASE_SECONDS", "120"))
+# Chu kỳ gia hạn lease của job đang chạy (phải nhỏ hơn JOB_LEASE_SECONDS)
+JOB_HEARTBEAT_SECONDS = float(os.getenv("VOCAB_JOB_HEARTBEAT_SECONDS", str(JOB_LEASE_SECONDS / 4)))
+# Số lần chạy tối đa của một job trước khi chuyển sang failed
+JOB_MAX_ATTEMPTS = int(os.getenv("VOCAB_JOB_MAX_ATTEMPTS", "3"))
+# Job đã xong/lỗi được giữ lại bao lâu (TTL index)
+JOB_RETENTION_SECONDS = float(os.getenv("VOCAB_JOB_RETENTION_SECONDS", str(24 * 3600)))
+# Thời gian long-poll tối đa cho một request status (giây)
+JOB_MAX_WAIT_SECONDS = float(os.getenv("VOCAB_JOB_MAX_WAIT_SECONDS", "25"))
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+FINISHED_STATUSES = (DONE, FAILED)
+
+JOB_EVENTS = Counter(
+    "vocab_jobs_total",
+    "Generation jobs by event (enqueued, deduplicated, done, retried, failed)",
+    ("event",),
+)
+
+_workers: List[asyncio.Task] = []
+_indexes_ensured = False
+# Báo cho worker có job mới / cho long-poll có job vừa xong (trong process này)
+_work_available: Optional[asyncio.Event] = None
+_job_finished: Optional[asyncio.Event] = None
+
+
+def job_id_for(vocab: str, language: str) -> str:
+    """
+    Job ID của (vocab, language), giống nhau cho mọi request cùng cache key
+    """
+    return hashlib.sha256(_generate_cache_key(vocab, language).encode("utf-8")).hexdigest()[:24]
+
+
+def _job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "job_id": job["_id"],
+        "status": job["status"],
+        "vocab": job["vocab"],
+        "language": job["language"],
+        "attempts": job.get("attempts", 0),
+        "result": job.get("result"),
+        "error": job.get("error"),
+    }
+
+
+def _get_jobs_collection():
+    """
+    Collection vocab_jobs
+
+    Raises:
+        ConnectionError: Nếu chưa cấu hình MongoDB hoặc circuit breaker đang mở
+    """
+    collection = vocab_cache._get_collection(JOBS_COLLECTION)
+    if collection is None:
+        raise ConnectionError("MongoDB job queue is not available")
+    return collection
+
+
+async def _ensure_indexes(collection) -> None:
+    """
+    Index cho claim (status, available_at) và TTL index xoá job cũ (một lần mỗi process)
+    """
+    global _indexes_ensured
+    if _indexes_ensured:
+        return
+    try:
+        await collection.create_index([("status", 1), ("available_at", 1)])
+        await collection.create_index("expires_at", expireAfterSeconds=0)
+    except pymongo.errors.OperationFailure as e:
+        print(f"Warning: Cannot create indexes on {JOBS_COLLECTION}: {e}")
+    _indexes_ensured = True
+
+
+def _get_work_available() -> asyncio.Event:
+    global _work_available
+    if _work_available is None:
+        _work_available = asyncio.Event()
+    return _work_available
+
+
+def _get_job_finished() -> asyncio.Event:
+    global _job_finished
+    if _job_finished is None:
+        _job_finished = asyncio.Event()
+    return _job_finished
+
+
+def _notify_job_finished() -> None:
+    """
+    Đánh thức mọi long-poll đang chờ, chúng tự đọc lại trạng thái job của mình
+    """
+    global _job_finished
+    finished = _get_job_finished()
+    _job_finished = asyncio.Event()
+    finished.set()
+
+
+async def enqueue_vocab_job(vocab: str, language: str) -> Optional[Dict[str, Any]]:
+    """
+    Enqueue job generate vocab info, hoặc trả về job đang có cho cùng key
+
+    Job pending/running được dùng lại; job failed hoặc done được chạy lại từ đầu
+    (caller chỉ enqueue khi cache miss, job done nghĩa là kết quả đã bị xoá khỏi
+    cache, trả lại kết quả cũ trong job thì sẽ không còn gì generate lại).
+
+    Args:
+        vocab: Từ vựng
+        language: Ngôn ngữ
+
+    Returns:
+        Dict {job_id, status, vocab, language, attempts, result, error},
+        None nếu không dùng được MongoDB (caller xử lý đồng bộ)
+    """
+    job_id = job_id_for(vocab, language)
+    now = datetime.utcnow()
+    pending = {
+        "status": PENDING,
+        "vocab": vocab,
+        "language": language,
+        "attempts": 0,
+        "created_at": now,
+        "available_at": now,
+        "expires_at": now + timedelta(seconds=JOB_RETENTION_SECONDS),
+    }
+    collection = vocab_cache._get_collection(JOBS_COLLECTION)
+    if collection is None:
+        return None
+    try:
+        await _ensure_indexes(collection)
+        try:
+            result = await collection.update_one({"_id": job_id}, {"$setOnInsert": pending}, upsert=True)
+            created = result.upserted_id is not None
+        except pymongo.errors.DuplicateKeyError:
+            # Upsert đồng thời cùng _id: request kia đã tạo job
+            created = False
+
+        if created:
+            job = {"_id": job_id, **pending}
+        else:
+            job = await collection.find_one_and_update(
+                {"_id": job_id, "status": {"$in": [FAILED, DONE]}},
+                {"$set": {**pending, "result": None, "error": None}},
+                return_document=ReturnDocument.AFTER,
+            )
+            created = job is not None
+            if job is None:
+                job = await collection.find_one({"_id": job_id})
+        _breaker.record_success()
+    except _CONNECTION_ERRORS as e:
+        _breaker.record_failure(e)
+        print(f"Warning: Cannot enqueue vocab job, generating synchronously: {e}")
+        return None
+    except Exception as e:
+        print(f"Warning: Error enqueuing vocab job, generating synchronously: {e}")
+        return None
+    if job is None:
+        # Job vừa bị TTL index xoá giữa hai thao tác
+        return None
+
+    JOB_EVENTS.inc(event="enqueued" if created else "deduplicated")
+    if job["status"] == PENDING:
+        ensure_job_workers()
+        _get_work_available().set()
+    return _job_view(job)
+
+
+async def get_vocab_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Trạng thái hiện tại của job
+
+    Returns:
+        Dict như enqueue_vocab_job, None nếu không có job
+
+    Raises:
+        ConnectionError: Nếu không dùng được MongoDB
+    """
+    collection = _get_jobs_collection()
+    try:
+        job = await collection.find_one({"_id": job_id})
+    except _CONNECTION_ERRORS as e:
+        _breaker.record_failure(e)
+        raise ConnectionError(f"MongoDB job queue is not available: {e}") from e
+    return _job_view(job) if job else None
+
+
+async def wait_for_vocab_job(job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+    """
+    Long-poll: chờ job xong (done/failed) tối đa `timeout` giây
+
+    Job xong trong process này thì trả về ngay; job do process khác chạy được
+    đọc lại mỗi JOB_POLL_INTERVAL_SECONDS.
+
+    Returns:
+        Trạng thái job lúc xong hoặc lúc hết timeout, None nếu không có job
+
+    Raises:
+        ConnectionError: Nếu không dùng được MongoDB
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + min(timeout, JOB_MAX_WAIT_SECONDS)
+    while True:
+        finished = _get_job_finished()
+        job = await get_vocab_job(job_id)
+        remaining = deadline - loop.time()
+        if job is None or job["status"] in FINISHED_STATUSES or remaining <= 0:
+            return job
+        try:
+            await asyncio.wait_for(finished.wait(), timeout=min(remaining, JOB_POLL_INTERVAL_SECONDS))
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _claim_job(collection, owner: str) -> Optional[Dict[str, Any]]:
+    """
+    Claim job pending cũ nhất (hoặc job running đã hết lease) một cách atomic
+    """
+    now = datetime.utcnow()
+    return await collection.find_one_and_update(
+        {
+            "$or": [
+                {"status": PENDING, "available_at": {"$lte": now}},
+                {"status": RUNNING, "lease_until": {"$lt": now}},
+            ]
+        },
+        {
+            "$set": {
+                "status": RUNNING,
+                "owner": owner,
+                "started_at": now,
+                "lease_until": now + timedelta(seconds=JOB_LEASE_SECONDS),
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("available_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _renew_lease(collection, owner: str, job_id: str) -> None:
+    """
+    Gia hạn lease của job đang chạy mỗi JOB_HEARTBEAT_SECONDS cho tới khi bị cancel
+
+    Một lần generate (nhiều lần thử LLM + repair) có thể lâu hơn JOB_LEASE_SECONDS,
+    không gia hạn thì worker khác claim lại và generate trùng.
+    """
+    while True:
+        await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+        try:
+            result = await collection.update_one(
+                {"_id": job_id, "owner": owner, "status": RUNNING},
+                {"$set": {"lease_until": datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)}},
+            )
+        except Exception as e:
+            if isinstance(e, _CONNECTION_ERRORS):
+                _breaker.record_failure(e)
+            print(f"Warning: Cannot renew lease of vocab job {job_id}: {e}")
+            continue
+        if result.matched_count == 0:
+            print(f"Warning: Vocab job {job_id} is no longer owned by {owner}, stop renewing its lease")
+            return
+
+
+async def _finish_job(collection, owner: str, job: Dict[str, Any], update: Dict[str, Any], event: str) -> None:
+    try:
+        # Chỉ worker đang giữ job mới được cập nhật (lease hết hạn thì job đã thuộc worker khác)
+        result = await collection.update_one({"_id": job["_id"], "owner": owner}, {"$set": update})
+        if result.matched_count == 0:
+            print(f"Warning: Vocab job {job['_id']} was reclaimed by another worker, dropping {event} update")
+    except Exception as e:
+        if isinstance(e, _CONNECTION_ERRORS):
+            _breaker.record_failure(e)
+        print(f"Warning: Cannot update vocab job {job['_id']}: {e}")
+    JOB_EVENTS.inc(event=event)
+    _notify_job_finished()
+
+
+async def _run_job(collection, owner: str, job: Dict[str, Any]) -> None:
+    """
+    Generate vocab info cho job đã claim và ghi lại kết quả/lỗi
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=JOB_RETENTION_SECONDS)
+    if job["attempts"] > JOB_MAX_ATTEMPTS:
+        # Job bị bỏ dở nhiều lần (worker chết giữa chừng)
+        await _finish_job(
+            collection, owner, job,
+            {"status": FAILED, "error": "Job abandoned too many times", "finished_at": now, "expires_at": expires_at},
+            "failed",
+        )
+        return
+
+    heartbeat = asyncio.ensure_future(_renew_lease(collection, owner, job["_id"]))
+    try:
+        result = await get_vocab_info(job["vocab"], job["language"])
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        now = datetime.utcnow()
+        # ValueError: LLM trả về dữ liệu không hợp lệ sau khi đã repair, chạy lại cũng vô ích
+        if isinstance(e, ValueError) or job["attempts"] >= JOB_MAX_ATTEMPTS:
+            print(f"Warning: Vocab job {job['_id']} failed: {e}")
+            await _finish_job(
+                collection, owner, job,
+                {"status": FAILED, "error": str(e), "finished_at": now, "expires_at": expires_at},
+                "failed",
+            )
+        else:
+            backoff = JOB_POLL_INTERVAL_SECONDS * 2 ** job["attempts"]
+            await _finish_job(
+                collection, owner, job,
+                {"status": PENDING, "error": str(e), "available_at": now + timedelta(seconds=backoff)},
+                "retried",
+            )
+        return
+
+    finally:
+        heartbeat.cancel()
+
+    now = datetime.utcnow()
+    await _finish_job(
+        collection, owner, job,
+        {"status": DONE, "result": result, "error": None, "finished_at": now, "expires_at": expires_at},
+        "done",
+    )
+
+
+async def _worker_loop(owner: str) -> None:
+    """
+    Claim và chạy job cho tới khi bị cancel; không có job thì chờ job mới hoặc poll interval
+    """
+    work_available = _get_work_available()
+    while True:
+        job = None
+        collection = None
+        try:
+            collection = vocab_cache._get_collection(JOBS_COLLECTION)
+            if collection is not None:
+                job = await _claim_job(collection, owner)
+                _breaker.record_success()
+        except _CONNECTION_ERRORS as e:
+            _breaker.record_failure(e)
+            print(f"Warning: MongoDB timeout when claiming vocab job: {e}")
+        except Exception as e:
+            print(f"Warning: Error claiming vocab job: {e}")
+
+        if job is not None:
+            await _run_job(collection, owner, job)
+            continue
+
+        # asyncio.wait thay vì wait_for: wait_for (Python 3.11) nuốt cancel nếu event
+        # vừa được set, stop_job_workers sẽ chờ mãi
+        waiter = asyncio.ensure_future(work_available.wait())
+        try:
+            await asyncio.wait({waiter}, timeout=JOB_POLL_INTERVAL_SECONDS)
+        finally:
+            waiter.cancel()
+        work_available.clear()
+
+
+def ensure_job_workers(workers: int = JOB_WORKERS) -> List[asyncio.Task]:
+    """
+    Khởi động worker task trong process API nếu bật VOCAB_JOB_IN_PROCESS_WORKERS
+    (lazy, lần đầu có job hoặc có request status)
+
+    Args:
+        workers: Số worker task
+
+    Returns:
+        Danh sách worker task đang chạy (rỗng nếu job do `python -m jobs` xử lý)
+    """
+    if not JOB_IN_PROCESS_WORKERS:
+        return _workers
+    return _start_job_workers(workers)
+
+
+def _start_job_workers(workers: int) -> List[asyncio.Task]:
+    _workers[:] = [task for task in _workers if not task.done()]
+    hostname = socket.gethostname()
+    while len(_workers) < workers:
+        owner = f"{hostname}:{os.getpid()}:{len(_workers)}"
+        _workers.append(asyncio.ensure_future(_worker_loop(owner)))
+    return _workers
+
+
+async def stop_job_workers() -> None:
+    """
+    Dừng các worker task (job đang chạy dở sẽ được claim lại khi hết lease)
+    """
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+async def run_job_workers(workers: int = JOB_WORKERS) -> None:
+    """
+    Chạy worker pool cho tới khi bị dừng (process worker riêng)
+    """
+    if vocab_cache._get_collection(JOBS_COLLECTION) is None:
+        raise ConnectionError("AGNO_MONGO_URL is not set, job queue needs MongoDB")
+    print(f"Info: Running {workers} vocab job workers")
+    try:
+        await asyncio.gather(*_start_job_workers(workers))
+    finally:
+        await stop_job_workers()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run_job_workers())
+    except KeyboardInterrupt:
+        pass
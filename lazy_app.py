@@ -0,0 +1,83 @@
+"""
+ASGI app cho serverless (Vercel): load agent stack lazy
+
+- /api/vocab/*, /api/audio/* được phục vụ bởi một FastAPI app nhẹ chỉ gồm
+  vocab_routes (không import agno, không kết nối MongoDb của agent)
+- Mọi path khác (AgentOS, /api/tutor/*, docs) import `main` ở request đầu tiên
+  cần tới, sau đó dùng lại cho các request sau trong cùng instance
+"""
+import asyncio
+import importlib
+from contextlib import AsyncExitStack
+from typing import Any, Optional
+
+from fastapi import FastAPI
+
+from metrics import RequestMetricsMiddleware
+from vocab_routes import router as vocab_router
+
+
+# Prefix được phục vụ bởi app nhẹ
+LIGHT_PATH_PREFIXES = ("/api/vocab", "/api/audio")
+
+
+def _is_light_path(path: str) -> bool:
+    return any(path == prefix or path.startswith(prefix + "/") for prefix in LIGHT_PATH_PREFIXES)
+
+
+class LazyAgentApp:
+    """
+    ASGI dispatcher: path nhẹ đi thẳng tới vocab app, path còn lại tới `main.app` (load lazy)
+
+    Lifespan của `main.app` (khởi tạo/đóng database của AgentOS) được chạy khi
+    `main` được load lần đầu và đóng khi server shutdown.
+    """
+
+    def __init__(self):
+        self.vocab_app = FastAPI(title="Vocab API", version="1.0.0")
+        self.vocab_app.include_router(vocab_router)
+        # main.app tự có middleware này, chỉ cần thêm cho app nhẹ
+        self.vocab_app.add_middleware(RequestMetricsMiddleware)
+        self._main_app: Optional[Any] = None
+        self._main_lock: Optional[asyncio.Lock] = None
+        self._main_lifespan = AsyncExitStack()
+
+    @property
+    def main_loaded(self) -> bool:
+        return self._main_app is not None
+
+    async def _get_main_app(self) -> Any:
+        if self._main_app is not None:
+            return self._main_app
+        if self._main_lock is None:
+            self._main_lock = asyncio.Lock()
+        async with self._main_lock:
+            if self._main_app is None:
+                # Import trong thread để request vocab/audio đồng thời không bị chặn
+                main = await asyncio.to_thread(importlib.import_module, "main")
+                await self._main_lifespan.enter_async_context(main.app.router.lifespan_context(main.app))
+                self._main_app = main.app
+        return self._main_app
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self._main_lifespan.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if _is_light_path(scope.get("path", "")):
+            await self.vocab_app(scope, receive, send)
+            return
+        main_app = await self._get_main_app()
+        await main_app(scope, receive, send)
+
+
+app = LazyAgentApp()
@@ -0,0 +1,411 @@
+"""
+Scheduler dùng chung cho mọi LLM call trong một worker (vocab info + vocab_agent)
+
+- Token bucket cho số request/phút (RPM) và số token ước lượng/phút (TPM)
+- Hàng đợi theo priority: tutor (tương tác) > vocab (cache miss) > background
+  (pre-warm, refresh nền); cùng priority thì FIFO
+- Concurrency thích nghi (AIMD): giảm một nửa khi gặp 429 và tạm dừng theo
+  Retry-After, tăng dần lại khi các call thành công
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from metrics import Counter, Gauge, Histogram, register_collector
+
+
+# Budget của deployment, 0 = không giới hạn (chỉ dùng AIMD)
+LLM_RPM_LIMIT = float(os.getenv("VOCAB_LLM_RPM", "0"))
+LLM_TPM_LIMIT = float(os.getenv("VOCAB_LLM_TPM", "0"))
+# Giới hạn concurrency của AIMD (bắt đầu từ max, không xuống dưới min)
+LLM_MAX_CONCURRENCY = int(os.getenv("VOCAB_LLM_MAX_CONCURRENCY", "32"))
+LLM_MIN_CONCURRENCY = int(os.getenv("VOCAB_LLM_MIN_CONCURRENCY", "1"))
+# Hệ số giảm concurrency khi gặp 429
+LLM_BACKOFF_FACTOR = float(os.getenv("VOCAB_LLM_BACKOFF_FACTOR", "0.5"))
+# Thời gian tạm dừng khi 429 không có Retry-After, và mức tối đa khi có (giây)
+LLM_RATE_LIMIT_PAUSE_SECONDS = float(os.getenv("VOCAB_LLM_RATE_LIMIT_PAUSE_SECONDS", "2"))
+LLM_MAX_RETRY_AFTER_SECONDS = float(os.getenv("VOCAB_LLM_MAX_RETRY_AFTER_SECONDS", "60"))
+# Số lần retry khi gặp 429/5xx/lỗi kết nối, và delay ban đầu cho lỗi không phải 429
+LLM_MAX_RETRIES = int(os.getenv("VOCAB_LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_DELAY_SECONDS = float(os.getenv("VOCAB_LLM_RETRY_BASE_DELAY_SECONDS", "0.5"))
+# Nhiều 429 liền nhau (cùng một burst) chỉ giảm concurrency một lần trong khoảng này
+_DECREASE_COOLDOWN_SECONDS = 1.0
+
+
+class Priority(IntEnum):
+    """
+    Priority của LLM call, số nhỏ được chạy trước
+    """
+
+    TUTOR = 0
+    VOCAB = 1
+    BACKGROUND = 2
+
+
+QUEUE_DEPTH = Gauge("vocab_llm_queue_depth", "LLM calls waiting in the scheduler", ("priority",))
+QUEUE_WAIT_SECONDS = Histogram(
+    "vocab_llm_queue_wait_seconds", "Time LLM calls waited in the scheduler", ("priority",)
+)
+CONCURRENCY_LIMIT = Gauge("vocab_llm_concurrency_limit", "Current adaptive LLM concurrency limit")
+RATE_LIMITED = Counter("vocab_llm_rate_limited_total", "LLM calls rejected with 429")
+
+_priority: ContextVar[Priority] = ContextVar("vocab_llm_priority", default=Priority.VOCAB)
+
+
+@contextmanager
+def llm_priority(priority: Priority) -> Iterator[None]:
+    """
+    Đặt priority cho mọi LLM call trong block (kể cả task tạo ra trong block)
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_llm_priority() -> Priority:
+    return _priority.get()
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Ước lượng số token (~4 ký tự / token)
+    """
+    return len(text) // 4 + 1
+
+
+def _error_chain(error: BaseException) -> Iterator[BaseException]:
+    # Lỗi của agno bọc lỗi gốc của openai trong __cause__
+    while error is not None:
+        yield error
+        error = error.__cause__
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    for e in _error_chain(error):
+        status_code = getattr(e, "status_code", None)
+        if isinstance(status_code, int):
+            return status_code
+        response = getattr(e, "response", None)
+        if isinstance(getattr(response, "status_code", None), int):
+            return response.status_code
+    return None
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    return _status_code(error) == 429
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    429, 5xx, timeout và lỗi kết nối tới LLM thì nên retry
+    """
+    status_code = _status_code(error)
+    if status_code is not None:
+        return status_code == 429 or status_code == 408 or status_code >= 500
+    return any(
+        isinstance(e, (TimeoutError, ConnectionError)) or type(e).__name__ in ("APIConnectionError", "APITimeoutError")
+        for e in _error_chain(error)
+    )
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    Thời gian chờ trong header retry-after-ms / retry-after của response 429 (nếu có)
+    """
+    for e in _error_chain(error):
+        headers = getattr(getattr(e, "response", None), "headers", None)
+        if not headers:
+            continue
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000
+            if headers.get("retry-after"):
+                return float(headers["retry-after"])
+        except ValueError:
+            # Retry-After dạng HTTP date: dùng pause mặc định
+            return None
+    return None
+
+
+class TokenBucket:
+    """
+    Token bucket nạp đều `rate_per_minute` token mỗi phút, chứa tối đa `capacity`
+
+    Args:
+        rate_per_minute: Tốc độ nạp
+        capacity: Dung lượng (mặc định bằng budget một phút)
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """
+        Số giây cần chờ để có đủ `amount` token (0 nếu đủ ngay)
+        """
+        self._refill(now)
+        # Request lớn hơn cả bucket chỉ cần bucket đầy, không chờ mãi
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        """
+        Lấy token (có thể âm: usage thực tế vượt ước lượng thì các call sau chờ lâu hơn)
+        """
+        self._refill(now)
+        self.tokens -= amount
+
+
+class LLMSlot:
+    """
+    Quyền chạy một LLM call, dùng để hiệu chỉnh token budget theo usage thực tế
+    """
+
+    def __init__(self, scheduler: "LLMScheduler", estimated_tokens: int):
+        self._scheduler = scheduler
+        self.estimated_tokens = estimated_tokens
+
+    def record_usage(self, total_tokens: int) -> None:
+        self._scheduler._adjust_tokens(total_tokens - self.estimated_tokens)
+        self.estimated_tokens = total_tokens
+
+
+class LLMScheduler:
+    """
+    Admission control cho LLM call: priority queue + token bucket + AIMD concurrency
+
+    Args:
+        requests_per_minute: Budget request/phút (0 = không giới hạn)
+        tokens_per_minute: Budget token/phút (0 = không giới hạn)
+        max_concurrency: Số call đồng thời tối đa (AIMD không vượt quá)
+        min_concurrency: Số call đồng thời tối thiểu (AIMD không giảm dưới)
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = LLM_RPM_LIMIT,
+        tokens_per_minute: float = LLM_TPM_LIMIT,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        min_concurrency: int = LLM_MIN_CONCURRENCY,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self._request_bucket = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        # Heap (priority, seq, future, tokens)
+        self._waiters: List[Tuple[int, int, asyncio.Future, int]] = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._stats = {"admitted": 0, "rate_limited": 0, "retries": 0}
+
+    def _capacity(self) -> int:
+        return max(self.min_concurrency, int(self.limit))
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        wait = self._paused_until - now
+        if self._request_bucket is not None:
+            wait = max(wait, self._request_bucket.wait_time(1, now))
+        if self._token_bucket is not None and tokens:
+            wait = max(wait, self._token_bucket.wait_time(tokens, now))
+        return wait
+
+    def _dispatch(self) -> None:
+        """
+        Cho các call ở đầu hàng đợi chạy khi còn slot và budget
+        """
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        now = time.monotonic()
+        while self._waiters:
+            priority, _, future, tokens = self._waiters[0]
+            if future.done():
+                # Caller đã bị cancel khi đang chờ
+                heapq.heappop(self._waiters)
+                continue
+            if self.in_flight >= self._capacity():
+                # _release sẽ dispatch tiếp
+                return
+            wait = self._wait_time(tokens, now)
+            if wait > 0:
+                # Priority nghiêm ngặt: call sau không vượt call đầu hàng đợi
+                self._wakeup = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            if self._request_bucket is not None:
+                self._request_bucket.take(1, now)
+            if self._token_bucket is not None:
+                self._token_bucket.take(tokens, now)
+            self.in_flight += 1
+            self._stats["admitted"] += 1
+            QUEUE_DEPTH.dec(priority=Priority(priority).name.lower())
+            future.set_result(None)
+
+    async def _acquire(self, priority: Priority, tokens: int) -> None:
+        label = priority.name.lower()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), future, tokens))
+        QUEUE_DEPTH.inc(priority=label)
+        started = time.monotonic()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                QUEUE_DEPTH.dec(priority=label)
+            else:
+                # Đã được cấp slot đúng lúc caller bị cancel
+                self._release()
+            raise
+        finally:
+            QUEUE_WAIT_SECONDS.observe(time.monotonic() - started, priority=label)
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _adjust_tokens(self, amount: int) -> None:
+        if self._token_bucket is not None and amount:
+            self._token_bucket.take(amount, time.monotonic())
+
+    def _record_success(self) -> None:
+        # Additive increase: khoảng +1 sau mỗi `limit` call thành công
+        self.limit = min(float(self.max_concurrency), self.limit + 1 / max(self.limit, 1.0))
+
+    def _record_rate_limited(self, retry_after: Optional[float]) -> None:
+        now = time.monotonic()
+        self._stats["rate_limited"] += 1
+        RATE_LIMITED.inc()
+        pause = LLM_RATE_LIMIT_PAUSE_SECONDS if retry_after is None else min(retry_after, LLM_MAX_RETRY_AFTER_SECONDS)
+        self._paused_until = max(self._paused_until, now + pause)
+        if now - self._last_decrease >= _DECREASE_COOLDOWN_SECONDS:
+            # Multiplicative decrease
+            self.limit = max(float(self.min_concurrency), self.limit * LLM_BACKOFF_FACTOR)
+            self._last_decrease = now
+            print(f"Warning: LLM rate limited, concurrency limit -> {self._capacity()}, pausing {pause:.1f}s")
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[Priority] = None, estimated_tokens: int = 0) -> AsyncIterator[LLMSlot]:
+        """
+        Chờ tới lượt rồi giữ một slot trong suốt block (kể cả khi đọc stream)
+
+        429 trong block làm giảm concurrency và tạm dừng hàng đợi theo Retry-After.
+
+        Args:
+            priority: Priority của call (mặc định lấy từ llm_priority())
+            estimated_tokens: Số token ước lượng (prompt + completion) cho TPM budget
+        """
+        if priority is None:
+            priority = current_llm_priority()
+        await self._acquire(priority, estimated_tokens)
+        try:
+            yield LLMSlot(self, estimated_tokens)
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self._record_rate_limited(retry_after_seconds(e))
+            raise
+        else:
+            self._record_success()
+        finally:
+            self._release()
+
+    async def run(
+        self,
+        call: Callable[[LLMSlot], Awaitable[Any]],
+        priority: Optional[Priority] = None,
+        estimated_tokens: int = 0,
+        retries: int = LLM_MAX_RETRIES,
+    ) -> Any:
+        """
+        Chạy call(slot) trong một slot, retry khi gặp 429/5xx/lỗi kết nối
+
+        Retry sau 429 xếp hàng lại (đợi hết pause của Retry-After), lỗi khác thì
+        chờ exponential backoff.
+
+        Returns:
+            Kết quả của call
+        """
+        if priority is None:
+            priority = current_llm_priority()
+        attempt = 0
+        while True:
+            try:
+                async with self.slot(priority, estimated_tokens) as slot:
+                    return await call(slot)
+            except Exception as e:
+                if not await self.backoff(e, attempt, retries):
+                    raise
+            attempt += 1
+
+    async def backoff(self, error: BaseException, attempt: int, retries: int = LLM_MAX_RETRIES) -> bool:
+        """
+        Quyết định có retry call bị lỗi không, chờ backoff nếu cần
+
+        Dùng cho call không đi qua run() (ví dụ stream: chỉ retry khi chưa nhận chunk nào).
+
+        Args:
+            error: Lỗi của lần thử thứ `attempt` (bắt đầu từ 0)
+            attempt: Số thứ tự lần thử
+            retries: Số lần retry tối đa
+
+        Returns:
+            True nếu nên thử lại
+        """
+        if attempt >= retries or not is_retryable_error(error):
+            return False
+        self._stats["retries"] += 1
+        if not is_rate_limit_error(error):
+            # 429 đã tạm dừng hàng đợi theo Retry-After, lỗi khác thì chờ ở đây
+            await asyncio.sleep(LLM_RETRY_BASE_DELAY_SECONDS * 2 ** attempt)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "in_flight": self.in_flight,
+            "queued": sum(1 for _, _, future, _ in self._waiters if not future.done()),
+            "concurrency_limit": self._capacity(),
+            "paused_for_s": round(max(0.0, self._paused_until - time.monotonic()), 3),
+        }
+
+
+_scheduler: Optional[LLMScheduler] = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """
+    Scheduler dùng chung của worker (khởi tạo lazy)
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler()
+    return _scheduler
+
+
+def _collect_scheduler_metrics() -> None:
+    if _scheduler is not None:
+        CONCURRENCY_LIMIT.set(_scheduler._capacity())
+
+
+register_collector(_collect_scheduler_metrics)
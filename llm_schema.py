@@ -0,0 +1,79 @@
+"""
+JSON schema cho structured output (response_format json_schema) từ Pydantic model
+"""
+import copy
+from typing import Any, Dict, List, Optional, Type
+
+from pydantic import BaseModel
+
+
+# Các keyword được strict structured output chấp nhận, các keyword khác bị bỏ
+# (ràng buộc như max_length vẫn được Pydantic kiểm tra khi validate)
+_ALLOWED_KEYWORDS = {
+    "type", "properties", "required", "additionalProperties", "items",
+    "enum", "anyOf", "$ref", "$defs", "description",
+}
+
+
+def _to_strict(schema: Any) -> Any:
+    if isinstance(schema, list):
+        return [_to_strict(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+
+    strict = {}
+    for key, value in schema.items():
+        if key not in _ALLOWED_KEYWORDS:
+            continue
+        if key in ("properties", "$defs"):
+            strict[key] = {name: _to_strict(sub_schema) for name, sub_schema in value.items()}
+        else:
+            strict[key] = _to_strict(value)
+
+    if strict.get("type") == "object":
+        # Strict mode: mọi property đều required (field optional dùng anyOf với null)
+        strict["required"] = list(strict.get("properties", {}))
+        strict["additionalProperties"] = False
+    return strict
+
+
+def to_strict_json_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Chuyển Pydantic model sang JSON schema dùng được với strict structured output
+
+    Args:
+        model: Pydantic model class
+
+    Returns:
+        JSON schema dict
+    """
+    return _to_strict(model.model_json_schema())
+
+
+def build_response_format(
+    model: Type[BaseModel],
+    name: str,
+    fields: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Tạo tham số response_format cho chat.completions.create
+
+    Args:
+        model: Pydantic model class của response
+        name: Tên schema
+        fields: Nếu có, chỉ yêu cầu các top-level field này (dùng khi repair)
+
+    Returns:
+        Dict response_format dạng json_schema
+    """
+    schema = to_strict_json_schema(model)
+    if fields:
+        schema = copy.deepcopy(schema)
+        schema["properties"] = {
+            field: sub_schema for field, sub_schema in schema["properties"].items() if field in fields
+        }
+        schema["required"] = list(schema["properties"])
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "schema": schema, "strict": True},
+    }
@@ -1,10 +1,14 @@
+import json
+
 from agno.os import AgentOS
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
 from agno.agent import Agent
 from agno_agent import vocab_agent
-from models.vocab_info import VocabInfoRequest, VocabInfoResponse
-from vocab_info_service import get_vocab_info
+from metrics import RequestMetricsMiddleware
+from models.tutor import TutorStreamRequest
+from tutor_protocol import TutorStreamParser
+from vocab_routes import router as vocab_router
 
 app: FastAPI = FastAPI(
     title="Custom FastAPI App",
@@ -18,24 +22,59 @@ agent_os = AgentOS(
 )
 
 app = agent_os.get_app()
+app.include_router(vocab_router)
+# Request ID, latency/status theo route và một dòng log JSON mỗi request
+app.add_middleware(RequestMetricsMiddleware)
 
 
-@app.post("/api/vocab/info", response_model=VocabInfoResponse)
-async def vocab_info_endpoint(request: VocabInfoRequest):
+@app.post("/api/tutor/stream")
+async def tutor_stream_endpoint(request: TutorStreamRequest):
     """
-    API endpoint để lấy thông tin từ vựng (examples, synonyms, origin)
+    Reply của tutor dạng Server-Sent Events, đã tách protocol <meta>
     
-    - Kiểm tra cache trước
-    - Nếu không có cache, gọi LLM và lưu vào cache
-    - Trả về thông tin bằng ngôn ngữ được chỉ định
+    - `text`: narration, forward ngay khi agent viết
+    - `audio`, `hints`, `state`: ngay khi tag tương ứng trong <meta> đóng
+      (client có thể prefetch audio, render hints sớm)
+    - `violation`: reply vi phạm protocol (hints cùng state, audio ngoài STEP 3, ...)
+    - `done`: kết thúc reply, kèm danh sách violation; `error` nếu agent lỗi
     """
-    try:
-        result = await get_vocab_info(request.vocab, request.language)
-        return VocabInfoResponse(**result)
-    except ValueError as e:
-        raise HTTPException(status_code=422, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Lỗi server: {str(e)}")
+    session_state = {
+        key: value
+        for key, value in (("vocab", request.vocab), ("language", request.language))
+        if value
+    }
+    parser = TutorStreamParser(expected_step=request.expected_step, vocab=request.vocab)
+    
+    def sse(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    
+    async def sse_events():
+        try:
+            async for run_event in vocab_agent.arun(
+                request.message,
+                stream=True,
+                session_id=request.session_id,
+                user_id=request.user_id,
+                session_state=session_state or None,
+            ):
+                if run_event.event == "RunError":
+                    yield sse("error", {"detail": str(run_event.content)})
+                    return
+                if run_event.event != "RunContent" or not isinstance(run_event.content, str):
+                    continue
+                for event, data in parser.feed(run_event.content):
+                    yield sse(event, data)
+            for event, data in parser.close():
+                yield sse(event, data)
+            yield sse("done", {"finished": parser.finished, "violations": parser.violations})
+        except Exception as e:
+            yield sse("error", {"detail": f"Lỗi server: {str(e)}"})
+    
+    return StreamingResponse(
+        sse_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 if __name__ == "__main__":
     """Run the AgentOS application.
@@ -0,0 +1,381 @@
+"""
+Metrics dạng Prometheus (text exposition format) và structured logging theo request
+
+Không phụ thuộc prometheus_client: counter/gauge/histogram tối giản, đủ cho
+endpoint /api/vocab/metrics của một process. Mỗi request được gán request ID
+(header X-Request-ID hoặc sinh mới) và log một dòng JSON khi kết thúc.
+"""
+import contextvars
+import json
+import os
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.routing import Match
+
+
+# Log một dòng JSON cho mỗi request
+REQUEST_LOG_ENABLED = os.getenv("VOCAB_REQUEST_LOG", "true").lower() in ("1", "true", "yes")
+# Giá LLM (USD / 1M token) để ước lượng chi phí mỗi request (mặc định: gpt-4o-mini)
+LLM_PRICE_INPUT_PER_1M = float(os.getenv("VOCAB_LLM_PRICE_INPUT_PER_1M", "0.15"))
+LLM_PRICE_OUTPUT_PER_1M = float(os.getenv("VOCAB_LLM_PRICE_OUTPUT_PER_1M", "0.60"))
+
+# Bucket (giây) cho latency: từ L1/Mongo (ms) tới LLM (chục giây)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COST_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05)
+
+# Request ID và các field log của request hiện tại (dict dùng chung với task con)
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("vocab_request_id", default=None)
+_request_fields: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "vocab_request_fields", default=None
+)
+
+_registry: List["_Metric"] = []
+# Hàm được gọi ngay trước khi render (cập nhật gauge từ state hiện tại)
+_collectors: List[Callable[[], None]] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += self._samples()
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """
+    Counter chỉ tăng, theo label
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """
+    Gauge tăng/giảm được, theo label
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def get(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    @contextmanager
+    def track_inprogress(self, **labels: Any) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """
+    Histogram với bucket cố định, theo label
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [count theo từng bucket (không cộng dồn) + bucket +Inf, sum]
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: Any) -> int:
+        values = self._values.get(self._key(labels))
+        return sum(values[0]) if values else 0
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+# --- Metrics của vocab pipeline ---
+
+CACHE_REQUESTS = Counter(
+    "vocab_cache_requests_total",
+    "Cache lookups by tier (l1, mongo) and result (hit, miss, error, skipped)",
+    ("tier", "result"),
+)
+STAGE_SECONDS = Histogram(
+    "vocab_stage_seconds",
+    "Latency of pipeline stages (mongo_lookup, llm_call, json_parse, validation, cache_save)",
+    ("stage",),
+)
+LLM_TOKENS = Counter("vocab_llm_tokens_total", "LLM tokens used", ("model", "kind"))
+LLM_COST_USD = Counter("vocab_llm_cost_usd_total", "Estimated LLM cost in USD", ("model",))
+LLM_REQUEST_COST_USD = Histogram(
+    "vocab_llm_request_cost_usd",
+    "Estimated LLM cost per HTTP request in USD",
+    ("route",),
+    buckets=COST_BUCKETS,
+)
+LLM_IN_FLIGHT = Gauge("vocab_llm_calls_in_flight", "LLM calls currently running")
+LLM_PARSE_FAILURES = Counter(
+    "vocab_llm_parse_failures_total",
+    "LLM responses rejected by reason (parse_error, validation_error), including repair attempts",
+    ("reason",),
+)
+LLM_REPAIRS = Counter(
+    "vocab_llm_repairs_total",
+    "LLM repair loop events by result (attempted, repaired, failed)",
+    ("result",),
+)
+HTTP_REQUESTS = Counter("vocab_http_requests_total", "HTTP requests", ("method", "route", "status"))
+HTTP_SECONDS = Histogram("vocab_http_request_seconds", "HTTP request latency", ("method", "route"))
+HTTP_IN_FLIGHT = Gauge("vocab_http_requests_in_flight", "HTTP requests currently being served", ("route",))
+
+
+def register_collector(collector: Callable[[], None]) -> None:
+    """
+    Đăng ký hàm cập nhật gauge từ state hiện tại, chạy mỗi lần render metrics
+    """
+    _collectors.append(collector)
+
+
+def render_metrics() -> str:
+    """
+    Toàn bộ metrics theo Prometheus text exposition format (version 0.0.4)
+    """
+    for collector in _collectors:
+        try:
+            collector()
+        except Exception as e:
+            print(f"Warning: Metrics collector failed: {e}")
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def annotate_request(**fields: Any) -> None:
+    """
+    Thêm field vào dòng log của request hiện tại (không làm gì nếu ngoài request)
+    """
+    request_fields = _request_fields.get()
+    if request_fields is not None:
+        request_fields.update(fields)
+
+
+def _add_request_number(field: str, amount: float) -> None:
+    request_fields = _request_fields.get()
+    if request_fields is not None:
+        request_fields[field] = request_fields.get(field, 0) + amount
+
+
+def record_llm_usage(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    Ghi nhận token của một LLM call, cộng dồn vào request hiện tại
+
+    Returns:
+        Chi phí ước lượng (USD) của call
+    """
+    cost = (prompt_tokens * LLM_PRICE_INPUT_PER_1M + completion_tokens * LLM_PRICE_OUTPUT_PER_1M) / 1_000_000
+    LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    LLM_TOKENS.inc(completion_tokens, model=model, kind="completion")
+    LLM_COST_USD.inc(cost, model=model)
+    _add_request_number("llm_calls", 1)
+    _add_request_number("prompt_tokens", prompt_tokens)
+    _add_request_number("completion_tokens", completion_tokens)
+    _add_request_number("llm_cost_usd", cost)
+    return cost
+
+
+def log_event(event: str, **fields: Any) -> None:
+    """
+    Log một dòng JSON kèm request ID hiện tại
+    """
+    record = {"ts": round(time.time(), 3), "event": event, "request_id": get_request_id(), **fields}
+    print(json.dumps(record, ensure_ascii=False, default=str), flush=True)
+
+
+def _route_label(scope: Dict[str, Any]) -> str:
+    """
+    Route template (ví dụ /api/vocab/info/{language}/{vocab:path}) để label không bị nổ theo từ vựng
+    """
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return path_format or "unmatched"
+
+
+def _match_route_label(scope: Dict[str, Any]) -> str:
+    """
+    Route template khớp với request trước khi router chạy (cho in-flight gauge)
+
+    Path không khớp route nào gộp chung vào "unmatched" để label không nổ theo path lạ.
+    """
+    router = getattr(scope.get("app"), "router", None)
+    partial = None
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return _route_label({"route": route})
+        if match == Match.PARTIAL and partial is None:
+            # Khớp path nhưng sai method (405)
+            partial = route
+    return _route_label({"route": partial})
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware: request ID, in-flight gauge, latency/status và một dòng log JSON mỗi request
+
+    Args:
+        app: ASGI app được bọc
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or uuid.uuid4().hex
+        fields: Dict[str, Any] = {}
+        id_token = _request_id.set(request_id)
+        fields_token = _request_fields.set(fields)
+        status = {"code": 500}
+
+        async def send_with_request_id(message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {
+                    **message,
+                    "headers": list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))],
+                }
+            await send(message)
+
+        # Router chưa chạy nên tự match route template (cùng label với latency/status)
+        in_flight_label = _match_route_label(scope)
+        started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc(route=in_flight_label)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            HTTP_IN_FLIGHT.dec(route=in_flight_label)
+            elapsed = time.perf_counter() - started
+            route = _route_label(scope)
+            method = scope.get("method", "")
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status["code"]))
+            HTTP_SECONDS.observe(elapsed, method=method, route=route)
+            if "llm_cost_usd" in fields:
+                LLM_REQUEST_COST_USD.observe(fields["llm_cost_usd"], route=route)
+            if REQUEST_LOG_ENABLED and route != "/api/vocab/metrics":
+                log_event(
+                    "http_request",
+                    method=method,
+                    path=scope.get("path", ""),
+                    route=route,
+                    status=status["code"],
+                    duration_ms=round(elapsed * 1000, 2),
+                    **fields,
+                )
+            _request_id.reset(id_token)
+            _request_fields.reset(fields_token)
@@ -0,0 +1,169 @@
+"""
+Migration một lần: gộp các document vocab_cache trùng nhau sau khi chuẩn hoá cache key
+
+Trước khi có vocab_keys, "Vietnamese"/"vi"/"Tiếng Việt" hay "abide by"/"abide_by"
+tạo các document (và lần generate) riêng. Script nhóm document theo key mới
+(tính từ field vocab và language đã lưu), giữ một document cho mỗi key (ưu tiên
+entry thường hơn negative entry, rồi bản cập nhật gần nhất), chuyển nó sang _id
+mới và xoá các bản còn lại. Chạy lại an toàn: lần sau không còn gì để gộp.
+
+Mặc định chỉ báo cáo (dry run), thêm --apply để ghi. Với --requests (JSON lines
+{"vocab", "language"}, ví dụ export từ access log), báo cáo thêm hit rate của
+các request đó với key cũ và key mới.
+
+Chạy từ thư mục gốc repo:
+    python migrate_cache_keys.py --requests requests-sample.jsonl
+    python migrate_cache_keys.py --apply
+"""
+import argparse
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from vocab_cache import _get_collection
+from vocab_keys import cache_key, canonical_language, legacy_cache_key
+
+# Field đọc khi quét collection (không đọc data/payload cho tới khi cần copy)
+_SCAN_PROJECTION = {"vocab": 1, "language": 1, "negative": 1, "updated_at": 1, "created_at": 1}
+
+
+def _is_positive(doc: Dict[str, Any]) -> bool:
+    # Negative entry luôn có field negative, entry thường thì không (bị $unset khi lưu)
+    return "negative" not in doc
+
+
+def _pick_winner(docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Document được giữ lại trong nhóm: entry thường trước negative entry, rồi bản mới nhất
+    """
+    return max(docs, key=lambda doc: (_is_positive(doc), doc.get("updated_at") or datetime.min))
+
+
+async def _merge_group(collection: AsyncIOMotorCollection, key: str, docs: List[Dict[str, Any]]) -> int:
+    """
+    Ghi document giữ lại vào _id = key rồi xoá các bản khác (ghi trước, xoá sau)
+
+    Returns:
+        Số document bị xoá
+    """
+    winner = _pick_winner(docs)
+    if winner["_id"] != key:
+        full_doc = await collection.find_one({"_id": winner["_id"]})
+        if full_doc is None:
+            return 0
+        full_doc["_id"] = key
+        created = [doc["created_at"] for doc in docs if doc.get("created_at")]
+        if created:
+            full_doc["created_at"] = min(created)
+        await collection.replace_one({"_id": key}, full_doc, upsert=True)
+
+    stale_ids = [doc["_id"] for doc in docs if doc["_id"] != key]
+    if stale_ids:
+        await collection.delete_many({"_id": {"$in": stale_ids}})
+    return len(stale_ids)
+
+
+def _replay_hit_rate(path: str, legacy_keys: Set[str], canonical_keys: Set[str]) -> Dict[str, Any]:
+    """
+    Hit rate của các request trong file với key cũ (trước migration) và key mới (sau migration)
+    """
+    total = legacy_hits = canonical_hits = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            request = json.loads(line)
+            total += 1
+            legacy_hits += legacy_cache_key(request["vocab"], request["language"]) in legacy_keys
+            canonical_hits += cache_key(request["vocab"], request["language"]) in canonical_keys
+    return {
+        "requests": total,
+        "legacy_hit_rate": round(legacy_hits / total, 4) if total else 0.0,
+        "canonical_hit_rate": round(canonical_hits / total, 4) if total else 0.0,
+        "extra_hits": canonical_hits - legacy_hits,
+    }
+
+
+async def migrate_cache_keys(
+    collection: AsyncIOMotorCollection,
+    apply: bool = False,
+    requests_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Gộp các document có cùng cache key sau chuẩn hoá
+
+    Args:
+        collection: Collection vocab_cache
+        apply: False để chỉ báo cáo, không ghi
+        requests_path: File JSON lines {"vocab", "language"} để tính hit rate trước/sau
+
+    Returns:
+        Dict thống kê (số document, số key, số nhóm được gộp, biến thể ngôn ngữ, hit rate)
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    language_variants: Dict[str, Set[str]] = {}
+    legacy_keys: Set[str] = set()
+    skipped = 0
+    async for doc in collection.find({}, _SCAN_PROJECTION):
+        if not doc.get("vocab") or not doc.get("language"):
+            skipped += 1
+            continue
+        groups.setdefault(cache_key(doc["vocab"], doc["language"]), []).append(doc)
+        language_variants.setdefault(canonical_language(doc["language"]), set()).add(doc["language"])
+        if _is_positive(doc):
+            legacy_keys.add(doc["_id"])
+
+    to_merge = {
+        key: docs for key, docs in groups.items()
+        if len(docs) > 1 or docs[0]["_id"] != key
+    }
+    removed = 0
+    if apply:
+        for key, docs in to_merge.items():
+            removed += await _merge_group(collection, key, docs)
+
+    documents = sum(len(docs) for docs in groups.values())
+    stats: Dict[str, Any] = {
+        "applied": apply,
+        "documents": documents,
+        "skipped": skipped,
+        "canonical_keys": len(groups),
+        "rekeyed": sum(1 for docs in to_merge.values() if len(docs) == 1),
+        "merged_groups": sum(1 for docs in to_merge.values() if len(docs) > 1),
+        "duplicate_documents": documents - len(groups),
+        "removed_documents": removed,
+        "language_variants": {
+            language: sorted(variants)
+            for language, variants in sorted(language_variants.items())
+            if len(variants) > 1
+        },
+    }
+    if requests_path:
+        canonical_keys = {key for key, docs in groups.items() if any(_is_positive(doc) for doc in docs)}
+        stats["hit_rate"] = _replay_hit_rate(requests_path, legacy_keys, canonical_keys)
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apply", action="store_true", help="Ghi thay đổi (mặc định chỉ báo cáo)")
+    parser.add_argument("--requests", default=None, help="File JSON lines {vocab, language} để tính hit rate trước/sau")
+    args = parser.parse_args()
+
+    collection = _get_collection()
+    if collection is None:
+        print("Warning: MongoDB cache is not configured (AGNO_MONGO_URL), nothing to migrate")
+        return
+
+    stats = asyncio.run(migrate_cache_keys(collection, apply=args.apply, requests_path=args.requests))
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+    if not args.apply and (stats["rekeyed"] or stats["merged_groups"]):
+        print("Info: Dry run, rerun with --apply to merge documents")
+
+
+if __name__ == "__main__":
+    main()
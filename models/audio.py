@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class AudioResolveRequest(BaseModel):
+    """Request model cho API resolve audio của nhiều từ vựng"""
+    vocabs: List[str] = Field(..., description="Danh sách từ vựng cần tìm audio", min_length=1, max_length=1000)
+
+
+class AudioResolveItem(BaseModel):
+    """Kết quả resolve audio cho một từ vựng"""
+    vocab: str = Field(..., description="Từ vựng như trong request")
+    key: Optional[str] = Field(None, description="Sound key trong sounds.json, null nếu không có audio")
+    url: Optional[str] = Field(None, description="URL để phát audio, null nếu không có audio")
+
+
+class AudioResolveResponse(BaseModel):
+    """Response model cho API resolve audio"""
+    items: List[AudioResolveItem] = Field(..., description="Kết quả theo thứ tự từ vựng trong request")
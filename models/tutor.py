@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class TutorStreamRequest(BaseModel):
+    """Request model cho API stream reply của tutor (vocab_agent)"""
+    message: str = Field(..., description="Tin nhắn của learner", min_length=1)
+    session_id: str = Field(..., description="Session của agent", min_length=1)
+    user_id: Optional[str] = Field(None, description="User id (nếu có)")
+    vocab: Optional[str] = Field(None, description="Từ vựng của session, lưu vào session state")
+    language: Optional[str] = Field(None, description="Ngôn ngữ của tutor, lưu vào session state")
+    expected_step: Optional[int] = Field(
+        None, description="STEP hiện tại nếu client biết (2-7), dùng để kiểm tra protocol", ge=2, le=7
+    )
@@ -42,3 +42,138 @@ class VocabInfoResponse(BaseModel):
     examples: List[ExampleItem] = Field(..., description="Danh sách ví dụ từ dễ đến khó (tối đa 3)", max_length=3)
     synonyms: List[SynonymItem] = Field(..., description="Danh sách từ đồng nghĩa")
     origin: OriginInfo = Field(..., description="Thông tin về nguồn gốc từ vựng")
+
+
+class VocabInfoBatchRequest(BaseModel):
+    """Request model cho API vocab info batch"""
+    vocabs: List[str] = Field(..., description="Danh sách từ vựng cần tra cứu", min_length=1, max_length=100)
+    language: str = Field(..., description="Ngôn ngữ trả về (ví dụ: Vietnamese, English, Japanese)", min_length=1)
+
+
+class VocabInfoBatchItem(BaseModel):
+    """Kết quả cho một từ trong batch, lỗi được trả về theo từng item"""
+    vocab: str = Field(..., description="Từ vựng như trong request")
+    result: Optional[VocabInfoResponse] = Field(None, description="Thông tin từ vựng nếu thành công")
+    error: Optional[str] = Field(None, description="Lỗi nếu không lấy được thông tin")
+    cached: bool = Field(False, description="True nếu lấy từ cache")
+
+
+class VocabInfoBatchResponse(BaseModel):
+    """Response model cho API vocab info batch"""
+    language: str = Field(..., description="Ngôn ngữ của response")
+    items: List[VocabInfoBatchItem] = Field(..., description="Kết quả theo thứ tự từ vựng trong request")
+
+
+class VocabJobStatus(str, Enum):
+    """Trạng thái job generate vocab info"""
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class VocabJobResponse(BaseModel):
+    """Response model cho job generate vocab info (202 khi enqueue, và API status)"""
+    job_id: str = Field(..., description="ID của job, dùng để poll /api/vocab/jobs/{job_id}")
+    status: VocabJobStatus = Field(..., description="Trạng thái job")
+    vocab: str = Field(..., description="Từ vựng")
+    language: str = Field(..., description="Ngôn ngữ trả về")
+    attempts: int = Field(0, description="Số lần worker đã chạy job")
+    result: Optional[VocabInfoResponse] = Field(None, description="Thông tin từ vựng khi status là done")
+    error: Optional[str] = Field(None, description="Lỗi lần chạy gần nhất")
+
+
+class LocalizedText(BaseModel):
+    """Nội dung đã được viết bằng một ngôn ngữ đích"""
+    language: str = Field(..., description="Ngôn ngữ đích, đúng như trong request")
+    text: str = Field(..., description="Nội dung bằng ngôn ngữ đích")
+
+
+class MultilingualExampleItem(BaseModel):
+    """Câu ví dụ dùng chung, kèm bản dịch cho từng ngôn ngữ đích"""
+    level: ExampleLevel = Field(..., description="Mức độ khó của ví dụ")
+    sentence: str = Field(..., description="Câu ví dụ bằng tiếng Anh")
+    translations: List[LocalizedText] = Field(..., description="Bản dịch cho mỗi ngôn ngữ đích")
+
+
+class MultilingualSynonymItem(BaseModel):
+    """Từ đồng nghĩa dùng chung, kèm giải thích cho từng ngôn ngữ đích"""
+    word: str = Field(..., description="Từ đồng nghĩa")
+    meanings: List[LocalizedText] = Field(..., description="Giải thích nghĩa cho mỗi ngôn ngữ đích")
+
+
+class MultilingualOriginInfo(BaseModel):
+    """Nguồn gốc từ vựng, giải thích cho từng ngôn ngữ đích"""
+    etymology: List[LocalizedText] = Field(..., description="Nguồn gốc từ cho mỗi ngôn ngữ đích")
+    historical_context: List[LocalizedText] = Field(..., description="Bối cảnh lịch sử cho mỗi ngôn ngữ đích (có thể rỗng)")
+
+
+def _pick_localized(texts: List[LocalizedText], language: str) -> Optional[str]:
+    wanted = language.lower().strip()
+    for localized in texts:
+        if localized.language.lower().strip() == wanted:
+            return localized.text
+    return None
+
+
+class MultilingualVocabInfo(BaseModel):
+    """Thông tin từ vựng cho nhiều ngôn ngữ đích, generate trong một LLM call"""
+    vocab: str = Field(..., description="Từ vựng")
+    examples: List[MultilingualExampleItem] = Field(..., description="Danh sách ví dụ từ dễ đến khó (tối đa 3)", max_length=3)
+    synonyms: List[MultilingualSynonymItem] = Field(..., description="Danh sách từ đồng nghĩa")
+    origin: MultilingualOriginInfo = Field(..., description="Thông tin về nguồn gốc từ vựng")
+
+    def localize(self, language: str) -> VocabInfoResponse:
+        """
+        Tách ra VocabInfoResponse cho một ngôn ngữ
+
+        Raises:
+            ValueError: Nếu thiếu nội dung cho ngôn ngữ này
+        """
+        def pick(texts: List[LocalizedText], field: str) -> str:
+            text = _pick_localized(texts, language)
+            if text is None:
+                raise ValueError(f"Thiếu nội dung '{field}' cho ngôn ngữ {language}")
+            return text
+
+        return VocabInfoResponse(
+            vocab=self.vocab,
+            language=language,
+            examples=[
+                ExampleItem(level=item.level, sentence=item.sentence, translation=pick(item.translations, "translation"))
+                for item in self.examples
+            ],
+            synonyms=[
+                SynonymItem(word=item.word, meaning=pick(item.meanings, "meaning"))
+                for item in self.synonyms
+            ],
+            origin=OriginInfo(
+                etymology=pick(self.origin.etymology, "etymology"),
+                historical_context=_pick_localized(self.origin.historical_context, language),
+            ),
+        )
+
+
+class VocabInfoMultiRequest(BaseModel):
+    """Request model cho API vocab info nhiều ngôn ngữ"""
+    vocab: str = Field(..., description="Từ vựng cần tra cứu", min_length=1)
+    languages: List[str] = Field(..., description="Các ngôn ngữ trả về", min_length=1, max_length=10)
+
+
+class VocabInfoMultiResponse(BaseModel):
+    """Response model cho API vocab info nhiều ngôn ngữ"""
+    vocab: str = Field(..., description="Từ vựng")
+    items: List[VocabInfoResponse] = Field(..., description="Kết quả theo thứ tự ngôn ngữ trong request")
+
+
+class VocabSuggestItem(BaseModel):
+    """Một gợi ý từ vựng cho autocomplete / sửa lỗi chính tả"""
+    vocab: str = Field(..., description="Từ vựng đã biết")
+    distance: int = Field(..., description="Khoảng cách chỉnh sửa tới query (0 với exact/prefix)")
+    kind: str = Field(..., description="exact, prefix hoặc fuzzy")
+
+
+class VocabSuggestResponse(BaseModel):
+    """Response model cho API gợi ý từ vựng"""
+    query: str = Field(..., description="Query như trong request")
+    items: List[VocabSuggestItem] = Field(..., description="Gợi ý, exact/prefix trước rồi tới fuzzy")
@@ -0,0 +1,200 @@
+"""
+Pre-warm vocab_cache cho các từ trong sounds.json
+
+Bỏ qua các key đã có cache, generate phần còn lại với concurrency giới hạn
+và retry/backoff, ghi qua cache path bình thường. Vì mỗi kết quả được lưu
+ngay khi xong, chạy lại lệnh sẽ tiếp tục từ chỗ dừng.
+
+Chạy từ thư mục gốc repo:
+    python prewarm.py --languages Vietnamese Japanese --concurrency 4
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List, Optional
+
+from llm_scheduler import Priority, is_retryable_error, llm_priority
+from sound_words import load_sound_vocabs
+from vocab_cache import _get_collection, get_cached_vocab_info_many
+from vocab_info_service import get_vocab_info
+
+
+# Số key kiểm tra cache trong một query $in
+CACHE_CHECK_CHUNK_SIZE = 200
+
+
+async def _find_uncached(vocabs: List[str], language: str) -> List[str]:
+    """
+    Lọc ra các từ chưa có cache cho language
+    """
+    uncached = []
+    for start in range(0, len(vocabs), CACHE_CHECK_CHUNK_SIZE):
+        chunk = vocabs[start:start + CACHE_CHECK_CHUNK_SIZE]
+        cached = await get_cached_vocab_info_many(chunk, language)
+        uncached.extend(vocab for vocab in chunk if vocab not in cached)
+    return uncached
+
+
+async def _generate_with_retry(vocab: str, language: str, retries: int, base_delay: float) -> None:
+    """
+    Generate một từ, retry với exponential backoff + jitter
+
+    Chỉ retry lỗi tạm thời (timeout, lỗi kết nối, 429/5xx). Lỗi cố định như
+    UnresolvableVocabError/ValueError (kể cả từ đã nằm trong negative cache)
+    được raise ngay, chạy lại cũng không khác.
+    """
+    for attempt in range(retries + 1):
+        try:
+            await get_vocab_info(vocab, language)
+            return
+        except Exception as e:
+            if attempt >= retries or not is_retryable_error(e):
+                raise
+            await asyncio.sleep(base_delay * (2 ** attempt) + random.uniform(0, base_delay))
+
+
+class _Progress:
+    """
+    In tiến độ định kỳ (số từ xong, lỗi, tốc độ, ETA)
+    """
+
+    def __init__(self, language: str, total: int, skipped: int, every: int):
+        self.language = language
+        self.total = total
+        self.skipped = skipped
+        self.every = max(1, every)
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+
+    def update(self, ok: bool) -> None:
+        if ok:
+            self.done += 1
+        else:
+            self.failed += 1
+        finished = self.done + self.failed
+        if finished % self.every == 0 or finished == self.total:
+            elapsed = time.monotonic() - self.started
+            rate = finished / elapsed if elapsed > 0 else 0.0
+            eta = (self.total - finished) / rate if rate > 0 else 0.0
+            print(
+                f"[{self.language}] {finished}/{self.total} generated "
+                f"(ok={self.done}, failed={self.failed}, skipped={self.skipped}) "
+                f"{rate:.2f} words/s, ETA {eta:.0f}s"
+            )
+
+
+async def prewarm_language(
+    language: str,
+    vocabs: List[str],
+    concurrency: int = 4,
+    retries: int = 3,
+    base_delay: float = 2.0,
+    progress_every: int = 10,
+) -> Dict[str, int]:
+    """
+    Pre-warm cache cho một language
+    
+    Args:
+        language: Ngôn ngữ trả về
+        vocabs: Danh sách từ vựng cần pre-warm
+        concurrency: Số LLM call đồng thời tối đa
+        retries: Số lần retry cho mỗi từ
+        base_delay: Delay ban đầu của backoff (giây)
+        progress_every: In tiến độ sau mỗi N từ
+        
+    Returns:
+        Dict thống kê {total, skipped, generated, failed}
+    """
+    uncached = await _find_uncached(vocabs, language)
+    skipped = len(vocabs) - len(uncached)
+    print(f"[{language}] {len(vocabs)} words, {skipped} already cached, {len(uncached)} to generate")
+    
+    progress = _Progress(language, len(uncached), skipped, progress_every)
+    failed_vocabs: List[str] = []
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    
+    async def worker(vocab: str) -> None:
+        async with semaphore:
+            try:
+                await _generate_with_retry(vocab, language, retries, base_delay)
+                progress.update(True)
+            except Exception as e:
+                failed_vocabs.append(vocab)
+                print(f"Warning: [{language}] Failed to pre-warm '{vocab}': {e}")
+                progress.update(False)
+    
+    # Pre-warm chạy sau mọi LLM call tương tác (nếu dùng chung worker với API)
+    with llm_priority(Priority.BACKGROUND):
+        await asyncio.gather(*(worker(vocab) for vocab in uncached))
+    if failed_vocabs:
+        print(f"[{language}] Failed words (rerun to retry): {', '.join(failed_vocabs)}")
+    
+    return {
+        "total": len(vocabs),
+        "skipped": skipped,
+        "generated": progress.done,
+        "failed": progress.failed,
+    }
+
+
+async def prewarm(
+    languages: List[str],
+    concurrency: int = 4,
+    retries: int = 3,
+    base_delay: float = 2.0,
+    limit: Optional[int] = None,
+    progress_every: int = 10,
+) -> Dict[str, Dict[str, int]]:
+    """
+    Pre-warm cache cho các từ trong sounds.json với nhiều language
+    
+    Returns:
+        Dict language -> thống kê của prewarm_language
+    """
+    vocabs = load_sound_vocabs()
+    if limit is not None:
+        vocabs = vocabs[:limit]
+    
+    results = {}
+    for language in languages:
+        results[language] = await prewarm_language(
+            language,
+            vocabs,
+            concurrency=concurrency,
+            retries=retries,
+            base_delay=base_delay,
+            progress_every=progress_every,
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--languages", nargs="+", required=True, help="Các ngôn ngữ cần pre-warm")
+    parser.add_argument("--concurrency", type=int, default=4, help="Số LLM call đồng thời tối đa")
+    parser.add_argument("--retries", type=int, default=3, help="Số lần retry cho mỗi từ")
+    parser.add_argument("--base-delay", type=float, default=2.0, help="Delay ban đầu của backoff (giây)")
+    parser.add_argument("--limit", type=int, default=None, help="Chỉ pre-warm N từ đầu tiên")
+    parser.add_argument("--progress-every", type=int, default=10, help="In tiến độ sau mỗi N từ")
+    args = parser.parse_args()
+    
+    if _get_collection() is None:
+        print("Warning: MongoDB cache is not configured (AGNO_MONGO_URL), nothing to pre-warm")
+        return
+    
+    results = asyncio.run(prewarm(
+        args.languages,
+        concurrency=args.concurrency,
+        retries=args.retries,
+        base_delay=args.base_delay,
+        limit=args.limit,
+        progress_every=args.progress_every,
+    ))
+    for language, stats in results.items():
+        print(f"[{language}] done: {stats}")
+
+
+if __name__ == "__main__":
+    main()
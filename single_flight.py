@@ -0,0 +1,52 @@
+"""
+Single-flight: gộp các lời gọi đồng thời cùng key thành một lần thực thi
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Đảm bảo mỗi key chỉ có một coroutine đang chạy tại một thời điểm
+
+    Các caller đến sau khi key đang chạy sẽ await cùng một kết quả (hoặc cùng
+    exception). Công việc chạy trong task riêng nên nếu một caller bị cancel
+    (client ngắt kết nối) thì các caller khác vẫn nhận được kết quả.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Chạy fn() cho key, hoặc chờ kết quả của lần chạy đang diễn ra
+
+        Args:
+            key: Key dùng để gộp các lời gọi
+            fn: Hàm trả về coroutine cần thực thi
+
+        Returns:
+            Kết quả của fn()
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._on_done(key, t))
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Đánh dấu exception đã được xử lý, tránh warning khi mọi caller đã bị cancel
+        if not task.cancelled():
+            task.exception()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._tasks
+
+    def in_flight(self) -> int:
+        """
+        Số key đang được thực thi
+        """
+        return len(self._tasks)
@@ -0,0 +1,78 @@
+"""
+Danh sách từ vựng có sẵn audio, đọc từ sounds.json
+"""
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+
+SOUNDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sounds.json")
+# Khoảng trắng/underscore liên tiếp được gộp thành một "_"
+_SEPARATOR_RE = re.compile(r"[\s_]+")
+# Dấu câu thừa ở hai đầu (ví dụ: "abide by." hoặc "'abound'")
+_EDGE_PUNCTUATION = " \t\n.,!?;:\"'`()[]{}"
+
+
+@lru_cache(maxsize=1)
+def load_sounds() -> Dict[str, str]:
+    """
+    Đọc sounds.json (chỉ đọc một lần mỗi process)
+    
+    Returns:
+        Dict sound key (ví dụ: "abide_by") -> tên file mp3
+    """
+    with open(SOUNDS_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def sound_key_to_vocab(key: str) -> str:
+    """
+    Chuyển sound key sang dạng từ vựng hiển thị ("abide_by" -> "abide by")
+    """
+    return key.replace("_", " ")
+
+
+def load_sound_vocabs() -> List[str]:
+    """
+    Danh sách từ vựng (dạng hiển thị) theo thứ tự trong sounds.json
+    """
+    return [sound_key_to_vocab(key) for key in load_sounds()]
+
+
+def normalize_sound_key(text: str) -> str:
+    """
+    Chuẩn hoá từ vựng về dạng sound key
+    
+    Không phân biệt hoa thường, khoảng trắng và "_" là như nhau
+    ("Abide  by" -> "abide_by"), bỏ dấu câu ở hai đầu.
+    
+    Args:
+        text: Từ vựng người dùng nhập
+        
+    Returns:
+        Key đã chuẩn hoá
+    """
+    return _SEPARATOR_RE.sub("_", text.strip(_EDGE_PUNCTUATION).lower())
+
+
+@lru_cache(maxsize=1)
+def load_sound_index() -> Dict[str, str]:
+    """
+    Index key đã chuẩn hoá -> sound key gốc trong sounds.json (build một lần mỗi process)
+    """
+    return {normalize_sound_key(key): key for key in load_sounds()}
+
+
+def resolve_sound_key(vocab: str) -> Optional[str]:
+    """
+    Tìm sound key gốc cho từ vựng
+    
+    Args:
+        vocab: Từ vựng (ví dụ: "Abide by", "abide_by")
+        
+    Returns:
+        Sound key trong sounds.json, None nếu không có audio
+    """
+    return load_sound_index().get(normalize_sound_key(vocab))
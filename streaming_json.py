@@ -0,0 +1,164 @@
+"""
+Incremental JSON parser cho vocab info được LLM stream về
+
+Parser nhận từng đoạn text, theo dõi cấu trúc JSON (string, escape, độ sâu)
+và trả về ExampleItem / SynonymItem / OriginInfo đã validate ngay khi object
+tương ứng đóng lại, không cần chờ toàn bộ document.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from models.vocab_info import ExampleItem, OriginInfo, SynonymItem
+
+
+# Section dạng list: key trong root object -> (tên event, model của mỗi item)
+LIST_SECTIONS = {
+    "examples": ("example", ExampleItem),
+    "synonyms": ("synonym", SynonymItem),
+}
+# Section dạng object: key trong root object -> (tên event, model)
+OBJECT_SECTIONS = {
+    "origin": ("origin", OriginInfo),
+}
+
+
+class VocabInfoStreamParser:
+    """
+    Parser tăng dần cho vocab info JSON
+
+    Ví dụ:
+        parser = VocabInfoStreamParser()
+        for chunk in chunks:
+            for event, item in parser.feed(chunk):
+                ...
+        data = parser.result()
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_root_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._item_start: Optional[int] = None
+        self._root_start: Optional[int] = None
+        self._root_end: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Thêm một đoạn text và trả về các item vừa hoàn thành
+
+        Args:
+            chunk: Đoạn text mới từ LLM stream
+
+        Returns:
+            List (tên event, pydantic model) theo thứ tự xuất hiện
+        """
+        self._text += chunk
+        events: List[Tuple[str, Any]] = []
+        text = self._text
+
+        while self._pos < len(text):
+            i = self._pos
+            ch = text[i]
+            self._pos += 1
+
+            if self._root_end is not None:
+                break
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_root_string = text[self._string_start:i + 1]
+                continue
+
+            if not self._stack and ch != "{":
+                # Bỏ qua text trước root object (ví dụ: markdown code fence)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":" and len(self._stack) == 1 and self._last_root_string is not None:
+                self._current_key = json.loads(self._last_root_string)
+            elif ch in "{[":
+                if not self._stack:
+                    self._root_start = i
+                self._stack.append(ch)
+                if self._is_item_depth():
+                    self._item_start = i
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if ch == "}" and self._item_start is not None and self._is_section_depth():
+                    event = self._emit(text[self._item_start:i + 1])
+                    if event is not None:
+                        events.append(event)
+                    self._item_start = None
+                if not self._stack:
+                    self._root_end = i + 1
+
+        return events
+
+    def _is_item_depth(self) -> bool:
+        """
+        True nếu vừa mở object của một item trong section cần stream
+        """
+        if self._current_key in LIST_SECTIONS:
+            return self._stack == ["{", "[", "{"]
+        if self._current_key in OBJECT_SECTIONS:
+            return self._stack == ["{", "{"]
+        return False
+
+    def _is_section_depth(self) -> bool:
+        """
+        True nếu vừa đóng object của một item trong section cần stream
+        """
+        if self._current_key in LIST_SECTIONS:
+            return self._stack == ["{", "["]
+        if self._current_key in OBJECT_SECTIONS:
+            return self._stack == ["{"]
+        return False
+
+    def _emit(self, item_text: str) -> Optional[Tuple[str, Any]]:
+        event, model = LIST_SECTIONS.get(self._current_key) or OBJECT_SECTIONS[self._current_key]
+        try:
+            return event, model.model_validate(json.loads(item_text))
+        except (json.JSONDecodeError, ValidationError):
+            # Item lỗi không được stream, lỗi sẽ được báo khi validate document đầy đủ
+            return None
+
+    @property
+    def complete(self) -> bool:
+        """
+        True nếu root object đã đóng
+        """
+        return self._root_end is not None
+
+    @property
+    def text(self) -> str:
+        """
+        Toàn bộ text đã nhận
+        """
+        return self._text
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Parse toàn bộ root object đã nhận
+
+        Raises:
+            json.JSONDecodeError: Nếu document chưa hoàn chỉnh hoặc không hợp lệ
+        """
+        if self._root_start is None or self._root_end is None:
+            return json.loads(self._text.strip())
+        return json.loads(self._text[self._root_start:self._root_end])
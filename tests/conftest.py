@@ -0,0 +1,8 @@
+"""
+Cấu hình chung cho unit test: không kết nối MongoDB/LLM thật
+"""
+import os
+
+# Các module đọc config lúc import (load_dotenv không ghi đè biến đã có)
+os.environ["AGNO_MONGO_URL"] = ""
+os.environ.setdefault("VOCAB_REQUEST_LOG", "false")
@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+from agno.models.message import Message
+from agno.models.openai import OpenAIChat
+from agno.run import RunContext
+from agno.run.agent import RunOutput
+from agno.run.base import RunStatus
+from agno.session import AgentSession
+
+from agent_context import WindowedAgent, estimate_tokens, summarize_turn, window_history
+
+
+def _turn(number, tutor=None):
+    return [
+        Message(role="user", content=f"learner answer {number}", from_history=True),
+        Message(role="assistant", content=tutor or f"tutor reply {number} " * 30, from_history=True),
+    ]
+
+
+def _messages(turns):
+    history = [message for number in range(1, turns + 1) for message in _turn(number)]
+    return [Message(role="system", content="SYSTEM PROMPT")] + history + [Message(role="user", content="current")]
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+
+def test_window_keeps_system_prompt_and_latest_turns():
+    messages = _messages(4)
+    windowed, report = window_history(messages, max_tokens=1000, keep_turns=2)
+
+    assert windowed[0] is messages[0]
+    summary = windowed[1]
+    assert summary.from_history
+    assert summary.content.startswith("Summary of earlier turns")
+    assert "Turn 1" in summary.content and "Turn 2" in summary.content
+    assert "learner answer 3" not in summary.content
+    assert [m.content for m in windowed[2:6]] == [m.content for m in messages[5:9]]
+    assert windowed[-1].content == "current"
+    assert len(windowed) == 7
+
+    assert report["collapsed_turns"] == 2
+    assert report["history_tokens_after"] < report["history_tokens_before"]
+    assert report["prompt_tokens_before"] - report["prompt_tokens_after"] == (
+        report["history_tokens_before"] - report["history_tokens_after"]
+    )
+
+
+def test_kept_turns_over_budget_are_collapsed():
+    messages = _messages(3)
+    windowed, report = window_history(messages, max_tokens=150, keep_turns=2)
+
+    assert report["collapsed_turns"] == 2
+    assert report["history_tokens_after"] <= 150
+    assert windowed[0] is messages[0]
+    assert windowed[-3].content == "learner answer 3"
+
+
+def test_summary_drops_oldest_lines_over_budget():
+    messages = _messages(6)
+    windowed, report = window_history(messages, max_tokens=80, keep_turns=0)
+
+    summary = windowed[1].content
+    assert "Turn 6" in summary
+    assert "Turn 1" not in summary
+    assert report["history_tokens_after"] <= 80
+
+
+def test_no_history_is_unchanged():
+    messages = [Message(role="system", content="SYSTEM PROMPT"), Message(role="user", content="current")]
+    windowed, report = window_history(messages)
+    assert windowed is messages
+    assert report["history_tokens_after"] == 0
+    assert report["prompt_tokens_after"] == report["prompt_tokens_before"]
+
+
+def test_summarize_turn_labels_step_and_hints():
+    tutor = "Listen to it. <meta><audio>coffee</audio><hint>think of a cafe</hint></meta>"
+    line = summarize_turn(_turn(1, tutor), 1)
+    assert line.startswith("- Turn 1 [STEP 3 (pronunciation) done]")
+    assert "learner: learner answer 1" in line
+    assert "tutor: Listen to it." in line
+    assert "hints offered: think of a cafe" in line
+
+
+@pytest.fixture
+def agent():
+    return WindowedAgent(
+        model=OpenAIChat(id="gpt-4o-mini", api_key="test"),
+        instructions="SYSTEM PROMPT",
+        add_history_to_context=True,
+        num_history_runs=10,
+        history_token_budget=400,
+        history_keep_turns=1,
+    )
+
+
+def _session(agent, turns):
+    runs = [
+        RunOutput(
+            run_id=f"run-{number}",
+            session_id="session",
+            agent_id=agent.id,
+            status=RunStatus.completed,
+            messages=[
+                Message(role="user", content=f"learner answer {number}"),
+                Message(role="assistant", content=f"tutor reply {number} " * 30),
+            ],
+        )
+        for number in range(1, turns + 1)
+    ]
+    return AgentSession(session_id="session", agent_id=agent.id, runs=runs)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_windowed_agent_trims_agno_run_messages(agent, use_async):
+    # Chạy qua _get_run_messages/_aget_run_messages thật của agno (bắt thay đổi khi nâng version)
+    run_response = RunOutput(run_id="current", session_id="session", agent_id=agent.id)
+    kwargs = dict(
+        run_response=run_response,
+        run_context=RunContext(run_id="current", session_id="session"),
+        input="current",
+        session=_session(agent, 4),
+        add_history_to_context=True,
+    )
+    if use_async:
+        run_messages = asyncio.run(agent._aget_run_messages(**kwargs))
+    else:
+        run_messages = agent._get_run_messages(**kwargs)
+
+    messages = run_messages.messages
+    assert messages[0] is run_messages.system_message
+    assert "SYSTEM PROMPT" in messages[0].content
+    assert messages[1].content.startswith("Summary of earlier turns")
+    assert [m.content for m in messages[2:]] == ["learner answer 4", "tutor reply 4 " * 30, "current"]
+
+    report = run_response.metadata["context_window"]
+    assert report["collapsed_turns"] == 3
+    assert report["history_tokens_after"] < report["history_tokens_before"]
@@ -0,0 +1,82 @@
+import asyncio
+
+import circuit_breaker
+from circuit_breaker import CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test", failure_threshold=3)
+    breaker.record_failure(ConnectionError("down"))
+    breaker.record_failure(ConnectionError("down"))
+    assert breaker.allow_request()
+
+    breaker.record_failure(ConnectionError("down"))
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.stats()["short_circuited"] == 1
+    assert breaker.stats()["last_error"] == "down"
+
+
+def test_success_resets_consecutive_failures():
+    breaker = CircuitBreaker("test", failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["total_failures"] == 2
+
+
+def test_half_open_after_recovery_timeout(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=30)
+    breaker.record_failure()
+    assert not breaker.allow_request()
+
+    clock.now += 30
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    # Request thử lỗi: mở lại ngay, không cần đủ failure_threshold
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()["opened_count"] == 2
+
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_background_probe_closes_breaker():
+    async def scenario():
+        attempts = 0
+
+        async def probe():
+            nonlocal attempts
+            attempts += 1
+            if attempts < 3:
+                raise ConnectionError("still down")
+
+        breaker = CircuitBreaker("test", failure_threshold=1, probe=probe, probe_interval=0.001)
+        breaker.record_failure()
+        # Có probe nền thì không cho request thử
+        assert not breaker.allow_request()
+        for _ in range(100):
+            if breaker.state == CircuitBreaker.CLOSED:
+                break
+            await asyncio.sleep(0.005)
+        return breaker, attempts
+
+    breaker, attempts = asyncio.run(scenario())
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert attempts == 3
+    assert breaker.allow_request()
@@ -0,0 +1,193 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import jobs
+import vocab_cache
+from benchmarks.fake_mongo import InMemoryDatabase
+from jobs import DONE, FAILED, JOBS_COLLECTION, PENDING, RUNNING
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    database = InMemoryDatabase()
+    monkeypatch.setattr(vocab_cache, "_get_collection", lambda name=vocab_cache.CACHE_COLLECTION: database[name])
+    monkeypatch.setattr(jobs, "_indexes_ensured", False)
+    monkeypatch.setattr(jobs, "_work_available", None)
+    monkeypatch.setattr(jobs, "_job_finished", None)
+    return database[JOBS_COLLECTION]
+
+
+def _fake_generate(monkeypatch, generate):
+    monkeypatch.setattr(jobs, "get_vocab_info", generate)
+
+
+def test_enqueue_deduplicates_by_cache_key(collection):
+    async def scenario():
+        first = await jobs.enqueue_vocab_job("Abide_by", "Vietnamese")
+        second = await jobs.enqueue_vocab_job("abide by", "vi")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first["status"] == PENDING
+    assert second["job_id"] == first["job_id"]
+    assert len(collection.documents) == 1
+
+
+def test_enqueue_does_not_start_workers_by_default(collection):
+    asyncio.run(jobs.enqueue_vocab_job("coffee", "vi"))
+    assert jobs._workers == []
+
+
+def test_claim_is_exclusive(collection):
+    async def scenario():
+        await jobs.enqueue_vocab_job("coffee", "vi")
+        first = await jobs._claim_job(collection, "worker-a")
+        second = await jobs._claim_job(collection, "worker-b")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first["status"] == RUNNING
+    assert first["owner"] == "worker-a"
+    assert first["attempts"] == 1
+    assert second is None
+
+
+def test_expired_lease_is_reclaimed_and_old_owner_cannot_finish(collection):
+    async def scenario():
+        job = await jobs.enqueue_vocab_job("coffee", "vi")
+        await jobs._claim_job(collection, "worker-a")
+        # worker-a chết: lease hết hạn
+        collection.documents[job["job_id"]]["lease_until"] = datetime.utcnow() - timedelta(seconds=1)
+        reclaimed = await jobs._claim_job(collection, "worker-b")
+        await jobs._finish_job(collection, "worker-a", reclaimed, {"status": DONE, "result": {"vocab": "a"}}, "done")
+        return reclaimed, collection.documents[job["job_id"]]
+
+    reclaimed, stored = asyncio.run(scenario())
+    assert reclaimed["owner"] == "worker-b"
+    assert reclaimed["attempts"] == 2
+    assert stored["status"] == RUNNING
+    assert stored.get("result") is None
+
+
+def test_run_job_stores_result(collection, monkeypatch):
+    async def generate(vocab, language):
+        return {"vocab": vocab, "language": language}
+
+    _fake_generate(monkeypatch, generate)
+
+    async def scenario():
+        job = await jobs.enqueue_vocab_job("coffee", "vi")
+        claimed = await jobs._claim_job(collection, "worker-a")
+        await jobs._run_job(collection, "worker-a", claimed)
+        return await jobs.get_vocab_job(job["job_id"])
+
+    job = asyncio.run(scenario())
+    assert job["status"] == DONE
+    assert job["result"] == {"vocab": "coffee", "language": "vi"}
+
+
+def test_run_job_retries_transient_errors_and_fails_invalid_data(collection, monkeypatch):
+    async def generate(vocab, language):
+        if vocab == "timeout":
+            raise TimeoutError("LLM timeout")
+        raise ValueError("invalid vocab info")
+
+    _fake_generate(monkeypatch, generate)
+
+    async def run(vocab):
+        job = await jobs.enqueue_vocab_job(vocab, "vi")
+        claimed = await jobs._claim_job(collection, "worker-a")
+        await jobs._run_job(collection, "worker-a", claimed)
+        return collection.documents[job["job_id"]]
+
+    retried = asyncio.run(run("timeout"))
+    assert retried["status"] == PENDING
+    assert retried["available_at"] > datetime.utcnow()
+    assert retried["error"] == "LLM timeout"
+
+    failed = asyncio.run(run("gibberish"))
+    assert failed["status"] == FAILED
+    assert failed["error"] == "invalid vocab info"
+
+
+def test_job_abandoned_too_many_times_fails(collection, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_MAX_ATTEMPTS", 1)
+
+    async def scenario():
+        job = await jobs.enqueue_vocab_job("coffee", "vi")
+        await jobs._claim_job(collection, "worker-a")
+        collection.documents[job["job_id"]]["lease_until"] = datetime.utcnow() - timedelta(seconds=1)
+        reclaimed = await jobs._claim_job(collection, "worker-b")
+        await jobs._run_job(collection, "worker-b", reclaimed)
+        return collection.documents[job["job_id"]]
+
+    stored = asyncio.run(scenario())
+    assert stored["status"] == FAILED
+    assert stored["attempts"] == 2
+
+
+def test_running_job_renews_its_lease(collection, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_LEASE_SECONDS", 0.2)
+    monkeypatch.setattr(jobs, "JOB_HEARTBEAT_SECONDS", 0.05)
+
+    async def scenario():
+        job = await jobs.enqueue_vocab_job("coffee", "vi")
+        claimed = await jobs._claim_job(collection, "worker-a")
+
+        async def generate(vocab, language):
+            # Lâu hơn lease: không có heartbeat thì worker-b claim lại được
+            await asyncio.sleep(0.5)
+            stolen = await jobs._claim_job(collection, "worker-b")
+            assert stolen is None
+            return {"vocab": vocab}
+
+        _fake_generate(monkeypatch, generate)
+        await jobs._run_job(collection, "worker-a", claimed)
+        return collection.documents[job["job_id"]]
+
+    stored = asyncio.run(scenario())
+    assert stored["status"] == DONE
+    assert stored["owner"] == "worker-a"
+    assert stored["attempts"] == 1
+
+
+def test_finished_job_is_rerun_on_enqueue(collection, monkeypatch):
+    async def generate(vocab, language):
+        return {"vocab": vocab}
+
+    _fake_generate(monkeypatch, generate)
+
+    async def scenario():
+        job = await jobs.enqueue_vocab_job("coffee", "vi")
+        claimed = await jobs._claim_job(collection, "worker-a")
+        await jobs._run_job(collection, "worker-a", claimed)
+        # Kết quả đã bị xoá khỏi cache: caller enqueue lại
+        return job, await jobs.enqueue_vocab_job("coffee", "vi")
+
+    first, again = asyncio.run(scenario())
+    assert again["job_id"] == first["job_id"]
+    assert again["status"] == PENDING
+    assert again["result"] is None
+
+
+def test_in_process_workers_run_pending_jobs(collection, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_IN_PROCESS_WORKERS", True)
+    monkeypatch.setattr(jobs, "_workers", [])
+
+    async def generate(vocab, language):
+        return {"vocab": vocab}
+
+    _fake_generate(monkeypatch, generate)
+
+    async def scenario():
+        job = await jobs.enqueue_vocab_job("coffee", "vi")
+        try:
+            return await jobs.wait_for_vocab_job(job["job_id"], timeout=2)
+        finally:
+            await jobs.stop_job_workers()
+
+    job = asyncio.run(scenario())
+    assert job["status"] == DONE
+    assert job["result"] == {"vocab": "coffee"}
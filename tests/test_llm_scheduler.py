@@ -0,0 +1,146 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import llm_scheduler
+from llm_scheduler import LLMScheduler, Priority
+
+
+class RateLimitError(Exception):
+    def __init__(self, retry_after=None):
+        super().__init__("429")
+        self.status_code = 429
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=429, headers=headers)
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "LLM_RATE_LIMIT_PAUSE_SECONDS", 0.1)
+    monkeypatch.setattr(llm_scheduler, "LLM_RETRY_BASE_DELAY_SECONDS", 0.01)
+
+
+async def _queue(scheduler, order, priority, name):
+    async with scheduler.slot(priority):
+        order.append(name)
+
+
+def test_queue_runs_by_priority_then_fifo():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1)
+        order = []
+        await scheduler._acquire(Priority.VOCAB, 0)
+        tasks = [
+            asyncio.ensure_future(_queue(scheduler, order, priority, name))
+            for priority, name in [
+                (Priority.BACKGROUND, "background"),
+                (Priority.VOCAB, "vocab-1"),
+                (Priority.TUTOR, "tutor"),
+                (Priority.VOCAB, "vocab-2"),
+            ]
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.get_stats()["queued"] == 4
+        scheduler._release()
+        await asyncio.gather(*tasks)
+        return order, scheduler
+
+    order, scheduler = asyncio.run(scenario())
+    assert order == ["tutor", "vocab-1", "vocab-2", "background"]
+    assert scheduler.in_flight == 0
+
+
+def test_rate_limit_halves_concurrency_and_pauses_queue():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=8)
+        with pytest.raises(RateLimitError):
+            async with scheduler.slot(Priority.VOCAB):
+                raise RateLimitError(retry_after=0.2)
+        limit = scheduler.get_stats()["concurrency_limit"]
+        # Hàng đợi dừng theo Retry-After; burst 429 liền nhau chỉ giảm concurrency một lần
+        started = time.monotonic()
+        with pytest.raises(RateLimitError):
+            async with scheduler.slot(Priority.VOCAB):
+                waited = time.monotonic() - started
+                raise RateLimitError()
+        return limit, scheduler, waited
+
+    limit, scheduler, waited = asyncio.run(scenario())
+    assert limit == 4
+    assert scheduler.get_stats()["concurrency_limit"] == 4
+    assert scheduler.get_stats()["rate_limited"] == 2
+    assert waited >= 0.15
+
+
+def test_run_retries_rate_limited_call():
+    attempts = []
+
+    async def call(slot):
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise RateLimitError(retry_after=0.05)
+        return "ok"
+
+    scheduler = LLMScheduler(max_concurrency=2)
+    assert asyncio.run(scheduler.run(call, Priority.VOCAB)) == "ok"
+    assert len(attempts) == 2
+    assert attempts[1] - attempts[0] >= 0.04
+    assert scheduler.get_stats()["retries"] == 1
+    assert scheduler.in_flight == 0
+
+
+def test_run_does_not_retry_other_errors():
+    attempts = []
+
+    async def call(slot):
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    scheduler = LLMScheduler()
+    with pytest.raises(ValueError):
+        asyncio.run(scheduler.run(call, Priority.VOCAB))
+    assert len(attempts) == 1
+    assert scheduler.get_stats()["retries"] == 0
+
+
+def test_cancelled_waiter_does_not_hold_slot():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1)
+        order = []
+        await scheduler._acquire(Priority.VOCAB, 0)
+        cancelled = asyncio.ensure_future(_queue(scheduler, order, Priority.TUTOR, "cancelled"))
+        waiting = asyncio.ensure_future(_queue(scheduler, order, Priority.VOCAB, "waiting"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        scheduler._release()
+        await waiting
+        return order, scheduler, cancelled
+
+    order, scheduler, cancelled = asyncio.run(scenario())
+    assert cancelled.cancelled()
+    assert order == ["waiting"]
+    assert scheduler.in_flight == 0
+    assert scheduler.get_stats()["queued"] == 0
+
+
+def test_waiter_cancelled_after_admission_releases_slot():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1)
+        order = []
+        await scheduler._acquire(Priority.VOCAB, 0)
+        admitted = asyncio.ensure_future(_queue(scheduler, order, Priority.TUTOR, "admitted"))
+        waiting = asyncio.ensure_future(_queue(scheduler, order, Priority.VOCAB, "waiting"))
+        await asyncio.sleep(0)
+        # Slot được cấp cho "admitted" rồi caller bị cancel trước khi kịp chạy
+        scheduler._release()
+        admitted.cancel()
+        await asyncio.wait_for(waiting, timeout=1)
+        return order, scheduler, admitted
+
+    order, scheduler, admitted = asyncio.run(scenario())
+    assert admitted.cancelled()
+    assert order == ["waiting"]
+    assert scheduler.in_flight == 0
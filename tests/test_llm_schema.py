@@ -0,0 +1,68 @@
+import vocab_info_service
+from llm_schema import build_response_format, to_strict_json_schema
+from models.vocab_info import MultilingualVocabInfo, VocabInfoResponse
+
+
+def _objects(schema):
+    """
+    Mọi object schema lồng trong schema (kể cả $defs)
+    """
+    if isinstance(schema, dict):
+        if schema.get("type") == "object":
+            yield schema
+        for value in schema.values():
+            yield from _objects(value)
+    elif isinstance(schema, list):
+        for item in schema:
+            yield from _objects(item)
+
+
+def test_every_object_is_strict():
+    for model in (VocabInfoResponse, MultilingualVocabInfo):
+        objects = list(_objects(to_strict_json_schema(model)))
+        assert objects
+        for schema in objects:
+            assert schema["additionalProperties"] is False
+            assert schema["required"] == list(schema["properties"])
+
+
+def test_optional_field_stays_nullable_and_required():
+    schema = to_strict_json_schema(VocabInfoResponse)
+    origin = schema["$defs"]["OriginInfo"]
+    assert "historical_context" in origin["required"]
+    assert {"type": "null"} in origin["properties"]["historical_context"]["anyOf"]
+
+
+def test_unsupported_keywords_are_dropped():
+    schema = to_strict_json_schema(VocabInfoResponse)
+    assert "maxItems" not in schema["properties"]["examples"]
+    assert "title" not in schema
+    assert "default" not in schema["$defs"]["OriginInfo"]["properties"]["historical_context"]
+
+
+def test_response_format_shape():
+    response_format = build_response_format(VocabInfoResponse, "vocab_info")
+    assert response_format["type"] == "json_schema"
+    assert response_format["json_schema"]["name"] == "vocab_info"
+    assert response_format["json_schema"]["strict"] is True
+
+
+def test_repair_format_requests_only_invalid_fields():
+    full = build_response_format(VocabInfoResponse, "vocab_info")
+    repair = build_response_format(VocabInfoResponse, "vocab_info", ["origin", "synonyms"])
+    schema = repair["json_schema"]["schema"]
+    assert list(schema["properties"]) == ["synonyms", "origin"]
+    assert schema["required"] == ["synonyms", "origin"]
+    # Schema đầy đủ không bị sửa theo
+    assert "examples" in full["json_schema"]["schema"]["properties"]
+    assert "examples" in build_response_format(VocabInfoResponse, "vocab_info")["json_schema"]["schema"]["properties"]
+
+
+def test_service_response_format_is_built_once(monkeypatch):
+    monkeypatch.setattr(vocab_info_service, "STRUCTURED_OUTPUT_ENABLED", True)
+    full = vocab_info_service._build_response_format()
+    assert vocab_info_service._build_response_format() is full
+    repair = vocab_info_service._build_response_format(["synonyms", "origin"])
+    assert vocab_info_service._build_response_format(["origin", "synonyms"]) is repair
+    assert set(repair["json_schema"]["schema"]["properties"]) == {"origin", "synonyms"}
+    assert full == build_response_format(VocabInfoResponse, "vocab_info")
@@ -0,0 +1,82 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import metrics
+from metrics import HTTP_IN_FLIGHT, HTTP_REQUESTS, Counter, Gauge, Histogram, RequestMetricsMiddleware
+
+
+def test_counter_and_gauge_exposition(monkeypatch):
+    monkeypatch.setattr(metrics, "_registry", [])
+    counter = Counter("test_requests_total", "Requests", ("route",))
+    counter.inc(route='/a"b')
+    counter.inc(2, route='/a"b')
+    counter.inc(0.5, route="/c")
+    gauge = Gauge("test_in_flight", "In flight")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+
+    assert metrics.render_metrics() == (
+        "# HELP test_requests_total Requests\n"
+        "# TYPE test_requests_total counter\n"
+        'test_requests_total{route="/a\\"b"} 3\n'
+        'test_requests_total{route="/c"} 0.5\n'
+        "# HELP test_in_flight In flight\n"
+        "# TYPE test_in_flight gauge\n"
+        "test_in_flight 1\n"
+    )
+
+
+def test_histogram_buckets_are_cumulative(monkeypatch):
+    monkeypatch.setattr(metrics, "_registry", [])
+    histogram = Histogram("test_seconds", "Latency", ("stage",), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, stage="llm")
+
+    assert histogram.count(stage="llm") == 4
+    assert metrics.render_metrics().splitlines()[2:] == [
+        'test_seconds_bucket{stage="llm",le="0.1"} 2',
+        'test_seconds_bucket{stage="llm",le="1"} 3',
+        'test_seconds_bucket{stage="llm",le="+Inf"} 4',
+        'test_seconds_sum{stage="llm"} 3.65',
+        'test_seconds_count{stage="llm"} 4',
+    ]
+
+
+def _client():
+    app = FastAPI()
+    seen = {}
+
+    @app.get("/api/items/{item:path}")
+    async def item_endpoint(item: str):
+        seen["in_flight"] = HTTP_IN_FLIGHT.get(route="/api/items/{item}")
+        return {"item": item}
+
+    app.add_middleware(RequestMetricsMiddleware)
+    return TestClient(app), seen
+
+
+def test_middleware_labels_by_route_template():
+    client, seen = _client()
+    before = HTTP_REQUESTS.get(method="GET", route="/api/items/{item}", status="200")
+
+    response = client.get("/api/items/coffee/beans", headers={"X-Request-ID": "abc"})
+    assert response.status_code == 200
+    assert response.headers["x-request-id"] == "abc"
+    assert HTTP_REQUESTS.get(method="GET", route="/api/items/{item}", status="200") == before + 1
+    assert seen["in_flight"] == 1
+    assert HTTP_IN_FLIGHT.get(route="/api/items/{item}") == 0
+
+
+def test_middleware_collapses_unmatched_paths():
+    client, _ = _client()
+    before = HTTP_REQUESTS.get(method="GET", route="unmatched", status="404")
+
+    for path in ("/random/a", "/random/b", "/api/other"):
+        assert client.get(path).status_code == 404
+    assert HTTP_REQUESTS.get(method="GET", route="unmatched", status="404") == before + 3
+    labels = {key[0] for key in HTTP_IN_FLIGHT._values}
+    assert not labels & {"/random", "/api/other", "/random/a"}
+    assert HTTP_IN_FLIGHT.get(route="unmatched") == 0
+    assert client.post("/api/items/x").status_code == 405
+    assert HTTP_IN_FLIGHT.get(route="/api/items/{item}") == 0
@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import pytest
+
+import vocab_cache
+import vocab_info_service
+from benchmarks.fake_mongo import InMemoryDatabase
+from memory_cache import TTLCache
+from vocab_cache import get_negative_cache_entry, save_negative_cache_entry, save_vocab_info_to_cache
+from vocab_index import VocabIndex
+from vocab_info_service import (
+    FAILURE_PARSE_ERROR,
+    FAILURE_REJECTED_INPUT,
+    UnresolvableVocabError,
+    check_vocab_resolvable,
+    get_vocab_info_multi,
+)
+
+
+@pytest.fixture
+def index():
+    index = VocabIndex()
+    index.add_many(["abide by", "rhythm", "psych", "strength", "coffee"])
+    return index
+
+
+@pytest.fixture(autouse=True)
+def service_state(monkeypatch, index):
+    # L1 riêng cho mỗi test, index nhỏ thay cho sounds.json (MongoDB không cấu hình)
+    monkeypatch.setattr(vocab_cache, "_l1_cache", TTLCache(max_size=100, ttl_seconds=60))
+    monkeypatch.setattr(vocab_cache, "_negative_l1_cache", TTLCache(max_size=100, ttl_seconds=60))
+    monkeypatch.setattr(vocab_info_service, "_vocab_index", index)
+    monkeypatch.setattr(vocab_info_service, "_vocab_index_seeded", True)
+    monkeypatch.setattr(vocab_info_service, "PLAUSIBILITY_FILTER_ENABLED", True)
+
+
+def test_negative_entry_is_shared_by_key_variants():
+    asyncio.run(save_negative_cache_entry("Abide_by", "Vietnamese", "parse_error", "bad", persist=False))
+    negative = get_negative_cache_entry("abide by", "vi")
+    assert negative["reason"] == "parse_error"
+    assert negative["detail"] == "bad"
+
+
+def test_saving_vocab_info_clears_negative_entry():
+    async def scenario():
+        await save_negative_cache_entry("coffee", "vi", "validation_error", "bad", persist=False)
+        await save_vocab_info_to_cache("coffee", "vi", {"vocab": "coffee"})
+        return get_negative_cache_entry("coffee", "vi"), await vocab_cache.get_cached_vocab_info("coffee", "vi")
+
+    negative, cached = asyncio.run(scenario())
+    assert negative is None
+    assert cached == {"vocab": "coffee"}
+
+
+def test_rejected_input_is_remembered():
+    with pytest.raises(UnresolvableVocabError) as first:
+        asyncio.run(check_vocab_resolvable("qwrtplk", "vi"))
+    assert first.value.reason == FAILURE_REJECTED_INPUT
+    assert get_negative_cache_entry("qwrtplk", "vi")["reason"] == FAILURE_REJECTED_INPUT
+
+    hits = vocab_info_service._generation_stats["negative_hits"]
+    with pytest.raises(UnresolvableVocabError) as second:
+        asyncio.run(check_vocab_resolvable("QWRTPLK", "Vietnamese"))
+    assert str(second.value) == str(first.value)
+    assert vocab_info_service._generation_stats["negative_hits"] == hits + 1
+
+
+def test_negative_entry_blocks_plausible_vocab():
+    asyncio.run(check_vocab_resolvable("coffee", "vi"))
+    asyncio.run(save_negative_cache_entry("coffee", "vi", "validation_error", "bad", persist=False))
+    with pytest.raises(UnresolvableVocabError) as error:
+        asyncio.run(check_vocab_resolvable("coffee", "vi"))
+    assert error.value.reason == "validation_error"
+
+
+def _vocab_info_json(vocab, language):
+    return json.dumps({
+        "vocab": vocab,
+        "language": language,
+        "examples": [{"level": "easy", "sentence": f"I like {vocab}.", "translation": "..."}],
+        "synonyms": [],
+        "origin": {"etymology": "...", "historical_context": None},
+    })
+
+
+def test_multi_failure_is_remembered_per_language(monkeypatch):
+    monkeypatch.setattr(vocab_info_service, "LLM_MAX_REPAIRS", 0)
+    calls = []
+
+    async def complete(messages, response_format):
+        calls.append(messages)
+        return "not json"
+
+    monkeypatch.setattr(vocab_info_service, "_complete", complete)
+
+    for _ in range(2):
+        with pytest.raises(UnresolvableVocabError) as error:
+            asyncio.run(get_vocab_info_multi("coffee", ["vi", "French"]))
+        assert error.value.reason == FAILURE_PARSE_ERROR
+    assert len(calls) == 1
+    assert get_negative_cache_entry("coffee", "vi")["reason"] == FAILURE_PARSE_ERROR
+    assert get_negative_cache_entry("coffee", "fr")["reason"] == FAILURE_PARSE_ERROR
+
+
+def test_multi_waits_for_language_leased_by_another_worker(monkeypatch):
+    database = InMemoryDatabase()
+    monkeypatch.setattr(vocab_cache, "_get_collection", lambda name=vocab_cache.CACHE_COLLECTION: database[name])
+    monkeypatch.setattr(vocab_info_service, "DISTRIBUTED_LEASE_ENABLED", True)
+    monkeypatch.setattr(vocab_info_service, "LEASE_POLL_INTERVAL_SECONDS", 0.01)
+    prompts = []
+
+    async def complete(messages, response_format):
+        prompts.append(messages[-1]["content"])
+        return _vocab_info_json("coffee", "Vietnamese")
+
+    monkeypatch.setattr(vocab_info_service, "_complete", complete)
+
+    async def other_worker():
+        await asyncio.sleep(0.05)
+        await save_vocab_info_to_cache("coffee", "fr", json.loads(_vocab_info_json("coffee", "French")))
+        await vocab_cache.release_generation_lease("coffee", "fr", "other-worker")
+
+    async def scenario():
+        assert await vocab_cache.acquire_generation_lease("coffee", "fr", "other-worker", 10)
+        _, results = await asyncio.gather(other_worker(), get_vocab_info_multi("coffee", ["vi", "fr"]))
+        return results
+
+    results = asyncio.run(scenario())
+    assert results["vi"]["language"] == "Vietnamese"
+    assert results["fr"]["language"] == "French"
+    # Chỉ "vi" được generate ở worker này (prompt một ngôn ngữ)
+    assert len(prompts) == 1
+    assert "French" not in prompts[0]
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+import prewarm
+from vocab_info_service import FAILURE_PARSE_ERROR, UnresolvableVocabError
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+def _run(monkeypatch, errors):
+    calls = []
+
+    async def get_vocab_info(vocab, language):
+        calls.append(vocab)
+        if errors:
+            raise errors.pop(0)
+        return {"vocab": vocab}
+
+    monkeypatch.setattr(prewarm, "get_vocab_info", get_vocab_info)
+    asyncio.run(prewarm._generate_with_retry("coffee", "vi", retries=3, base_delay=0))
+    return calls
+
+
+@pytest.mark.parametrize("error", [TimeoutError(), ConnectionError(), ServerError()])
+def test_transient_errors_are_retried(monkeypatch, error):
+    assert len(_run(monkeypatch, [error, error])) == 3
+
+
+@pytest.mark.parametrize("error", [
+    UnresolvableVocabError(FAILURE_PARSE_ERROR, "bad json"),
+    ValueError("invalid"),
+])
+def test_deterministic_errors_are_not_retried(monkeypatch, error):
+    calls = []
+
+    async def get_vocab_info(vocab, language):
+        calls.append(vocab)
+        raise error
+
+    monkeypatch.setattr(prewarm, "get_vocab_info", get_vocab_info)
+    with pytest.raises(type(error)):
+        asyncio.run(prewarm._generate_with_retry("coffee", "vi", retries=3, base_delay=0))
+    assert len(calls) == 1
+
+
+def test_retries_are_bounded(monkeypatch):
+    with pytest.raises(TimeoutError):
+        _run(monkeypatch, [TimeoutError()] * 5)
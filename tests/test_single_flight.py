@@ -0,0 +1,101 @@
+import asyncio
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(10)))
+        return calls, results, flight.in_flight()
+
+    calls, results, in_flight = asyncio.run(scenario())
+    assert calls == 1
+    assert results == ["result"] * 10
+    assert in_flight == 0
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flight = SingleFlight()
+        started = []
+
+        async def work(key):
+            started.append(key)
+            await asyncio.sleep(0.01)
+            return key
+
+        results = await asyncio.gather(flight.do("a", lambda: work("a")), flight.do("b", lambda: work("b")))
+        return sorted(started), results
+
+    started, results = asyncio.run(scenario())
+    assert started == ["a", "b"]
+    assert results == ["a", "b"]
+
+
+def test_exception_is_shared_and_key_is_released():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+        # Lần gọi sau chạy lại từ đầu
+        retried = await flight.do("key", lambda: asyncio.sleep(0, result="ok"))
+        return results, retried
+
+    results, retried = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert retried == "ok"
+
+
+def test_cancelled_caller_does_not_cancel_the_work():
+    async def scenario():
+        flight = SingleFlight()
+        finished = asyncio.Event()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            finished.set()
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        assert "key" in flight
+        second = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        result = await second
+        return result, finished.is_set(), first.cancelled()
+
+    result, finished, cancelled = asyncio.run(scenario())
+    assert result == "done"
+    assert finished
+    assert cancelled
+
+
+def test_key_in_flight_only_while_running():
+    async def scenario():
+        flight = SingleFlight()
+        gate = asyncio.Event()
+        task = asyncio.ensure_future(flight.do("key", gate.wait))
+        await asyncio.sleep(0)
+        running = "key" in flight
+        gate.set()
+        await task
+        return running, "key" in flight
+
+    running, after = asyncio.run(scenario())
+    assert running
+    assert not after
+
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from streaming_json import VocabInfoStreamParser
+
+DOCUMENT = {
+    "vocab": "commit",
+    "language": "Vietnamese",
+    "examples": [
+        {"level": "easy", "sentence": "I commit to {this} plan.", "translation": "Tôi cam kết với \"kế hoạch\" này."},
+        {"level": "medium", "sentence": "They committed [a] crime.", "translation": "Họ đã phạm tội."},
+    ],
+    "synonyms": [{"word": "pledge", "meaning": "hứa, cam kết"}],
+    "origin": {"etymology": "Từ tiếng Latin committere.", "historical_context": None},
+}
+
+
+def _feed_all(parser, text, chunk_size):
+    events = []
+    for i in range(0, len(text), chunk_size):
+        events.extend(parser.feed(text[i:i + chunk_size]))
+    return events
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 17, 10_000])
+def test_items_are_emitted_in_order_for_any_chunking(chunk_size):
+    parser = VocabInfoStreamParser()
+    events = _feed_all(parser, json.dumps(DOCUMENT, ensure_ascii=False), chunk_size)
+
+    assert [event for event, _ in events] == ["example", "example", "synonym", "origin"]
+    assert events[0][1].translation == 'Tôi cam kết với "kế hoạch" này.'
+    assert events[2][1].word == "pledge"
+    assert parser.complete
+    assert parser.result() == DOCUMENT
+
+
+def test_item_is_emitted_as_soon_as_it_closes():
+    text = json.dumps(DOCUMENT)
+    first_example_end = text.index("}, {") + 1
+    parser = VocabInfoStreamParser()
+
+    assert parser.feed(text[:first_example_end - 1]) == []
+    events = parser.feed(text[first_example_end - 1:first_example_end])
+    assert [event for event, _ in events] == ["example"]
+
+
+def test_braces_inside_strings_do_not_change_depth():
+    parser = VocabInfoStreamParser()
+    events = parser.feed(json.dumps(DOCUMENT))
+    assert events[0][1].sentence == "I commit to {this} plan."
+    assert events[1][1].sentence == "They committed [a] crime."
+
+
+def test_text_around_root_object_is_ignored():
+    parser = VocabInfoStreamParser()
+    events = parser.feed("```json\n" + json.dumps(DOCUMENT) + "\n```")
+    assert len(events) == 4
+    assert parser.result() == DOCUMENT
+
+
+def test_invalid_item_is_skipped():
+    document = dict(DOCUMENT, examples=[{"level": "impossible", "sentence": "x", "translation": "y"}])
+    parser = VocabInfoStreamParser()
+    events = parser.feed(json.dumps(document))
+    assert [event for event, _ in events] == ["synonym", "origin"]
+
+
+def test_incomplete_document_raises_on_result():
+    parser = VocabInfoStreamParser()
+    parser.feed(json.dumps(DOCUMENT)[:-5])
+    assert not parser.complete
+    with pytest.raises(json.JSONDecodeError):
+        parser.result()
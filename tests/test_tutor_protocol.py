@@ -0,0 +1,82 @@
+from tutor_protocol import TutorStreamParser
+
+
+def _run(reply, chunk_size=None, **kwargs):
+    parser = TutorStreamParser(**kwargs)
+    chunk_size = chunk_size or len(reply)
+    events = []
+    for i in range(0, len(reply), chunk_size):
+        events.extend(parser.feed(reply[i:i + chunk_size]))
+    events.extend(parser.close())
+    return parser, events
+
+
+def _text(events):
+    return "".join(data["text"] for event, data in events if event == "text")
+
+
+def _codes(parser):
+    return [violation["code"] for violation in parser.violations]
+
+
+def test_step_3_reply_with_audio_and_hints():
+    reply = "Nghe và nhắc lại nhé!\n<meta><audio>commit</audio><hints><hint>com-MIT</hint><hint>2 âm tiết</hint></hints></meta>"
+    for chunk_size in (1, 4, None):
+        parser, events = _run(reply, chunk_size, expected_step=3, vocab="commit")
+        assert _text(events) == "Nghe và nhắc lại nhé!\n"
+        assert ("audio", {"vocab": "commit"}) in events
+        assert ("hints", {"hints": ["com-MIT", "2 âm tiết"]}) in events
+        assert parser.violations == []
+
+
+def test_text_is_forwarded_before_tag_closes():
+    parser = TutorStreamParser()
+    assert parser.feed("Xin chào") == [("text", {"text": "Xin chào"})]
+    # "<me" có thể là đầu của <meta>: giữ lại cho tới khi biết
+    assert parser.feed(" <me") == [("text", {"text": " "})]
+    assert parser.feed("ta>") == []
+
+
+def test_non_protocol_tags_are_text():
+    parser, events = _run("a < b và <br> vẫn là text<meta><state>FINISH</state></meta>", expected_step=7)
+    assert _text(events) == "a < b và <br> vẫn là text"
+    assert parser.finished
+    assert parser.violations == []
+
+
+def test_hints_without_hint_tags_split_by_line():
+    _, events = _run("Gợi ý:<meta><hints>\n- bắt đầu bằng c\n2. có 6 chữ cái\n</hints></meta>")
+    assert ("hints", {"hints": ["bắt đầu bằng c", "có 6 chữ cái"]}) in events
+
+
+def test_rule_violations():
+    parser, _ = _run("<meta><hints><hint>x</hint></hints><state>FINISH</state></meta>", expected_step=5)
+    assert _codes(parser) == ["hints_in_step_5", "hints_with_state", "state_before_final_step"]
+
+    parser, _ = _run("<meta><audio>other</audio></meta>", expected_step=2, vocab="commit")
+    assert _codes(parser) == ["audio_outside_step_3", "audio_vocab_mismatch"]
+
+    parser, _ = _run("<audio>commit</audio>Văn bản", expected_step=3)
+    assert _codes(parser) == ["tag_outside_meta", "missing_meta"]
+
+    parser, _ = _run("Xong.<meta></meta>", expected_step=7)
+    assert _codes(parser) == ["missing_state"]
+
+    parser, _ = _run("<meta></meta>thêm")
+    assert _codes(parser) == ["text_after_meta"]
+
+
+def test_unclosed_tags_are_closed_with_violation():
+    parser, events = _run("<meta><state>FINISH</meta>", expected_step=7)
+    assert ("state", {"state": "FINISH"}) in events
+    assert _codes(parser) == ["unclosed_tag"]
+
+    parser, events = _run("<meta><hints><hint>một", expected_step=4)
+    assert ("hints", {"hints": ["một"]}) in events
+    assert "unclosed_tag" in _codes(parser)
+
+
+def test_each_violation_is_reported_once():
+    parser, events = _run("<meta></meta>a<meta></meta>b", chunk_size=1)
+    assert _codes(parser) == ["text_after_meta", "duplicate_meta"]
+    assert sum(1 for event, _ in events if event == "violation") == 2
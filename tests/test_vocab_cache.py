@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import vocab_cache
+from vocab_cache import CacheEntry, is_entry_stale
+
+
+@pytest.fixture(autouse=True)
+def legacy_version(monkeypatch):
+    monkeypatch.setattr(vocab_cache, "LEGACY_PROMPT_VERSION", "1")
+
+
+def _entry(**metadata):
+    return CacheEntry(b"{}", **metadata)
+
+
+def test_current_entry_is_fresh():
+    entry = _entry(prompt_version="1", model="gpt", fresh_until=datetime.utcnow() + timedelta(days=1))
+    assert not is_entry_stale(entry, "1", "gpt")
+
+
+@pytest.mark.parametrize("metadata", [
+    {"prompt_version": "0"},
+    {"model": "other"},
+    {"fresh_until": datetime.utcnow() - timedelta(seconds=1)},
+])
+def test_entry_is_stale_when_metadata_differs(metadata):
+    current = {"prompt_version": "1", "model": "gpt", "fresh_until": datetime.utcnow() + timedelta(days=1)}
+    assert is_entry_stale(_entry(**{**current, **metadata}), "1", "gpt")
+
+
+def test_legacy_entry_is_fresh_until_prompt_version_bump():
+    legacy = _entry()
+    assert not is_entry_stale(legacy, "1", "gpt")
+    assert is_entry_stale(legacy, "2", "gpt")
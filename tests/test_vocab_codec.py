@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+import vocab_codec
+from vocab_codec import (
+    PAYLOAD_FORMAT_JSON,
+    PAYLOAD_FORMAT_ZSTD,
+    blob_dict_id,
+    current_dict_id,
+    decode_blob,
+    encode_blob,
+    has_dictionary,
+    register_dictionary,
+    train_dictionary,
+)
+
+
+@pytest.fixture(autouse=True)
+def codec_state(monkeypatch):
+    # Mỗi test có registry dictionary riêng
+    monkeypatch.setattr(vocab_codec, "_dictionaries", {})
+    monkeypatch.setattr(vocab_codec, "_current_dict_id", 0)
+    monkeypatch.setattr(vocab_codec, "_compressor", None)
+    monkeypatch.setattr(vocab_codec, "_decompressors", {})
+    monkeypatch.setattr(vocab_codec, "COMPRESSION_ENABLED", True)
+
+
+def _payload(i: int) -> bytes:
+    return json.dumps({
+        "vocab": f"word {i}",
+        "language": "Vietnamese",
+        "examples": [{"level": level, "sentence": f"Sentence {i} for {level}."} for level in ("easy", "medium", "hard")],
+        "origin": {"etymology": f"Từ gốc số {i}", "historical_context": None},
+    }, ensure_ascii=False).encode("utf-8")
+
+
+def _dictionary_bytes(seed: int = 0) -> bytes:
+    return train_dictionary([_payload(seed * 1000 + i) for i in range(300)], size=2048).as_bytes()
+
+
+def test_round_trip_without_dictionary():
+    payload = _payload(1)
+    blob, payload_format = encode_blob(payload)
+    assert payload_format == PAYLOAD_FORMAT_ZSTD
+    assert blob_dict_id(blob) == 0
+    assert decode_blob(blob, payload_format) == payload
+
+
+def test_round_trip_with_dictionary():
+    dict_id = register_dictionary(_dictionary_bytes(), current=True)
+    assert dict_id != 0
+    assert current_dict_id() == dict_id
+
+    payload = _payload(7)
+    blob, payload_format = encode_blob(payload)
+    assert blob_dict_id(blob) == dict_id
+    assert decode_blob(blob, payload_format) == payload
+
+
+def test_old_dictionary_still_decodes_after_new_one():
+    old_id = register_dictionary(_dictionary_bytes(0), current=True)
+    blob, payload_format = encode_blob(_payload(3))
+
+    new_id = register_dictionary(_dictionary_bytes(1), current=True)
+    assert new_id != old_id
+    assert current_dict_id() == new_id
+    assert decode_blob(blob, payload_format) == _payload(3)
+
+
+def test_register_without_current_keeps_compressor():
+    dict_id = register_dictionary(_dictionary_bytes())
+    assert has_dictionary(dict_id)
+    assert has_dictionary(0)
+    assert current_dict_id() == 0
+    blob, _ = encode_blob(_payload(1))
+    assert blob_dict_id(blob) == 0
+
+
+def test_missing_dictionary_raises_value_error(monkeypatch):
+    dict_id = register_dictionary(_dictionary_bytes(), current=True)
+    blob, payload_format = encode_blob(_payload(1))
+
+    # Worker khác chưa nạp dictionary
+    monkeypatch.setattr(vocab_codec, "_dictionaries", {})
+    monkeypatch.setattr(vocab_codec, "_decompressors", {})
+    assert not has_dictionary(dict_id)
+    with pytest.raises(ValueError, match="Missing zstd dictionary"):
+        decode_blob(blob, payload_format)
+
+
+def test_corrupt_blob_raises_value_error():
+    blob, payload_format = encode_blob(_payload(1))
+    with pytest.raises(ValueError):
+        decode_blob(b"not a zstd frame", payload_format)
+    with pytest.raises(ValueError):
+        decode_blob(blob[:-4], payload_format)
+    with pytest.raises(ValueError, match="Invalid zstd frame"):
+        blob_dict_id(b"")
+
+
+def test_unsupported_format_raises_value_error():
+    with pytest.raises(ValueError, match="Unsupported payload format"):
+        decode_blob(b"{}", 99)
+
+
+def test_json_format_is_passthrough(monkeypatch):
+    monkeypatch.setattr(vocab_codec, "COMPRESSION_ENABLED", False)
+    payload = _payload(1)
+    blob, payload_format = encode_blob(payload)
+    assert payload_format == PAYLOAD_FORMAT_JSON
+    assert blob == payload
+    assert decode_blob(blob, payload_format) == payload
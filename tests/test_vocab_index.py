@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+import vocab_info_service
+from vocab_index import VocabIndex, edit_distance
+
+
+@pytest.fixture
+def index():
+    index = VocabIndex()
+    index.add_many([
+        "abide by", "abandon", "abandonment", "ability", "able", "rhythm", "psych",
+        "strength", "coffee", "receive", "pronunciation", "give up", "give in",
+    ])
+    return index
+
+
+@pytest.mark.parametrize(
+    "a, b, distance",
+    [
+        ("coffee", "coffee", 0),
+        ("coffee", "cofee", 1),
+        ("receive", "recieve", 1),  # hoán vị hai ký tự liền kề
+        ("abandon", "abadnon", 1),
+        ("strength", "strenght", 1),
+        ("able", "ably", 1),
+        ("kitten", "sitting", 3),
+    ],
+)
+def test_edit_distance(a, b, distance):
+    assert edit_distance(a, b, 3) == distance
+    assert edit_distance(b, a, 3) == distance
+
+
+def test_edit_distance_cuts_off_above_max():
+    assert edit_distance("kitten", "sitting", 2) == 3
+    assert edit_distance("a", "abcdef", 2) == 3
+
+
+def test_prefix_prefers_shorter_keys(index):
+    assert index.prefix("ab") == ["able", "abandon", "ability", "abide_by", "abandonment"]
+    assert index.prefix("Give ") == ["give_in", "give_up"]
+    assert index.prefix("zz") == []
+
+
+def test_prefix_after_single_adds(index):
+    index.add("abacus")
+    index.add("Abacus")
+    assert len(index) == 14
+    assert index.prefix("aba") == ["abacus", "abandon", "abandonment"]
+
+
+def test_lookup_returns_closest_first(index):
+    assert index.lookup("abandn") == [("abandon", 1)]
+    assert index.lookup("recieve") == [("receive", 1)]
+    assert index.lookup("able")[0] == ("able", 0)
+    assert index.lookup("xyzxyz") == []
+
+
+def test_lookup_beyond_prefix_length(index):
+    # Deletes chỉ sinh trên 7 ký tự đầu, phần sau vẫn được tính khoảng cách
+    assert index.lookup("pronounciation") == [("pronunciation", 1)]
+    assert index.lookup("abandonmnet") == [("abandonment", 1)]
+
+
+def test_lookup_limit_keeps_closest(index):
+    index.add_many(["cat", "cab", "car", "cart", "care"])
+    assert index.lookup("cat", limit=3) == [("cat", 0), ("cab", 1), ("car", 1)]
+    assert index.lookup("cat", max_distance=0) == [("cat", 0)]
+
+
+def test_suggest_orders_exact_prefix_fuzzy(index):
+    assert index.suggest("abandon") == [
+        ("abandon", 0, "exact"),
+        ("abandonment", 0, "prefix"),
+    ]
+    assert index.suggest("abandn") == [("abandon", 1, "fuzzy")]
+    assert index.suggest("aban", limit=3) == [
+        ("abandon", 0, "prefix"),
+        ("abandonment", 0, "prefix"),
+        ("able", 2, "fuzzy"),
+    ]
+
+
+def test_canonicalize(index):
+    assert index.canonicalize("Abide_by") == "abide by"
+    assert index.canonicalize("strenght") == "strength"
+    assert index.canonicalize("pronounciation") == "pronunciation"
+    # Từ ngắn không được sửa, không chắc chắn thì giữ nguyên
+    assert index.canonicalize("abel") is None
+    assert index.canonicalize("give un") is None  # "give up" và "give in" cùng khoảng cách
+    assert index.canonicalize("completely different") is None
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "abide_by", "Rhythm", "strenght", "give up", "well-being", "naïve", "日本語",
+        "C++", "C#", "AT&T", "and/or", "tsktsk", "crwth", "pfft", "zzz", "brrr",
+    ],
+)
+def test_plausible_queries_pass(index, query):
+    assert index.plausibility_issue(query) is None
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["", "   ", "x" * 65, "a b c d e f g", "hello@world", "1234", "bcdfghk", "zzzzzz", "qwrtplk", "asdfghjkl"],
+)
+def test_gibberish_is_rejected(index, query):
+    assert index.plausibility_issue(query) is not None
+
+
+def test_known_words_skip_heuristics(index):
+    index.add("hmmmm")
+    assert index.plausibility_issue("hmmmm") is None
+    # Gần một từ đã biết: có thể là lỗi chính tả
+    assert index.plausibility_issue("hmmmmm") is None
+
+
+def test_seeding_runs_in_background(monkeypatch):
+    monkeypatch.setattr(vocab_info_service, "_vocab_index", None)
+    monkeypatch.setattr(vocab_info_service, "_vocab_index_seeded", False)
+    monkeypatch.setattr(vocab_info_service, "_vocab_index_seeding", None)
+    monkeypatch.setattr(vocab_info_service, "load_sound_vocabs", lambda: ["abide by"])
+    release = None
+
+    async def get_cached_vocabs(limit):
+        await release.wait()
+        return ["serendipity"]
+
+    monkeypatch.setattr(vocab_info_service, "get_cached_vocabs", get_cached_vocabs)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        # Request không chờ build: dùng index sounds.json
+        first = vocab_info_service._get_seeded_vocab_index()
+        assert "abide by" in first and "serendipity" not in first
+        assert vocab_info_service._get_seeded_vocab_index() is first
+
+        # Từ generate trong lúc build không bị mất khi thay index
+        await vocab_info_service._save_generated("quixotic", "vi", {"vocab": "quixotic"})
+        release.set()
+        while not vocab_info_service._vocab_index_seeded:
+            await asyncio.sleep(0.01)
+        seeded = vocab_info_service._get_seeded_vocab_index()
+        return first, seeded
+
+    first, seeded = asyncio.run(scenario())
+    assert seeded is not first
+    assert all(word in seeded for word in ("abide by", "serendipity", "quixotic"))
+    assert vocab_info_service._vocab_index_seeding is None
+    assert vocab_info_service._vocab_index_pending == []
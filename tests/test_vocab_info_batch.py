@@ -0,0 +1,55 @@
+import asyncio
+import json
+
+import pytest
+
+import vocab_cache
+import vocab_info_service
+from memory_cache import TTLCache
+from vocab_cache import save_vocab_info_to_cache
+from vocab_index import VocabIndex
+from vocab_info_service import iter_vocab_info_batch
+
+
+@pytest.fixture(autouse=True)
+def service_state(monkeypatch):
+    index = VocabIndex()
+    index.add_many(["abide by", "coffee", "tea"])
+    monkeypatch.setattr(vocab_cache, "_l1_cache", TTLCache(max_size=100, ttl_seconds=60))
+    monkeypatch.setattr(vocab_cache, "_negative_l1_cache", TTLCache(max_size=100, ttl_seconds=60))
+    monkeypatch.setattr(vocab_info_service, "_vocab_index", index)
+    monkeypatch.setattr(vocab_info_service, "_vocab_index_seeded", True)
+
+
+def _collect(vocabs):
+    async def scenario():
+        return [item async for item in iter_vocab_info_batch(vocabs, "vi", concurrency=1)]
+
+    return asyncio.run(scenario())
+
+
+def test_batch_generates_each_cache_key_once(monkeypatch):
+    prompts = []
+
+    async def complete(messages, response_format):
+        prompts.append(messages[-1]["content"])
+        await asyncio.sleep(0.01)
+        return json.dumps({
+            "vocab": "abide by",
+            "language": "Vietnamese",
+            "examples": [{"level": "easy", "sentence": "Abide by the rules.", "translation": "..."}],
+            "synonyms": [],
+            "origin": {"etymology": "...", "historical_context": None},
+        })
+
+    monkeypatch.setattr(vocab_info_service, "_complete", complete)
+    asyncio.run(save_vocab_info_to_cache("coffee", "vi", {"vocab": "coffee"}))
+
+    items = _collect(["Abide_by", "abide by", "abide by", "Coffee", "coffee"])
+
+    assert len(prompts) == 1
+    assert sorted(item["vocab"] for item in items) == ["Abide_by", "Coffee", "abide by", "coffee"]
+    by_vocab = {item["vocab"]: item for item in items}
+    assert by_vocab["Coffee"]["cached"] and by_vocab["coffee"]["cached"]
+    assert by_vocab["Abide_by"]["result"] == by_vocab["abide by"]["result"]
+    assert not by_vocab["abide by"]["cached"]
@@ -0,0 +1,60 @@
+import pytest
+
+from vocab_keys import (
+    cache_key,
+    canonical_language,
+    canonical_vocab,
+    language_code,
+    language_name,
+    legacy_cache_key,
+)
+
+
+@pytest.mark.parametrize("vocab", ["abide by", "Abide_by", " abide  by ", "ａｂｉｄｅ　ｂｙ", "ABIDE__BY"])
+def test_vocab_variants_share_canonical_form(vocab):
+    assert canonical_vocab(vocab) == "abide by"
+
+
+@pytest.mark.parametrize(
+    "language, code",
+    [
+        ("vi", "vi"),
+        ("Vietnamese", "vi"),
+        ("vietnamese ", "vi"),
+        ("Tiếng Việt", "vi"),
+        ("tieng viet", "vi"),
+        ("VI-vn", "vi"),
+        ("en_US", "en"),
+        ("zh", "zh-Hans"),
+        ("zh-CN", "zh-Hans"),
+        ("zh_TW", "zh-Hant"),
+        ("zh-Hant-HK", "zh-Hant"),
+        ("日本語", "ja"),
+    ],
+)
+def test_language_aliases_resolve_to_bcp47(language, code):
+    assert language_code(language) == code
+
+
+@pytest.mark.parametrize("language", ["it works", "xx-YY", "Klingon", ""])
+def test_unknown_language_has_no_code(language):
+    assert language_code(language) is None
+
+
+def test_unknown_language_keeps_folded_form():
+    assert canonical_language("  Old  English ") == "old english"
+    assert language_name("  Old  English ") == "Old English"
+
+
+def test_language_name_uses_english_name():
+    assert language_name("Tiếng Việt") == "Vietnamese"
+    assert language_name("zh_TW") == "Traditional Chinese"
+
+
+def test_cache_key_is_canonical():
+    assert cache_key("abide_by", "vi") == "abide by_vi"
+    assert cache_key("ａｂｉｄｅ　ｂｙ", "Tiếng Việt") == cache_key("Abide by", "VI-vn")
+
+
+def test_legacy_cache_key_only_lowercases_and_strips():
+    assert legacy_cache_key(" Abide_by ", " Vietnamese ") == "abide_by_vietnamese"
@@ -0,0 +1,30 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import vocab_routes
+
+
+def _vocab_info(language):
+    return {
+        "vocab": "coffee",
+        "language": language,
+        "examples": [{"level": "easy", "sentence": "I like coffee.", "translation": "..."}],
+        "synonyms": [],
+        "origin": {"etymology": "...", "historical_context": None},
+    }
+
+
+def test_multi_returns_one_item_per_requested_language(monkeypatch):
+    async def get_vocab_info_multi(vocab, languages):
+        return {language: _vocab_info(language) for language in languages}
+
+    monkeypatch.setattr(vocab_routes, "get_vocab_info_multi", get_vocab_info_multi)
+    app = FastAPI()
+    app.include_router(vocab_routes.router)
+
+    response = TestClient(app).post(
+        "/api/vocab/info/multi",
+        json={"vocab": "coffee", "languages": ["vi", "fr", "vi"]},
+    )
+    assert response.status_code == 200
+    assert [item["language"] for item in response.json()["items"]] == ["vi", "fr", "vi"]
@@ -0,0 +1,238 @@
+"""
+Incremental parser cho protocol <meta>/<audio>/<hints>/<state> của vocab_agent
+
+Parser nhận từng đoạn text của agent và trả về:
+- "text": narration, forward ngay (chỉ giữ lại phần có thể là đầu của một tag)
+- "audio" / "hints" / "state": ngay khi tag tương ứng đóng
+- "violation": khi reply vi phạm rule trong SYSTEM_PROMPT (hints cùng state,
+  audio ngoài STEP 3, tag nằm ngoài <meta>, ...)
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Các tag của protocol, tag khác (ví dụ "<br>") được coi là text
+PROTOCOL_TAGS = ("meta", "audio", "hints", "hint", "state")
+# Tag chỉ được nằm trong <meta>
+META_CHILDREN = ("audio", "hints", "state")
+
+_TAG_RE = re.compile(r"<\s*(/?)\s*([a-zA-Z]+)\s*(/?)\s*>")
+_PARTIAL_TAG_MAX_CHARS = 12
+_HINT_LINE_PREFIX = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+
+def _could_be_tag(text: str) -> bool:
+    """
+    True nếu text (bắt đầu bằng "<", chưa có ">") có thể là đầu của một protocol tag
+    """
+    if len(text) > _PARTIAL_TAG_MAX_CHARS:
+        return False
+    name = text[1:].lstrip().lstrip("/").lstrip()
+    return all(ch.isalpha() for ch in name) and any(tag.startswith(name.lower()) for tag in PROTOCOL_TAGS)
+
+
+class TutorStreamParser:
+    """
+    Parser tăng dần cho reply của tutor
+
+    Ví dụ:
+        parser = TutorStreamParser(expected_step=3, vocab="commit")
+        for chunk in chunks:
+            for event, data in parser.feed(chunk):
+                ...
+        for event, data in parser.close():
+            ...
+
+    Args:
+        expected_step: STEP hiện tại nếu client biết (2-7), dùng để kiểm tra audio/state/hints
+        vocab: Từ vựng của session, dùng để kiểm tra nội dung <audio>
+    """
+
+    def __init__(self, expected_step: Optional[int] = None, vocab: Optional[str] = None):
+        self.expected_step = expected_step
+        self.vocab = vocab
+        self._buffer = ""
+        self._stack: List[str] = []
+        self._capture = ""
+        self._hints: List[str] = []
+        self._meta_seen = False
+        self._meta_closed = False
+        self._children_seen: List[str] = []
+        self._events: List[Tuple[str, Dict[str, Any]]] = []
+        self.violations: List[Dict[str, str]] = []
+
+    def feed(self, chunk: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Thêm một đoạn text và trả về các event vừa có
+
+        Args:
+            chunk: Đoạn text mới từ agent stream
+
+        Returns:
+            List (tên event, data dict) theo thứ tự xuất hiện
+        """
+        self._buffer += chunk
+        self._consume(final=False)
+        return self._drain()
+
+    def close(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Kết thúc stream: flush phần còn giữ lại và kiểm tra các rule cần cả reply
+        """
+        self._consume(final=True)
+        while self._stack:
+            inner = self._stack.pop()
+            self._violation("unclosed_tag", f"<{inner}> chưa được đóng")
+            self._finish_tag(inner)
+        if not self._meta_seen:
+            self._violation("missing_meta", "Reply không có <meta>")
+        if self.expected_step == 7 and "state" not in self._children_seen:
+            self._violation("missing_state", "STEP 7 phải kết thúc bằng <state>FINISH</state>")
+        return self._drain()
+
+    @property
+    def finished(self) -> bool:
+        """
+        True nếu tutor đã gửi <state>FINISH</state>
+        """
+        return "state" in self._children_seen
+
+    def _drain(self) -> List[Tuple[str, Dict[str, Any]]]:
+        events, self._events = self._events, []
+        return events
+
+    def _violation(self, code: str, detail: str) -> None:
+        # Mỗi loại vi phạm chỉ báo một lần cho một reply (text bị chia nhiều chunk)
+        if any(violation["code"] == code for violation in self.violations):
+            return
+        violation = {"code": code, "detail": detail}
+        self.violations.append(violation)
+        self._events.append(("violation", violation))
+
+    def _consume(self, final: bool) -> None:
+        while self._buffer:
+            start = self._buffer.find("<")
+            if start < 0:
+                self._text(self._buffer)
+                self._buffer = ""
+                return
+            if start:
+                self._text(self._buffer[:start])
+                self._buffer = self._buffer[start:]
+
+            end = self._buffer.find(">")
+            # "<" chưa đóng: giữ lại nếu có thể là đầu của một tag, ngược lại là text
+            if end < 0:
+                if not final and _could_be_tag(self._buffer):
+                    return
+                self._text(self._buffer[0])
+                self._buffer = self._buffer[1:]
+                continue
+
+            match = _TAG_RE.fullmatch(self._buffer[:end + 1])
+            if match is None or match.group(2).lower() not in PROTOCOL_TAGS:
+                self._text(self._buffer[0])
+                self._buffer = self._buffer[1:]
+                continue
+
+            self._buffer = self._buffer[end + 1:]
+            closing, name, self_closing = match.group(1), match.group(2).lower(), match.group(3)
+            if closing:
+                self._close_tag(name)
+            else:
+                self._open_tag(name)
+                if self_closing:
+                    self._close_tag(name)
+
+    def _text(self, text: str) -> None:
+        if not text:
+            return
+        if self._stack:
+            if self._stack[-1] == "meta":
+                if text.strip():
+                    self._violation("text_in_meta", "<meta> chỉ được chứa <audio>, <hints>, <state>")
+                return
+            self._capture += text
+            return
+        if self._meta_closed and text.strip():
+            self._violation("text_after_meta", "Narration phải nằm trước <meta>")
+        self._events.append(("text", {"text": text}))
+
+    def _open_tag(self, name: str) -> None:
+        if name == "meta":
+            if self._stack:
+                self._violation("nested_meta", "<meta> không được nằm trong tag khác")
+            elif self._meta_seen:
+                self._violation("duplicate_meta", "Reply chỉ được có một <meta>")
+            self._meta_seen = True
+        elif name == "hint":
+            if not self._stack or self._stack[-1] != "hints":
+                self._violation("hint_outside_hints", "<hint> phải nằm trong <hints>")
+            self._capture = ""
+        elif name in META_CHILDREN:
+            if self._stack != ["meta"]:
+                self._violation("tag_outside_meta", f"<{name}> phải nằm trực tiếp trong <meta>")
+            self._capture = ""
+            if name == "hints":
+                self._hints = []
+        self._stack.append(name)
+
+    def _close_tag(self, name: str) -> None:
+        if name not in self._stack:
+            self._violation("unexpected_close", f"</{name}> không có tag mở tương ứng")
+            return
+        # Model quên đóng tag con: đóng luôn để không mất audio/hints/state
+        while self._stack[-1] != name:
+            inner = self._stack.pop()
+            self._violation("unclosed_tag", f"<{inner}> chưa được đóng")
+            self._finish_tag(inner)
+        self._stack.pop()
+        self._finish_tag(name)
+
+    def _finish_tag(self, name: str) -> None:
+        content = self._capture.strip()
+        if name == "hint":
+            if content:
+                self._hints.append(content)
+        elif name == "audio":
+            self._on_audio(content)
+        elif name == "hints":
+            self._on_hints(content)
+        elif name == "state":
+            self._on_state(content)
+        elif name == "meta":
+            self._meta_closed = True
+        if name != "meta":
+            self._capture = ""
+
+    def _on_audio(self, content: str) -> None:
+        if any(child in self._children_seen for child in ("hints", "state")):
+            self._violation("audio_order", "<audio> phải đứng đầu trong <meta>")
+        if self.expected_step is not None and self.expected_step != 3:
+            self._violation("audio_outside_step_3", f"<audio> chỉ được dùng ở STEP 3 (đang ở STEP {self.expected_step})")
+        if self.vocab and content.lower() != self.vocab.strip().lower():
+            self._violation("audio_vocab_mismatch", "<audio> chỉ được chứa đúng từ vựng của session")
+        self._children_seen.append("audio")
+        self._events.append(("audio", {"vocab": content}))
+
+    def _on_hints(self, content: str) -> None:
+        hints = self._hints
+        if not hints and content:
+            # Model không dùng <hint>: mỗi dòng là một hint
+            hints = [_HINT_LINE_PREFIX.sub("", line).strip() for line in content.splitlines()]
+            hints = [hint for hint in hints if hint]
+        if "state" in self._children_seen:
+            self._violation("hints_with_state", "<hints> và <state> không được xuất hiện cùng nhau")
+        if self.expected_step == 5:
+            self._violation("hints_in_step_5", "STEP 5 không được có <hints>")
+        self._children_seen.append("hints")
+        self._hints = []
+        self._events.append(("hints", {"hints": hints}))
+
+    def _on_state(self, content: str) -> None:
+        if "hints" in self._children_seen:
+            self._violation("hints_with_state", "<hints> và <state> không được xuất hiện cùng nhau")
+        if self.expected_step is not None and self.expected_step != 7:
+            self._violation("state_before_final_step", f"<state> chỉ được dùng ở STEP 7 (đang ở STEP {self.expected_step})")
+        self._children_seen.append("state")
+        self._events.append(("state", {"state": content}))
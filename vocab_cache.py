@@ -1,91 +1,144 @@
 """
-MongoDB cache functions cho vocab info
+MongoDB cache functions cho vocab info (async, dùng motor để không block event loop)
 """
-from datetime import datetime
-from typing import Optional, Dict, Any
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
+import json
 import os
 import pymongo
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from circuit_breaker import CircuitBreaker
+from memory_cache import TTLCache
+from vocab_codec import PAYLOAD_FORMAT_ZSTD, blob_dict_id, decode_blob, encode_blob, has_dictionary, register_dictionary
+from vocab_keys import cache_key, legacy_cache_key
+from metrics import CACHE_REQUESTS, STAGE_SECONDS, Gauge, annotate_request, register_collector
+
+load_dotenv()
 
 
 CACHE_COLLECTION = "vocab_cache"
+# Lease để nhiều worker không cùng generate một key
+LEASE_COLLECTION = "vocab_cache_leases"
+# Dictionary zstd của vocab_codec, dùng chung giữa các worker (_id = dictionary ID)
+CODEC_DICT_COLLECTION = "vocab_codec_dicts"
 # Database name: ưu tiên environment variable, nếu không có thì dùng "vocab" làm mặc định
 DATABASE_NAME = os.getenv("MONGODB_DATABASE_NAME", "vocab")
-_db_instance = None
+# Timeout ngắn để cache lỗi thì fallback sang LLM nhanh
+SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("VOCAB_CACHE_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+QUERY_TIMEOUT_MS = int(os.getenv("VOCAB_CACHE_QUERY_TIMEOUT_MS", "5000"))
+# L1: cache trong process, đặt trước collection MongoDB (L2)
+L1_MAX_SIZE = int(os.getenv("VOCAB_L1_MAX_SIZE", "5000"))
+L1_TTL_SECONDS = float(os.getenv("VOCAB_L1_TTL_SECONDS", "3600"))
+# Circuit breaker: sau N lỗi kết nối liên tiếp thì bỏ qua MongoDB, probe nền cho tới khi phục hồi
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("VOCAB_CACHE_BREAKER_FAILURE_THRESHOLD", "3"))
+BREAKER_PROBE_INTERVAL_SECONDS = float(os.getenv("VOCAB_CACHE_BREAKER_PROBE_INTERVAL_SECONDS", "5"))
+# Lỗi cho thấy MongoDB chậm/không truy cập được (tính vào circuit breaker)
+_CONNECTION_ERRORS = (
+    pymongo.errors.ConnectionFailure,
+    pymongo.errors.ExecutionTimeout,
+    ConnectionError,
+    TimeoutError,
+)
+# Freshness: sau CACHE_FRESH_SECONDS entry bị coi là stale (vẫn được trả về, refresh nền),
+# sau CACHE_EXPIRE_SECONDS document bị TTL index xoá (0 = không hard expire)
+CACHE_FRESH_SECONDS = float(os.getenv("VOCAB_CACHE_FRESH_SECONDS", str(30 * 24 * 3600)))
+CACHE_EXPIRE_SECONDS = float(os.getenv("VOCAB_CACHE_EXPIRE_SECONDS", str(180 * 24 * 3600)))
+# Document cũ (trước khi có metadata freshness) được coi là generate bằng prompt version này:
+# chúng chỉ bị refresh khi VOCAB_INFO_PROMPT_VERSION được tăng, không phải ngay khi deploy
+LEGACY_PROMPT_VERSION = os.getenv("VOCAB_CACHE_LEGACY_PROMPT_VERSION", "1")
+# Các field của document được đọc vào cache entry (data/payload: document cũ chưa có blob)
+_ENTRY_FIELDS = ("blob", "payload_format", "data", "payload", "prompt_version", "model", "fresh_until")
+_ENTRY_PROJECTION = {field: 1 for field in _ENTRY_FIELDS}
+# Negative entry: từ vựng không generate được (parse/validation lỗi, input bị từ chối),
+# nằm chung document với entry thường để một lần tra MongoDB trả lời cả hai
+NEGATIVE_CACHE_SECONDS = float(os.getenv("VOCAB_NEGATIVE_CACHE_SECONDS", "600"))
+_LOOKUP_PROJECTION = {**_ENTRY_PROJECTION, "negative": 1}
+# Cache miss với key chuẩn hoá thì đọc thêm document lưu bằng key cũ (trước vocab_keys),
+# tắt sau khi đã chạy migrate_cache_keys.py
+LEGACY_KEY_FALLBACK = os.getenv("VOCAB_CACHE_LEGACY_KEY_FALLBACK", "true").lower() in ("1", "true", "yes")
+_client_instance: Optional[AsyncIOMotorClient] = None
+_indexes_ensured = False
+_codec_dictionary_loaded = False
+_l1_cache = TTLCache(max_size=L1_MAX_SIZE, ttl_seconds=L1_TTL_SECONDS)
+_negative_l1_cache = TTLCache(max_size=L1_MAX_SIZE, ttl_seconds=NEGATIVE_CACHE_SECONDS)
+
+
+async def _ping() -> None:
+    client = _get_client()
+    if client is None:
+        raise ConnectionError("MongoDB is not configured")
+    await client.admin.command("ping")
+
+
+_breaker = CircuitBreaker(
+    "mongodb_cache",
+    failure_threshold=BREAKER_FAILURE_THRESHOLD,
+    probe=_ping,
+    probe_interval=BREAKER_PROBE_INTERVAL_SECONDS,
+)
+
+_l1_entries = Gauge("vocab_l1_cache_entries", "Entries in the in-process L1 cache")
+_breaker_open = Gauge("vocab_mongo_breaker_open", "1 if the MongoDB cache circuit breaker is not closed")
+
+
+def _collect_cache_metrics() -> None:
+    _l1_entries.set(len(_l1_cache))
+    _breaker_open.set(0 if _breaker.state == CircuitBreaker.CLOSED else 1)
 
 
-def _get_db():
+register_collector(_collect_cache_metrics)
+
+
+def _get_client() -> Optional[AsyncIOMotorClient]:
     """
-    Lazy load db instance để tránh connection timeout khi import
+    Lazy load async MongoDB client để tránh connection timeout khi import
+    
+    Dùng cùng connection string với agent (AGNO_MONGO_URL) nhưng là client riêng
+    chạy trên event loop, không dùng pymongo client đồng bộ của agno.
     
     Returns:
-        db instance hoặc None nếu không thể kết nối
+        AsyncIOMotorClient hoặc None nếu chưa cấu hình MongoDB
     """
-    global _db_instance
-    if _db_instance is not None:
-        return _db_instance
+    global _client_instance
+    if _client_instance is not None:
+        return _client_instance
+    
+    db_url = os.getenv("AGNO_MONGO_URL", "")
+    if not db_url:
+        return None
     
     try:
-        from agno_agent import db
-        _db_instance = db
-        return db
+        _client_instance = AsyncIOMotorClient(
+            db_url,
+            serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT_MS,
+        )
+        return _client_instance
     except Exception as e:
-        print(f"Warning: Cannot import db from agno_agent: {e}")
+        print(f"Warning: Cannot create async MongoDB client: {e}")
         return None
 
 
-def _get_collection():
+def _get_collection(name: str = CACHE_COLLECTION) -> Optional[AsyncIOMotorCollection]:
     """
-    Lấy MongoDB collection từ db instance
+    Lấy MongoDB collection cache
+    
+    Args:
+        name: Tên collection (mặc định là collection cache)
     
     Returns:
-        MongoDB collection hoặc None nếu không thể truy cập
+        Async MongoDB collection hoặc None nếu không thể truy cập
+        (chưa cấu hình, hoặc circuit breaker đang mở)
     """
     try:
-        db = _get_db()
-        if db is None:
+        if not _breaker.allow_request():
             return None
-        
-        # MongoDb từ agno có db_client attribute
-        if hasattr(db, 'db_client'):
-            client = db.db_client
-            # Lấy database "vocab" từ client
-            database = client.get_database(DATABASE_NAME)
-            collection = database[CACHE_COLLECTION]
-            return collection
-        
-        # Fallback: thử các cách khác nếu db_client không có
-        if hasattr(db, 'client'):
-            client = db.client
-            if isinstance(client, pymongo.MongoClient):
-                database = client.get_database(DATABASE_NAME)
-                collection = database[CACHE_COLLECTION]
-                return collection
-        
-        # Nếu có database attribute nhưng cần database khác
-        if hasattr(db, 'database'):
-            db_instance = db.database
-            if isinstance(db_instance, pymongo.database.Database):
-                # Lấy client từ database instance và tạo database mới
-                client = db_instance.client
-                database = client.get_database(DATABASE_NAME)
-                collection = database[CACHE_COLLECTION]
-                return collection
-        
-        # Nếu có _get_collection method, có thể dùng nhưng cần chỉ định database
-        # Tuy nhiên method này có thể chỉ dùng database mặc định
-        # Nên tốt nhất là dùng db_client trực tiếp
-        
-        return None
-    except (pymongo.errors.ServerSelectionTimeoutError, 
-            pymongo.errors.NetworkTimeout,
-            ConnectionError,
-            TimeoutError) as e:
-        print(f"Warning: MongoDB connection timeout/error: {e}")
-        return None
+        client = _get_client()
+        if client is None:
+            return None
+        return client[DATABASE_NAME][name]
     except Exception as e:
         print(f"Warning: Error getting collection: {e}")
-        import traceback
-        traceback.print_exc()
         return None
 
 
@@ -93,100 +146,710 @@ def _generate_cache_key(vocab: str, language: str) -> str:
     """
     Tạo cache key từ vocab và language
     
+    Vocab và language được chuẩn hoá (NFKC, gộp khoảng trắng/"_", alias ngôn ngữ
+    -> mã BCP-47) để mọi biến thể của cùng một yêu cầu dùng chung một document.
+    
     Args:
         vocab: Từ vựng
         language: Ngôn ngữ
         
     Returns:
-        Cache key dạng: vocab_lowercase_language
+        Cache key dạng: vocab_chuẩn_hoá_mã_ngôn_ngữ (ví dụ: "abide by_vi")
     """
-    vocab_normalized = vocab.lower().strip()
-    language_normalized = language.lower().strip()
-    return f"{vocab_normalized}_{language_normalized}"
+    return cache_key(vocab, language)
 
 
-def get_cached_vocab_info(vocab: str, language: str) -> Optional[Dict[str, Any]]:
+def get_l1_stats() -> Dict[str, Any]:
     """
-    Lấy thông tin từ vựng từ cache
+    Thống kê hit/miss của L1 cache trong process
+    """
+    return _l1_cache.stats()
+
+
+def get_cache_health() -> Dict[str, Any]:
+    """
+    Trạng thái của MongoDB cache tier (circuit breaker)
+    """
+    return {
+        "configured": bool(os.getenv("AGNO_MONGO_URL", "")),
+        "breaker": _breaker.stats(),
+    }
+
+
+def encode_payload(data: Dict[str, Any]) -> bytes:
+    """
+    Serialize data thành JSON bytes chuẩn để trả thẳng cho client
+    
+    Cùng format với VocabInfoResponse.model_dump_json() (compact, không escape unicode).
+    
+    Args:
+        data: Dữ liệu đã validate (dạng JSON-compatible dict)
+        
+    Returns:
+        UTF-8 JSON bytes
+    """
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class CacheEntry:
+    """
+    Cache entry (L1 và kết quả tra MongoDB): response bytes + metadata freshness
+
+    Blob compact (xem vocab_codec) chỉ nằm trong MongoDB và được giải mã một lần
+    khi đọc lên, nên L1 hit trả thẳng payload; data được parse ở lần truy cập
+    đầu tiên rồi giữ lại.
+    """
+
+    __slots__ = ("payload", "prompt_version", "model", "fresh_until", "_data")
+
+    def __init__(
+        self,
+        payload: bytes,
+        prompt_version: Optional[str] = None,
+        model: Optional[str] = None,
+        fresh_until: Optional[datetime] = None,
+    ):
+        self.payload = payload
+        self.prompt_version = prompt_version
+        self.model = model
+        self.fresh_until = fresh_until
+        self._data: Optional[Dict[str, Any]] = None
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """
+        Dữ liệu dạng dict (parse từ payload ở lần truy cập đầu tiên)
+        """
+        if self._data is None:
+            self._data = json.loads(self.payload)
+        return self._data
+
+
+def _has_entry(cached_doc: Dict[str, Any]) -> bool:
+    return "blob" in cached_doc or "data" in cached_doc
+
+
+async def _ensure_codec_dictionary() -> None:
+    """
+    Nạp dictionary mới nhất trong MongoDB để nén entry mới (một lần mỗi process)
+
+    Chưa nạp được (MongoDB lỗi, chưa train dictionary) thì nén không dictionary,
+    blob vẫn đọc được ở mọi worker.
+    """
+    global _codec_dictionary_loaded
+    if _codec_dictionary_loaded:
+        return
+    collection = _get_collection(CODEC_DICT_COLLECTION)
+    if collection is None:
+        return
+    try:
+        dictionary_doc = await collection.find_one(
+            {},
+            sort=[("created_at", pymongo.DESCENDING)],
+            max_time_ms=QUERY_TIMEOUT_MS,
+        )
+        if dictionary_doc is not None:
+            register_dictionary(bytes(dictionary_doc["data"]), current=True)
+        _codec_dictionary_loaded = True
+    except _CONNECTION_ERRORS as e:
+        _breaker.record_failure(e)
+        print(f"Warning: MongoDB timeout when loading zstd dictionary: {e}")
+    except Exception as e:
+        # Dictionary hỏng: bỏ qua, nén không dictionary
+        print(f"Warning: Error loading zstd dictionary: {e}")
+        _codec_dictionary_loaded = True
+
+
+async def _load_dictionary(dict_id: int) -> None:
+    """
+    Nạp dictionary dict_id từ MongoDB nếu process chưa có (blob do worker khác nén)
+    """
+    if has_dictionary(dict_id):
+        return
+    collection = _get_collection(CODEC_DICT_COLLECTION)
+    if collection is None:
+        return
+    dictionary_doc = await collection.find_one({"_id": dict_id}, max_time_ms=QUERY_TIMEOUT_MS)
+    if dictionary_doc is not None:
+        register_dictionary(bytes(dictionary_doc["data"]))
+
+
+async def save_codec_dictionary(dictionary: bytes) -> int:
+    """
+    Lưu dictionary zstd vào MongoDB cho mọi worker và dùng nó để nén từ giờ
+
+    Worker khác dùng dictionary mới để nén sau khi khởi động lại; trong lúc đó
+    blob của nhau vẫn đọc được vì dictionary được nạp khi gặp.
+
+    Args:
+        dictionary: Dictionary dạng bytes (ZstdCompressionDict.as_bytes())
+
+    Returns:
+        Dictionary ID
+
+    Raises:
+        RuntimeError: Nếu MongoDB không khả dụng
+    """
+    collection = _get_collection(CODEC_DICT_COLLECTION)
+    if collection is None:
+        raise RuntimeError("MongoDB is not available, cannot store the zstd dictionary")
+    dict_id = register_dictionary(dictionary)
+    await collection.replace_one(
+        {"_id": dict_id},
+        {"_id": dict_id, "data": dictionary, "created_at": datetime.utcnow()},
+        upsert=True,
+    )
+    register_dictionary(dictionary, current=True)
+    return dict_id
+
+
+async def _entry_from_doc(cached_doc: Dict[str, Any]) -> Optional[CacheEntry]:
+    """
+    Giải mã document MongoDB thành CacheEntry
+
+    Returns:
+        CacheEntry, None nếu không giải mã được (blob hỏng, dictionary không còn):
+        caller coi như cache miss để generate lại
+    """
+    try:
+        if "blob" in cached_doc:
+            blob = bytes(cached_doc["blob"])
+            payload_format = cached_doc.get("payload_format", PAYLOAD_FORMAT_ZSTD)
+            if payload_format == PAYLOAD_FORMAT_ZSTD:
+                await _load_dictionary(blob_dict_id(blob))
+            payload = decode_blob(blob, payload_format)
+        else:
+            # Document cũ chưa compact
+            payload = cached_doc.get("payload") or encode_payload(cached_doc["data"])
+    except (ValueError, KeyError) as e:
+        print(f"Warning: Cannot decode cache entry {cached_doc.get('_id')}: {e}")
+        return None
+    return CacheEntry(
+        bytes(payload),
+        prompt_version=cached_doc.get("prompt_version"),
+        model=cached_doc.get("model"),
+        fresh_until=cached_doc.get("fresh_until"),
+    )
+
+
+def _lookup_keys(vocab: str, language: str) -> List[str]:
+    """
+    Các _id cần tra trong MongoDB: key chuẩn hoá, và key cũ nếu khác (LEGACY_KEY_FALLBACK)
+    """
+    key = _generate_cache_key(vocab, language)
+    if not LEGACY_KEY_FALLBACK:
+        return [key]
+    legacy_key = legacy_cache_key(vocab, language)
+    return [key] if legacy_key == key else [key, legacy_key]
+
+
+def _pick_doc(docs_by_id: Dict[str, Dict[str, Any]], keys: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Document dùng cho một key: entry thường trước (key chuẩn hoá trước key cũ),
+    sau đó tới negative entry của key chuẩn hoá
+    """
+    for key in keys:
+        cached_doc = docs_by_id.get(key)
+        if cached_doc is not None and _has_entry(cached_doc):
+            return cached_doc
+    return docs_by_id.get(keys[0])
+
+
+def _remember_negative(cache_key: str, cached_doc: Dict[str, Any]) -> None:
+    """
+    Đưa negative entry còn hạn của document MongoDB vào L1
+    """
+    negative = cached_doc.get("negative")
+    if negative and negative.get("expires_at") and negative["expires_at"] > datetime.utcnow():
+        _negative_l1_cache.set(cache_key, negative)
+
+
+def _get_negative_l1(cache_key: str) -> Optional[Dict[str, Any]]:
+    negative = _negative_l1_cache.get(cache_key)
+    if negative is None:
+        return None
+    # L1 có TTL cố định, entry nạp từ MongoDB có thể hết hạn sớm hơn
+    if negative["expires_at"] <= datetime.utcnow():
+        _negative_l1_cache.delete(cache_key)
+        return None
+    return negative
+
+
+def get_negative_cache_entry(vocab: str, language: str) -> Optional[Dict[str, Any]]:
+    """
+    Lấy negative entry còn hạn của từ vựng (chỉ tra L1, không round trip)
+    
+    Negative entry trong MongoDB được nạp vào L1 khi get_cached_vocab_entry
+    đọc document, nên lần tra tiếp theo trong process thấy được.
+    
+    Args:
+        vocab: Từ vựng
+        language: Ngôn ngữ
+        
+    Returns:
+        Dict {reason, detail, expires_at} nếu có, None nếu không
+    """
+    negative = _get_negative_l1(_generate_cache_key(vocab, language))
+    if negative is not None:
+        CACHE_REQUESTS.inc(tier="negative", result="hit")
+        annotate_request(cache="negative")
+    return negative
+
+
+def is_entry_stale(entry: CacheEntry, prompt_version: str, model: str) -> bool:
+    """
+    Kiểm tra cache entry có cần generate lại không
+    
+    Entry stale khi được generate bằng prompt version/model khác hiện tại,
+    hoặc đã quá fresh_until. Entry cũ chưa có metadata được coi là fresh
+    (prompt version = LEGACY_PROMPT_VERSION, không có model/fresh_until) cho tới
+    khi prompt version được tăng, để cả cache cũ không bị generate lại khi deploy.
+    
+    Args:
+        entry: Cache entry (từ get_cached_vocab_entry)
+        prompt_version: Prompt version hiện tại
+        model: Model hiện tại
+        
+    Returns:
+        True nếu entry nên được refresh
+    """
+    if (entry.prompt_version or LEGACY_PROMPT_VERSION) != prompt_version:
+        return True
+    if entry.model is not None and entry.model != model:
+        return True
+    return entry.fresh_until is not None and entry.fresh_until <= datetime.utcnow()
+
+
+async def get_cached_vocab_entry(vocab: str, language: str) -> Optional[CacheEntry]:
+    """
+    Lấy cache entry (payload compact + metadata freshness) của từ vựng
+    
+    Tra L1 (trong process) trước, nếu miss thì tra MongoDB (L2) và fill lại L1.
+    Document lưu bằng key cũ (trước khi chuẩn hoá) cũng được đọc, xem LEGACY_KEY_FALLBACK.
     
     Args:
         vocab: Từ vựng cần tra cứu
         language: Ngôn ngữ
         
     Returns:
-        Cached data nếu tồn tại, None nếu không
+        CacheEntry nếu tồn tại, None nếu không
     """
+    cache_key = _generate_cache_key(vocab, language)
+    cached_entry = _l1_cache.get(cache_key)
+    if cached_entry is not None:
+        CACHE_REQUESTS.inc(tier="l1", result="hit")
+        annotate_request(cache="l1")
+        return cached_entry
+    CACHE_REQUESTS.inc(tier="l1", result="miss")
+    if _get_negative_l1(cache_key) is not None:
+        # Đã biết là không generate được: không cần tra MongoDB
+        return None
+    
     try:
         collection = _get_collection()
         if collection is None:
+            CACHE_REQUESTS.inc(tier="mongo", result="skipped")
+            annotate_request(cache="miss")
             return None
             
-        cache_key = _generate_cache_key(vocab, language)
         # Set timeout ngắn để tránh block quá lâu
-        cached_doc = collection.find_one({"_id": cache_key}, max_time_ms=5000)
+        keys = _lookup_keys(vocab, language)
+        with STAGE_SECONDS.time(stage="mongo_lookup"):
+            if len(keys) == 1:
+                cached_doc = await collection.find_one(
+                    {"_id": cache_key},
+                    _LOOKUP_PROJECTION,
+                    max_time_ms=QUERY_TIMEOUT_MS,
+                )
+            else:
+                cursor = collection.find(
+                    {"_id": {"$in": keys}},
+                    _LOOKUP_PROJECTION,
+                    max_time_ms=QUERY_TIMEOUT_MS,
+                )
+                cached_doc = _pick_doc({doc["_id"]: doc async for doc in cursor}, keys)
+        _breaker.record_success()
         
-        if cached_doc and "data" in cached_doc:
-            return cached_doc["data"]
+        if cached_doc and _has_entry(cached_doc):
+            cached_entry = await _entry_from_doc(cached_doc)
+            if cached_entry is not None:
+                CACHE_REQUESTS.inc(tier="mongo", result="hit")
+                annotate_request(cache="mongo")
+                _l1_cache.set(cache_key, cached_entry)
+                return cached_entry
+        elif cached_doc:
+            _remember_negative(cache_key, cached_doc)
         
+        CACHE_REQUESTS.inc(tier="mongo", result="miss")
+        annotate_request(cache="miss")
         return None
-    except (pymongo.errors.ServerSelectionTimeoutError,
-            pymongo.errors.NetworkTimeout,
-            ConnectionError,
-            TimeoutError) as e:
+    except _CONNECTION_ERRORS as e:
+        _breaker.record_failure(e)
+        CACHE_REQUESTS.inc(tier="mongo", result="error")
+        annotate_request(cache="error")
         # Nếu có lỗi timeout, log và trả về None để fallback sang LLM
         print(f"Warning: MongoDB timeout when getting cache: {e}")
         return None
     except Exception as e:
+        CACHE_REQUESTS.inc(tier="mongo", result="error")
+        annotate_request(cache="error")
         # Nếu có lỗi khi query cache, log và trả về None để fallback sang LLM
         print(f"Warning: Error getting cache: {e}")
         return None
 
 
-def save_vocab_info_to_cache(vocab: str, language: str, data: Dict[str, Any]) -> None:
+async def get_cached_vocab_info(vocab: str, language: str) -> Optional[Dict[str, Any]]:
+    """
+    Lấy thông tin từ vựng từ cache
+    
+    Args:
+        vocab: Từ vựng cần tra cứu
+        language: Ngôn ngữ
+        
+    Returns:
+        Cached data nếu tồn tại, None nếu không
+    """
+    cached_entry = await get_cached_vocab_entry(vocab, language)
+    return cached_entry.data if cached_entry else None
+
+
+async def get_cached_vocab_entries_many(vocabs: List[str], language: str) -> Dict[str, CacheEntry]:
+    """
+    Lấy cache entry của nhiều từ vựng
+    
+    Tra L1 trước, các key còn lại được lấy bằng một query $in duy nhất vào MongoDB.
+    
+    Args:
+        vocabs: Danh sách từ vựng
+        language: Ngôn ngữ
+        
+    Returns:
+        Dict từ vựng (như trong input) -> cache entry, chỉ chứa các từ có cache
+    """
+    keys_by_vocab = {vocab: _generate_cache_key(vocab, language) for vocab in vocabs}
+    lookup_keys = {key: _lookup_keys(vocab, language) for vocab, key in keys_by_vocab.items()}
+    entry_by_key: Dict[str, CacheEntry] = {}
+    for cache_key in set(keys_by_vocab.values()):
+        cached_entry = _l1_cache.get(cache_key)
+        if cached_entry is not None:
+            entry_by_key[cache_key] = cached_entry
+    
+    missing_keys = [key for key in set(keys_by_vocab.values()) if key not in entry_by_key]
+    CACHE_REQUESTS.inc(len(entry_by_key), tier="l1", result="hit")
+    CACHE_REQUESTS.inc(len(missing_keys), tier="l1", result="miss")
+    if missing_keys:
+        try:
+            collection = _get_collection()
+            if collection is None:
+                CACHE_REQUESTS.inc(len(missing_keys), tier="mongo", result="skipped")
+            else:
+                l1_hits = len(entry_by_key)
+                query_ids = list({lookup_key for key in missing_keys for lookup_key in lookup_keys[key]})
+                with STAGE_SECONDS.time(stage="mongo_lookup"):
+                    cursor = collection.find(
+                        {"_id": {"$in": query_ids}},
+                        _LOOKUP_PROJECTION,
+                        max_time_ms=QUERY_TIMEOUT_MS,
+                    )
+                    docs_by_id = {cached_doc["_id"]: cached_doc async for cached_doc in cursor}
+                _breaker.record_success()
+                for key in missing_keys:
+                    cached_doc = _pick_doc(docs_by_id, lookup_keys[key])
+                    if cached_doc is None:
+                        continue
+                    if _has_entry(cached_doc):
+                        cached_entry = await _entry_from_doc(cached_doc)
+                        if cached_entry is not None:
+                            _l1_cache.set(key, cached_entry)
+                            entry_by_key[key] = cached_entry
+                    else:
+                        _remember_negative(key, cached_doc)
+                mongo_hits = len(entry_by_key) - l1_hits
+                CACHE_REQUESTS.inc(mongo_hits, tier="mongo", result="hit")
+                CACHE_REQUESTS.inc(len(missing_keys) - mongo_hits, tier="mongo", result="miss")
+        except _CONNECTION_ERRORS as e:
+            _breaker.record_failure(e)
+            CACHE_REQUESTS.inc(len(missing_keys), tier="mongo", result="error")
+            print(f"Warning: MongoDB timeout when getting cache batch: {e}")
+        except Exception as e:
+            CACHE_REQUESTS.inc(len(missing_keys), tier="mongo", result="error")
+            print(f"Warning: Error getting cache batch: {e}")
+    
+    return {
+        vocab: entry_by_key[cache_key]
+        for vocab, cache_key in keys_by_vocab.items()
+        if cache_key in entry_by_key
+    }
+
+
+async def get_cached_vocabs(limit: int = 50000) -> List[str]:
+    """
+    Lấy danh sách từ vựng đã có trong cache (mọi ngôn ngữ, không trùng)
+
+    Args:
+        limit: Số document tối đa được đọc
+
+    Returns:
+        List từ vựng (như lúc lưu), rỗng nếu MongoDB không khả dụng
+    """
+    vocabs: Dict[str, None] = {}
+    try:
+        collection = _get_collection()
+        if collection is None:
+            return []
+        cursor = collection.find(
+            {"negative": {"$exists": False}},
+            {"_id": 0, "vocab": 1},
+            max_time_ms=QUERY_TIMEOUT_MS,
+        ).limit(limit)
+        async for cached_doc in cursor:
+            if cached_doc.get("vocab"):
+                vocabs[cached_doc["vocab"]] = None
+        _breaker.record_success()
+    except _CONNECTION_ERRORS as e:
+        _breaker.record_failure(e)
+        print(f"Warning: MongoDB timeout when listing cached vocabs: {e}")
+    except Exception as e:
+        print(f"Warning: Error listing cached vocabs: {e}")
+    return list(vocabs)
+
+
+async def get_cached_vocab_info_many(vocabs: List[str], language: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Lấy thông tin nhiều từ vựng từ cache
+    
+    Args:
+        vocabs: Danh sách từ vựng
+        language: Ngôn ngữ
+        
+    Returns:
+        Dict từ vựng (như trong input) -> cached data, chỉ chứa các từ có cache
+    """
+    entries = await get_cached_vocab_entries_many(vocabs, language)
+    return {vocab: entry.data for vocab, entry in entries.items()}
+
+
+async def _ensure_indexes(collection: AsyncIOMotorCollection) -> None:
+    """
+    Tạo TTL index cho expires_at (một lần mỗi process)
+    
+    Document không có expires_at (cache cũ) không bị TTL index xoá.
+    """
+    global _indexes_ensured
+    if _indexes_ensured:
+        return
+    try:
+        await collection.create_index("expires_at", expireAfterSeconds=0)
+    except pymongo.errors.OperationFailure as e:
+        # Ví dụ: user không có quyền createIndex, vẫn lưu cache bình thường
+        print(f"Warning: Cannot create TTL index on {CACHE_COLLECTION}: {e}")
+    _indexes_ensured = True
+
+
+async def save_vocab_info_to_cache(
+    vocab: str,
+    language: str,
+    data: Dict[str, Any],
+    prompt_version: Optional[str] = None,
+    model: Optional[str] = None,
+) -> None:
     """
     Lưu thông tin từ vựng vào cache
     
+    Dùng một upsert duy nhất (atomic, một round trip): created_at chỉ được
+    set khi insert nhờ $setOnInsert. Mỗi lần lưu đặt lại fresh_until và
+    expires_at (hard expire qua TTL index) và xoá negative entry cũ nếu có.
+    L1 giữ JSON bytes của data để cache hit trả thẳng cho client; MongoDB
+    chỉ lưu bản mã hoá compact (blob, xem vocab_codec), field data/payload
+    của document cũ bị xoá.
+    
     Args:
         vocab: Từ vựng
         language: Ngôn ngữ
         data: Dữ liệu cần cache (full response data)
+        prompt_version: Version của prompt đã dùng để generate
+        model: Model đã dùng để generate
     """
+    cache_key = _generate_cache_key(vocab, language)
+    now = datetime.utcnow()
+    freshness = {
+        "prompt_version": prompt_version,
+        "model": model,
+        "fresh_until": now + timedelta(seconds=CACHE_FRESH_SECONDS),
+    }
+    payload = encode_payload(data)
+    _l1_cache.set(cache_key, CacheEntry(payload, **freshness))
+    _negative_l1_cache.delete(cache_key)
+    
     try:
         collection = _get_collection()
         if collection is None:
             return
         
-        cache_key = _generate_cache_key(vocab, language)
-        now = datetime.utcnow()
+        await _ensure_indexes(collection)
+        await _ensure_codec_dictionary()
         
+        blob, payload_format = encode_blob(payload)
         document = {
-            "_id": cache_key,
             "vocab": vocab,
             "language": language,
-            "data": data,
-            "updated_at": now
+            "blob": blob,
+            "payload_format": payload_format,
+            "updated_at": now,
+            **freshness,
         }
+        # expires_at ngắn của negative entry (nếu có) không được giữ lại
+        unset = {"negative": "", "data": "", "payload": ""}
+        if CACHE_EXPIRE_SECONDS > 0:
+            document["expires_at"] = now + timedelta(seconds=CACHE_EXPIRE_SECONDS)
+        else:
+            unset["expires_at"] = ""
         
-        # Kiểm tra xem document đã tồn tại chưa với timeout ngắn
-        existing = collection.find_one({"_id": cache_key}, max_time_ms=5000)
-        if existing:
-            # Update existing document
-            document["created_at"] = existing.get("created_at", now)
-            collection.update_one(
+        with STAGE_SECONDS.time(stage="cache_save"):
+            await collection.update_one(
                 {"_id": cache_key},
-                {"$set": document}
+                {
+                    "$set": document,
+                    "$unset": unset,
+                    "$setOnInsert": {"created_at": now},
+                },
+                upsert=True,
             )
-        else:
-            # Insert new document
-            document["created_at"] = now
-            collection.insert_one(document)
+        _breaker.record_success()
             
-    except (pymongo.errors.ServerSelectionTimeoutError,
-            pymongo.errors.NetworkTimeout,
-            ConnectionError,
-            TimeoutError) as e:
+    except _CONNECTION_ERRORS as e:
+        _breaker.record_failure(e)
         # Nếu có lỗi timeout, log nhưng không throw để không ảnh hưởng đến response
         print(f"Warning: MongoDB timeout when saving cache: {e}")
     except Exception as e:
         # Nếu có lỗi khi save cache, log nhưng không throw để không ảnh hưởng đến response
         print(f"Warning: Error saving cache: {e}")
+
+
+async def save_negative_cache_entry(
+    vocab: str,
+    language: str,
+    reason: str,
+    detail: str,
+    persist: bool = True,
+) -> None:
+    """
+    Ghi nhớ từ vựng không generate được trong NEGATIVE_CACHE_SECONDS
+    
+    Negative entry được lưu vào chính document cache của key với expires_at
+    ngắn (TTL index tự xoá), chỉ khi key chưa có entry thường: upsert với
+    filter blob/data không tồn tại sẽ gặp DuplicateKeyError nếu đã có.
+    
+    Args:
+        vocab: Từ vựng
+        language: Ngôn ngữ
+        reason: Loại lỗi (parse_error, validation_error, rejected_input)
+        detail: Mô tả lỗi trả cho client
+        persist: False để chỉ lưu L1 (lỗi tính lại được rẻ, không cần ghi MongoDB)
+    """
+    cache_key = _generate_cache_key(vocab, language)
+    now = datetime.utcnow()
+    negative = {
+        "reason": reason,
+        "detail": detail,
+        "expires_at": now + timedelta(seconds=NEGATIVE_CACHE_SECONDS),
+    }
+    _negative_l1_cache.set(cache_key, negative)
+    if not persist:
+        return
+    
+    try:
+        collection = _get_collection()
+        if collection is None:
+            return
+        
+        await _ensure_indexes(collection)
+        
+        try:
+            await collection.update_one(
+                {"_id": cache_key, "blob": {"$exists": False}, "data": {"$exists": False}},
+                {
+                    "$set": {
+                        "vocab": vocab,
+                        "language": language,
+                        "negative": negative,
+                        "updated_at": now,
+                        "expires_at": negative["expires_at"],
+                    },
+                    "$setOnInsert": {"created_at": now},
+                },
+                upsert=True,
+            )
+        except pymongo.errors.DuplicateKeyError:
+            # Key đã có entry thường (ví dụ worker khác vừa generate xong): giữ nguyên
+            pass
+        _breaker.record_success()
+    except _CONNECTION_ERRORS as e:
+        _breaker.record_failure(e)
+        print(f"Warning: MongoDB timeout when saving negative cache: {e}")
+    except Exception as e:
+        print(f"Warning: Error saving negative cache: {e}")
+
+
+async def acquire_generation_lease(vocab: str, language: str, owner: str, ttl_seconds: float) -> bool:
+    """
+    Giành quyền generate một key giữa các worker bằng lease document trong MongoDB
+    
+    Lease là document {_id: cache_key, owner, expires_at}. Insert thành công hoặc
+    chiếm được lease đã hết hạn nghĩa là worker này được generate.
+    
+    Args:
+        vocab: Từ vựng
+        language: Ngôn ngữ
+        owner: ID duy nhất của worker/lần generate
+        ttl_seconds: Thời gian giữ lease (giây)
+        
+    Returns:
+        True nếu giành được lease (hoặc không có MongoDB), False nếu worker khác đang giữ
+    """
+    try:
+        collection = _get_collection(LEASE_COLLECTION)
+        if collection is None:
+            return True
+        
+        cache_key = _generate_cache_key(vocab, language)
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        try:
+            await collection.insert_one({"_id": cache_key, "owner": owner, "expires_at": expires_at})
+            return True
+        except pymongo.errors.DuplicateKeyError:
+            # Chiếm lại lease nếu lease cũ đã hết hạn (worker trước bị chết)
+            result = await collection.update_one(
+                {"_id": cache_key, "expires_at": {"$lt": now}},
+                {"$set": {"owner": owner, "expires_at": expires_at}},
+            )
+            return result.modified_count == 1
+    except Exception as e:
+        # Lease chỉ là tối ưu, lỗi thì để worker này tự generate
+        if isinstance(e, _CONNECTION_ERRORS):
+            _breaker.record_failure(e)
+        print(f"Warning: Error acquiring generation lease: {e}")
+        return True
+
+
+async def release_generation_lease(vocab: str, language: str, owner: str) -> None:
+    """
+    Trả lease đã giành được bởi acquire_generation_lease
+    
+    Args:
+        vocab: Từ vựng
+        language: Ngôn ngữ
+        owner: ID đã dùng khi acquire
+    """
+    try:
+        collection = _get_collection(LEASE_COLLECTION)
+        if collection is None:
+            return
+        
+        cache_key = _generate_cache_key(vocab, language)
+        await collection.delete_one({"_id": cache_key, "owner": owner})
+    except Exception as e:
+        if isinstance(e, _CONNECTION_ERRORS):
+            _breaker.record_failure(e)
+        print(f"Warning: Error releasing generation lease: {e}")
@@ -0,0 +1,153 @@
+"""
+Định dạng lưu trữ compact cho payload vocab info trong cache MongoDB
+
+Document cũ lưu cùng một nội dung hai lần: `data` (dict, tên field lặp lại trong
+BSON) và `payload` (JSON bytes). Định dạng mới chỉ lưu `blob` + `payload_format`:
+
+- PAYLOAD_FORMAT_JSON (0): blob là JSON bytes (payload) nguyên bản
+- PAYLOAD_FORMAT_ZSTD (1): blob là JSON bytes nén zstd, có thể kèm dictionary
+  đã train trên các payload thật (dictionary ID nằm trong frame header, nên
+  blob nén bằng dictionary cũ vẫn đọc được sau khi train dictionary mới)
+
+Dictionary được lưu trong MongoDB (vocab_cache) để mọi worker dùng chung và
+nạp vào process qua register_dictionary.
+
+Nén thẳng JSON bytes thay vì chuyển sang msgpack: cache hit chỉ cần một lần
+decompress là ra response bytes, tên field lặp lại do dictionary hấp thụ.
+"""
+import os
+from typing import Dict, List, Optional, Tuple
+
+import zstandard
+
+# Nén payload bằng zstd (tắt thì lưu JSON bytes nguyên bản)
+COMPRESSION_ENABLED = os.getenv("VOCAB_CACHE_COMPRESSION", "true").lower() in ("1", "true", "yes")
+COMPRESSION_LEVEL = int(os.getenv("VOCAB_CACHE_COMPRESSION_LEVEL", "3"))
+
+PAYLOAD_FORMAT_JSON = 0
+PAYLOAD_FORMAT_ZSTD = 1
+
+# Dictionary đã nạp trong process (nguồn chung là MongoDB, xem vocab_cache)
+_dictionaries: Dict[int, zstandard.ZstdCompressionDict] = {}
+_current_dict_id = 0
+_compressor: Optional[zstandard.ZstdCompressor] = None
+_decompressors: Dict[int, zstandard.ZstdDecompressor] = {}
+
+
+def register_dictionary(data: bytes, current: bool = False) -> int:
+    """
+    Nạp dictionary vào process
+
+    Args:
+        data: Dictionary dạng bytes (ZstdCompressionDict.as_bytes())
+        current: Dùng dictionary này để nén từ giờ
+
+    Returns:
+        Dictionary ID
+    """
+    global _current_dict_id, _compressor
+    dictionary = zstandard.ZstdCompressionDict(data)
+    dict_id = dictionary.dict_id()
+    _dictionaries[dict_id] = dictionary
+    if current and dict_id != _current_dict_id:
+        _current_dict_id = dict_id
+        _compressor = None
+    return dict_id
+
+
+def has_dictionary(dict_id: int) -> bool:
+    """
+    Dictionary đã được nạp chưa (0 = không dùng dictionary, luôn có)
+    """
+    return not dict_id or dict_id in _dictionaries
+
+
+def current_dict_id() -> int:
+    """
+    ID của dictionary dùng để nén (0 = nén không dictionary)
+    """
+    return _current_dict_id
+
+
+def _get_compressor() -> zstandard.ZstdCompressor:
+    global _compressor
+    if _compressor is None:
+        dictionary = _dictionaries.get(_current_dict_id)
+        _compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL, dict_data=dictionary)
+    return _compressor
+
+
+def _get_decompressor(dict_id: int) -> zstandard.ZstdDecompressor:
+    decompressor = _decompressors.get(dict_id)
+    if decompressor is None:
+        dictionary = None
+        if dict_id:
+            dictionary = _dictionaries.get(dict_id)
+            if dictionary is None:
+                raise ValueError(f"Missing zstd dictionary {dict_id}")
+        decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+        _decompressors[dict_id] = decompressor
+    return decompressor
+
+
+def blob_dict_id(blob: bytes) -> int:
+    """
+    ID của dictionary đã dùng để nén blob (0 nếu không dùng dictionary)
+    """
+    try:
+        return zstandard.get_frame_parameters(blob).dict_id
+    except zstandard.ZstdError as e:
+        raise ValueError(f"Invalid zstd frame: {e}") from e
+
+
+def encode_blob(payload: bytes) -> Tuple[bytes, int]:
+    """
+    Mã hoá JSON payload thành blob để lưu cache
+
+    Args:
+        payload: UTF-8 JSON bytes (từ encode_payload)
+
+    Returns:
+        Tuple (blob, payload_format)
+    """
+    if not COMPRESSION_ENABLED:
+        return payload, PAYLOAD_FORMAT_JSON
+    return _get_compressor().compress(payload), PAYLOAD_FORMAT_ZSTD
+
+
+def decode_blob(blob: bytes, payload_format: int) -> bytes:
+    """
+    Giải mã blob về JSON payload (response bytes)
+
+    Args:
+        blob: Blob đã lưu
+        payload_format: PAYLOAD_FORMAT_JSON hoặc PAYLOAD_FORMAT_ZSTD
+
+    Returns:
+        UTF-8 JSON bytes
+
+    Raises:
+        ValueError: Nếu format không hỗ trợ, thiếu dictionary hoặc blob hỏng
+    """
+    if payload_format == PAYLOAD_FORMAT_JSON:
+        return blob
+    if payload_format == PAYLOAD_FORMAT_ZSTD:
+        try:
+            return _get_decompressor(blob_dict_id(blob)).decompress(blob)
+        except zstandard.ZstdError as e:
+            raise ValueError(f"Cannot decompress cached payload: {e}") from e
+    raise ValueError(f"Unsupported payload format: {payload_format}")
+
+
+def train_dictionary(payloads: List[bytes], size: int = 16384) -> zstandard.ZstdCompressionDict:
+    """
+    Train dictionary zstd từ các payload mẫu
+
+    Args:
+        payloads: JSON payload mẫu (nên là vài nghìn entry thật, nhiều ngôn ngữ)
+        size: Kích thước dictionary (bytes)
+
+    Returns:
+        Dictionary đã train
+    """
+    return zstandard.train_dictionary(size, payloads, level=COMPRESSION_LEVEL)
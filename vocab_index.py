@@ -0,0 +1,352 @@
+"""
+Index tra cứu từ vựng trong bộ nhớ: prefix (autocomplete) và fuzzy (sửa lỗi chính tả)
+
+- Prefix: danh sách key đã sort (sort một lần sau khi nạp, không insort từng key) + bisect
+- Fuzzy: SymSpell-style trên prefix_length ký tự đầu của key: mỗi prefix khác nhau
+  sinh các "delete" (bỏ bớt tối đa max_distance ký tự) một lần, delete -> prefix,
+  prefix -> các key gốc (nhiều key chung prefix không nhân bản delete);
+  ứng viên được kiểm tra lại bằng khoảng cách Damerau-Levenshtein (OSA)
+"""
+import bisect
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sound_words import normalize_sound_key
+
+# Ký tự hợp lệ trong key từ vựng ngoài chữ cái/chữ số ("_" là khoảng trắng đã chuẩn hoá,
+# "+#&/" cho các từ như "C++", "C#", "AT&T", "and/or")
+_WORD_PUNCTUATION = "_-'.+#&/"
+_LATIN_VOWELS = set("aeiouy")
+# Từ thật không có nguyên âm dài tối đa 6 chữ cái ("tsktsk", "crwths")
+_MAX_VOWELLESS_LETTERS = 6
+# Dấu hiệu gõ bừa: >= 4 ký tự giống nhau liên tiếp ("zzz", "brrr" vẫn hợp lệ), >= 7 phụ âm Latin liên tiếp
+_REPEATED_CHAR_RE = re.compile(r"(.)\1{3}")
+_CONSONANT_RUN_RE = re.compile(r"[b-df-hj-np-tv-xz]{7,}")
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Khoảng cách Damerau-Levenshtein (optimal string alignment) có early cutoff
+
+    Phần đầu/cuối chung bị bỏ qua trước khi tính (ứng viên từ index thường
+    chung prefix với query), phần còn lại chỉ tính trong dải max_distance
+    quanh đường chéo của bảng quy hoạch động.
+
+    Returns:
+        Khoảng cách, hoặc max_distance + 1 nếu vượt quá max_distance
+    """
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    start = 0
+    shortest = min(len(a), len(b))
+    while start < shortest and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < shortest - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a = a[start:len(a) - end]
+    b = b[start:len(b) - end]
+    if not a or not b:
+        distance = len(a) + len(b)
+        return distance if distance <= max_distance else max_distance + 1
+
+    # Chỉ tính các ô trong dải |i - j| <= max_distance, ô ngoài dải coi như vượt ngưỡng
+    outside = max_distance + 1
+    previous_previous: Optional[List[int]] = None
+    previous = [j if j <= max_distance else outside for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [outside] * (len(b) + 1)
+        if i <= max_distance:
+            current[0] = i
+        row_min = current[0]
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (
+                previous_previous is not None
+                and j > 1
+                and a[i - 1] == b[j - 2]
+                and a[i - 2] == b[j - 1]
+            ):
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    distance = previous[len(b)]
+    return distance if distance <= max_distance else max_distance + 1
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """
+    Tất cả chuỗi tạo ra bằng cách xoá tối đa max_distance ký tự khỏi word
+    """
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for item in frontier:
+            for i in range(len(item)):
+                deleted = item[:i] + item[i + 1:]
+                if deleted not in result:
+                    next_frontier.add(deleted)
+        result |= next_frontier
+        frontier = next_frontier
+    return result
+
+
+class VocabIndex:
+    """
+    Index prefix + fuzzy cho các từ vựng đã biết
+
+    Key được chuẩn hoá bằng normalize_sound_key ("Abide by" -> "abide_by"),
+    mỗi key giữ lại một dạng hiển thị (dạng được thêm vào đầu tiên).
+
+    Args:
+        max_distance: Khoảng cách chỉnh sửa tối đa cho fuzzy lookup
+        prefix_length: Số ký tự đầu dùng để sinh deletes (giới hạn bộ nhớ)
+    """
+
+    def __init__(self, max_distance: int = 2, prefix_length: int = 7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._display: Dict[str, str] = {}
+        self._sorted_keys: List[str] = []
+        self._sorted = True
+        # prefix -> key (str) hoặc các key (list) chung prefix
+        self._prefixes: Dict[str, object] = {}
+        # delete -> prefix (str) hoặc các prefix (set) sinh ra delete đó
+        self._deletes: Dict[str, object] = {}
+
+    def __len__(self) -> int:
+        return len(self._display)
+
+    def __contains__(self, vocab: str) -> bool:
+        return normalize_sound_key(vocab) in self._display
+
+    def add(self, vocab: str) -> None:
+        """
+        Thêm một từ vựng vào index (bỏ qua nếu đã có)
+        """
+        key = normalize_sound_key(vocab)
+        if not key or key in self._display:
+            return
+        self._display[key] = vocab.strip().replace("_", " ")
+        self._sorted_keys.append(key)
+        self._sorted = False
+
+        prefix = key[:self.prefix_length]
+        existing = self._prefixes.get(prefix)
+        if existing is not None:
+            # Delete của prefix đã được sinh khi thêm key đầu tiên
+            if isinstance(existing, list):
+                existing.append(key)
+            else:
+                self._prefixes[prefix] = [existing, key]
+            return
+        self._prefixes[prefix] = key
+        for deleted in _deletes(prefix, self.max_distance):
+            # Phần lớn delete chỉ thuộc một prefix: lưu str, chỉ chuyển sang set khi trùng
+            found = self._deletes.get(deleted)
+            if found is None:
+                self._deletes[deleted] = prefix
+            elif isinstance(found, set):
+                found.add(prefix)
+            elif found != prefix:
+                self._deletes[deleted] = {found, prefix}
+
+    def add_many(self, vocabs: Iterable[str]) -> None:
+        for vocab in vocabs:
+            self.add(vocab)
+        self._ensure_sorted()
+
+    def _ensure_sorted(self) -> None:
+        if not self._sorted:
+            self._sorted_keys.sort()
+            self._sorted = True
+
+    def display(self, key: str) -> str:
+        """
+        Dạng hiển thị của key đã chuẩn hoá
+        """
+        return self._display[key]
+
+    def prefix(self, query: str, limit: int = 10) -> List[str]:
+        """
+        Các key bắt đầu bằng query (ưu tiên key ngắn hơn)
+
+        Returns:
+            List key đã chuẩn hoá
+        """
+        prefix = normalize_sound_key(query)
+        if not prefix:
+            return []
+        self._ensure_sorted()
+        start = bisect.bisect_left(self._sorted_keys, prefix)
+        # Lấy dư để sort theo độ dài, nhưng không duyệt cả index với prefix ngắn
+        matches = []
+        for key in self._sorted_keys[start:start + limit * 5]:
+            if not key.startswith(prefix):
+                break
+            matches.append(key)
+        matches.sort(key=lambda key: (len(key), key))
+        return matches[:limit]
+
+    def lookup(self, query: str, max_distance: Optional[int] = None, limit: int = 10) -> List[Tuple[str, int]]:
+        """
+        Các key gần với query theo khoảng cách chỉnh sửa
+
+        Args:
+            query: Từ cần tìm (có thể sai chính tả)
+            max_distance: Khoảng cách tối đa (mặc định của index)
+            limit: Số kết quả tối đa
+
+        Returns:
+            List (key, distance), sort theo distance rồi theo key
+        """
+        key = normalize_sound_key(query)
+        if not key:
+            return []
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        if key in self._display:
+            exact = [(key, 0)]
+            if max_distance == 0:
+                return exact
+        else:
+            exact = []
+
+        prefixes: Set[str] = set()
+        for deleted in _deletes(key[:self.prefix_length], max_distance):
+            found = self._deletes.get(deleted)
+            if found is None:
+                continue
+            if isinstance(found, set):
+                prefixes |= found
+            else:
+                prefixes.add(found)
+        candidates: Set[str] = set()
+        for prefix in prefixes:
+            keys = self._prefixes[prefix]
+            if isinstance(keys, list):
+                candidates.update(keys)
+            else:
+                candidates.add(keys)
+        candidates.discard(key)
+
+        results = exact
+        # Đã đủ limit kết quả gần hơn max_distance thì hạ ngưỡng cho các ứng viên còn lại
+        counts = [0] * (max_distance + 1)
+        counts[0] = len(exact)
+        for candidate in candidates:
+            distance = edit_distance(key, candidate, max_distance)
+            if distance > max_distance:
+                continue
+            results.append((candidate, distance))
+            counts[distance] += 1
+            while max_distance > 0 and sum(counts[:max_distance]) >= limit:
+                max_distance -= 1
+        results = [item for item in results if item[1] <= max_distance]
+        results.sort(key=lambda item: (item[1], item[0]))
+        return results[:limit]
+
+    def suggest(self, query: str, limit: int = 10) -> List[Tuple[str, int, str]]:
+        """
+        Gợi ý cho autocomplete: prefix match trước, sau đó là fuzzy match
+
+        Returns:
+            List (key, distance, kind) với kind là "exact", "prefix" hoặc "fuzzy"
+        """
+        suggestions: List[Tuple[str, int, str]] = []
+        seen: Set[str] = set()
+        fuzzy = self.lookup(query, limit=limit)
+        for key, distance in fuzzy:
+            if distance == 0:
+                suggestions.append((key, 0, "exact"))
+                seen.add(key)
+        for key in self.prefix(query, limit=limit):
+            if key not in seen:
+                suggestions.append((key, 0, "prefix"))
+                seen.add(key)
+        for key, distance in fuzzy:
+            if key not in seen:
+                suggestions.append((key, distance, "fuzzy"))
+                seen.add(key)
+        return suggestions[:limit]
+
+    def canonicalize(self, query: str) -> Optional[str]:
+        """
+        Dạng hiển thị của từ đã biết mà query nhiều khả năng là lỗi chính tả/biến thể
+
+        Thận trọng để không đổi nghĩa: từ đã có trong index giữ nguyên, chỉ chấp
+        nhận một ứng viên duy nhất ở khoảng cách 1 (từ >= 5 ký tự) hoặc 2 (từ >= 9 ký tự).
+
+        Returns:
+            Dạng hiển thị của từ đã biết, None nếu không chắc chắn
+        """
+        key = normalize_sound_key(query)
+        if key in self._display:
+            return self._display[key]
+        if len(key) < 5:
+            return None
+
+        max_distance = 2 if len(key) >= 9 else 1
+        matches = self.lookup(key, max_distance=max_distance, limit=3)
+        if not matches:
+            return None
+        best_distance = matches[0][1]
+        best = [candidate for candidate, distance in matches if distance == best_distance]
+        if len(best) != 1:
+            return None
+        return self._display[best[0]]
+
+    def plausibility_issue(self, query: str, max_length: int = 64, max_words: int = 6) -> Optional[str]:
+        """
+        Kiểm tra rẻ (không gọi LLM) query có giống một từ vựng không
+
+        Từ đã có trong index luôn hợp lệ. Query có vẻ gõ bừa (không có nguyên âm,
+        lặp ký tự, chuỗi phụ âm dài) vẫn được chấp nhận nếu gần một từ đã biết.
+
+        Args:
+            query: Từ vựng người dùng nhập
+            max_length: Độ dài tối đa (sau chuẩn hoá)
+            max_words: Số từ tối đa (cụm từ)
+
+        Returns:
+            Lý do query bị từ chối, None nếu query hợp lệ
+        """
+        key = normalize_sound_key(query)
+        if not key:
+            return "rỗng"
+        if key in self._display:
+            return None
+        if len(key) > max_length:
+            return f"dài hơn {max_length} ký tự"
+        words = [word for word in key.split("_") if word]
+        if len(words) > max_words:
+            return f"nhiều hơn {max_words} từ"
+        for char in key:
+            if not (char.isalnum() or char in _WORD_PUNCTUATION):
+                return f"chứa ký tự không hợp lệ {char!r}"
+
+        issue = None
+        for word in words:
+            if not any(char.isalpha() for char in word):
+                return f"{word!r} không chứa chữ cái"
+            if word.isascii():
+                letters = [char for char in word if char.isalpha()]
+                if len(letters) > _MAX_VOWELLESS_LETTERS and not _LATIN_VOWELS.intersection(letters):
+                    issue = f"{word!r} không có nguyên âm"
+                elif _CONSONANT_RUN_RE.search(word):
+                    issue = f"{word!r} có chuỗi phụ âm bất thường"
+            if issue is None and _REPEATED_CHAR_RE.search(word):
+                issue = f"{word!r} lặp ký tự bất thường"
+            if issue is not None:
+                break
+        if issue is not None and self.lookup(key, limit=1):
+            # Có thể là lỗi chính tả của một từ đã biết
+            return None
+        return issue
@@ -1,6 +1,11 @@
 """
 Prompt template cho LLM để lấy thông tin từ vựng
 """
+from typing import List, Optional
+
+# Tăng version khi thay đổi prompt: cache entry của version cũ (kể cả document cũ chưa có
+# metadata, xem vocab_cache.LEGACY_PROMPT_VERSION) sẽ được refresh nền
+VOCAB_INFO_PROMPT_VERSION = "1"
 
 VOCAB_INFO_PROMPT_TEMPLATE = """
 Bạn là một chuyên gia ngôn ngữ học. Nhiệm vụ của bạn là phân tích từ vựng tiếng Anh/Trung Quốc "{vocab}" và trả về thông tin chi tiết bằng ngôn ngữ {language}.
@@ -58,6 +63,57 @@ QUY TẮC:
 Hãy trả về CHỈ JSON, không có text nào khác trước hoặc sau JSON.
 """
 
+VOCAB_INFO_MULTI_PROMPT_TEMPLATE = """
+Bạn là một chuyên gia ngôn ngữ học. Nhiệm vụ của bạn là phân tích từ vựng tiếng Anh/Trung Quốc "{vocab}" và trả về thông tin chi tiết cho NHIỀU ngôn ngữ đích cùng lúc: {languages}.
+
+YÊU CẦU QUAN TRỌNG:
+- Câu ví dụ (sentence) và từ đồng nghĩa (word) chỉ viết MỘT lần, bằng tiếng Anh/Trung Quốc, dùng chung cho mọi ngôn ngữ đích
+- Bản dịch, giải thích nghĩa và nguồn gốc phải được viết cho TỪNG ngôn ngữ đích
+- Mỗi phần nội dung theo ngôn ngữ là một object {{"language": "...", "text": "..."}}, trong đó "language" PHẢI là đúng một trong các giá trị: {languages}
+- Mỗi danh sách translations / meanings / etymology PHẢI có đủ một phần tử cho mỗi ngôn ngữ đích
+
+Hãy trả về một JSON object với format chính xác sau (KHÔNG có markdown, KHÔNG có code block, chỉ JSON thuần):
+
+{{
+  "vocab": "{vocab}",
+  "examples": [
+    {{
+      "level": "easy",
+      "sentence": "Câu ví dụ dễ bằng tiếng Anh/Trung Quốc",
+      "translations": [{{"language": "<ngôn ngữ đích>", "text": "Bản dịch bằng ngôn ngữ đích"}}]
+    }}
+  ],
+  "synonyms": [
+    {{
+      "word": "từ đồng nghĩa",
+      "meanings": [{{"language": "<ngôn ngữ đích>", "text": "Giải thích nghĩa bằng ngôn ngữ đích"}}]
+    }}
+  ],
+  "origin": {{
+    "etymology": [{{"language": "<ngôn ngữ đích>", "text": "Nguồn gốc từ bằng ngôn ngữ đích"}}],
+    "historical_context": [{{"language": "<ngôn ngữ đích>", "text": "Bối cảnh lịch sử bằng ngôn ngữ đích (nếu có)"}}]
+  }}
+}}
+
+QUY TẮC:
+1. Examples: Tối đa 3 ví dụ, sắp xếp từ dễ đến khó (easy → medium → hard)
+2. Synonyms: Liệt kê các từ đồng nghĩa phổ biến, mỗi từ có giải thích cho từng ngôn ngữ đích
+3. Origin: Nguồn gốc từ (etymology) và bối cảnh lịch sử (nếu có, có thể để danh sách rỗng) cho từng ngôn ngữ đích
+4. Chỉ có trường "sentence" và "word" được viết bằng tiếng Anh/Trung Quốc
+
+Hãy trả về CHỈ JSON, không có text nào khác trước hoặc sau JSON.
+"""
+
+VOCAB_INFO_REPAIR_PROMPT_TEMPLATE = """
+JSON bạn vừa trả về chưa hợp lệ.
+
+Lỗi:
+{error}
+
+Hãy trả về lại {scope} theo đúng format và quy tắc ban đầu.
+Hãy trả về CHỈ JSON, không có text nào khác trước hoặc sau JSON.
+"""
+
 
 def get_vocab_info_prompt(vocab: str, language: str) -> str:
     """
@@ -71,3 +127,39 @@ def get_vocab_info_prompt(vocab: str, language: str) -> str:
         Formatted prompt string
     """
     return VOCAB_INFO_PROMPT_TEMPLATE.format(vocab=vocab, language=language)
+
+
+def get_vocab_info_multi_prompt(vocab: str, languages: List[str]) -> str:
+    """
+    Format prompt generate vocab info cho nhiều ngôn ngữ trong một lần gọi
+    
+    Args:
+        vocab: Từ vựng cần tra cứu
+        languages: Các ngôn ngữ trả về
+        
+    Returns:
+        Formatted prompt string
+    """
+    return VOCAB_INFO_MULTI_PROMPT_TEMPLATE.format(
+        vocab=vocab,
+        languages=", ".join(f'"{language}"' for language in languages),
+    )
+
+
+def get_vocab_info_repair_prompt(invalid_fields: Optional[List[str]], error: str) -> str:
+    """
+    Prompt yêu cầu LLM sửa lại các field không hợp lệ
+    
+    Args:
+        invalid_fields: Các top-level field bị lỗi, None nếu cần trả về lại cả document
+        error: Mô tả lỗi parse/validation
+        
+    Returns:
+        Formatted prompt string
+    """
+    if invalid_fields:
+        fields = ", ".join(f'"{field}"' for field in invalid_fields)
+        scope = f"một JSON object CHỈ gồm các field {fields}"
+    else:
+        scope = "toàn bộ JSON object"
+    return VOCAB_INFO_REPAIR_PROMPT_TEMPLATE.format(error=error, scope=scope)
@@ -1,52 +1,357 @@
 """
 Service function để lấy thông tin từ vựng từ LLM với caching
 """
+import asyncio
+import functools
 import json
 import os
-import re
-from typing import Dict, Any
-from openai import AzureOpenAI
-from vocab_info_prompt import get_vocab_info_prompt
-from vocab_cache import get_cached_vocab_info, save_vocab_info_to_cache
-from models.vocab_info import VocabInfoResponse
-
-
-# Tạo Azure OpenAI client instance
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
+import socket
+import uuid
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, Any, List, Optional, Tuple, Type
+from pydantic import BaseModel, ValidationError
+from llm_schema import build_response_format
+from llm_scheduler import LLMSlot, Priority, estimate_tokens, get_llm_scheduler, llm_priority
+from metrics import LLM_IN_FLIGHT, LLM_PARSE_FAILURES, LLM_REPAIRS, STAGE_SECONDS, annotate_request, record_llm_usage
+from vocab_info_prompt import (
+    VOCAB_INFO_PROMPT_VERSION,
+    get_vocab_info_multi_prompt,
+    get_vocab_info_prompt,
+    get_vocab_info_repair_prompt,
 )
+from vocab_cache import (
+    CacheEntry,
+    _generate_cache_key,
+    acquire_generation_lease,
+    encode_payload,
+    get_cached_vocab_entries_many,
+    get_cached_vocab_entry,
+    get_cached_vocab_info,
+    get_cached_vocabs,
+    get_negative_cache_entry,
+    is_entry_stale,
+    release_generation_lease,
+    save_negative_cache_entry,
+    save_vocab_info_to_cache,
+)
+from models.vocab_info import MultilingualVocabInfo, VocabInfoResponse
+from single_flight import SingleFlight
+from sound_words import load_sound_vocabs
+from streaming_json import VocabInfoStreamParser
+from vocab_index import VocabIndex
+from vocab_keys import canonical_language, language_name
+
+if TYPE_CHECKING:
+    from openai import AsyncAzureOpenAI
+
+
+# Giới hạn connection pool dùng chung cho mọi LLM call trong một worker
+LLM_MAX_CONNECTIONS = int(os.getenv("VOCAB_LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("VOCAB_LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+# Timeout cho mỗi LLM call (giây)
+LLM_TIMEOUT_SECONDS = float(os.getenv("VOCAB_LLM_TIMEOUT_SECONDS", "60"))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("VOCAB_LLM_CONNECT_TIMEOUT_SECONDS", "5"))
+# Lease trong MongoDB để gộp generate giữa nhiều worker (tắt mặc định)
+DISTRIBUTED_LEASE_ENABLED = os.getenv("VOCAB_DISTRIBUTED_LEASE", "false").lower() in ("1", "true", "yes")
+LEASE_TTL_SECONDS = float(os.getenv("VOCAB_LEASE_TTL_SECONDS", str(LLM_TIMEOUT_SECONDS + 10)))
+LEASE_POLL_INTERVAL_SECONDS = float(os.getenv("VOCAB_LEASE_POLL_INTERVAL_SECONDS", "0.5"))
+# Số LLM call đồng thời tối đa cho một batch request
+BATCH_CONCURRENCY = int(os.getenv("VOCAB_BATCH_CONCURRENCY", "8"))
+# Số lần refresh nền (stale-while-revalidate) chạy đồng thời tối đa, vượt quá thì bỏ qua
+REFRESH_CONCURRENCY = int(os.getenv("VOCAB_CACHE_REFRESH_CONCURRENCY", "2"))
+# Structured output (json_schema) cần api-version >= 2024-08-01-preview
+STRUCTURED_OUTPUT_ENABLED = os.getenv("VOCAB_LLM_STRUCTURED_OUTPUT", "true").lower() in ("1", "true", "yes")
+# Số lần re-ask tối đa khi LLM trả về JSON lỗi hoặc field không hợp lệ
+LLM_MAX_REPAIRS = int(os.getenv("VOCAB_LLM_MAX_REPAIRS", "2"))
+# Số completion token dự kiến của một vocab info (dùng cho TPM budget trước khi có usage thật)
+LLM_EXPECTED_COMPLETION_TOKENS = int(os.getenv("VOCAB_LLM_EXPECTED_COMPLETION_TOKENS", "800"))
+# Cache miss với từ sai chính tả/biến thể của một từ đã biết thì dùng từ đã biết (tắt mặc định)
+CANONICALIZE_LOOKUPS = os.getenv("VOCAB_CANONICALIZE_LOOKUPS", "false").lower() in ("1", "true", "yes")
+# Khoảng cách chỉnh sửa tối đa của fuzzy index và số từ tối đa nạp từ cache lúc khởi tạo
+VOCAB_INDEX_MAX_DISTANCE = int(os.getenv("VOCAB_INDEX_MAX_DISTANCE", "2"))
+VOCAB_INDEX_SEED_LIMIT = int(os.getenv("VOCAB_INDEX_SEED_LIMIT", "50000"))
+# Kiểm tra rẻ trước khi gọi LLM: từ chối input không giống từ vựng (dựa trên index từ đã biết)
+PLAUSIBILITY_FILTER_ENABLED = os.getenv("VOCAB_PLAUSIBILITY_FILTER", "true").lower() in ("1", "true", "yes")
+VOCAB_MAX_LENGTH = int(os.getenv("VOCAB_MAX_LENGTH", "64"))
+VOCAB_MAX_WORDS = int(os.getenv("VOCAB_MAX_WORDS", "6"))
+
+# Loại lỗi được nhớ trong negative cache
+FAILURE_PARSE_ERROR = "parse_error"
+FAILURE_VALIDATION_ERROR = "validation_error"
+FAILURE_REJECTED_INPUT = "rejected_input"
+
+_client: Optional["AsyncAzureOpenAI"] = None
+# Gộp các cache miss đồng thời cùng (vocab, language) trong một worker
+_inflight = SingleFlight()
+# Giữ reference tới các task refresh nền để không bị garbage collect
+_refresh_tasks = set()
+# Index prefix/fuzzy của các từ đã biết: sounds.json (khởi tạo lazy), được thay bằng
+# index có thêm các từ trong MongoDB cache khi build nền xong
+_vocab_index: Optional[VocabIndex] = None
+_vocab_index_seeded = False
+_vocab_index_seeding: Optional["asyncio.Task[None]"] = None
+# Từ được generate trong lúc build nền, thêm vào index mới trước khi thay
+_vocab_index_pending: List[str] = []
+# Thống kê generate (parse/validation failure, số lần repair)
+_generation_stats = {
+    "generations": 0,
+    "stale_hits": 0,
+    "background_refreshes": 0,
+    "refreshes_skipped": 0,
+    "llm_calls": 0,
+    "parse_failures": 0,
+    "validation_failures": 0,
+    "repair_attempts": 0,
+    "repaired": 0,
+    "failed": 0,
+    "negative_hits": 0,
+    "rejected_inputs": 0,
+}
+
+
+class UnresolvableVocabError(ValueError):
+    """
+    Từ vựng không generate được thông tin hợp lệ, được nhớ trong negative cache
+
+    Args:
+        reason: Loại lỗi (FAILURE_PARSE_ERROR, FAILURE_VALIDATION_ERROR, FAILURE_REJECTED_INPUT)
+        detail: Mô tả lỗi trả cho client
+    """
+
+    def __init__(self, reason: str, detail: str):
+        super().__init__(detail)
+        self.reason = reason
+
+
+def _get_client() -> "AsyncAzureOpenAI":
+    """
+    Lazy load Azure OpenAI async client, dùng chung một httpx connection pool
+    
+    openai/httpx chỉ được import ở lần gọi LLM đầu tiên, cache hit không cần tới.
+    
+    Returns:
+        AsyncAzureOpenAI client instance
+    """
+    global _client
+    if _client is not None:
+        return _client
+    
+    import httpx
+    from openai import AsyncAzureOpenAI
+    
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+        ),
+        timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS),
+    )
+    _client = AsyncAzureOpenAI(
+        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+        api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-08-01-preview"),
+        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+        http_client=http_client,
+        # Retry (kể cả 429) do llm_scheduler quản lý để AIMD thấy được rate limit
+        max_retries=0,
+    )
+    return _client
 
 
 def _extract_json_from_response(response: str) -> Dict[str, Any]:
     """
-    Extract JSON từ LLM response (có thể có markdown code block hoặc text khác)
+    Parse JSON từ LLM response
+    
+    Với structured output, response là JSON thuần nên json.loads là đủ. Nếu model
+    vẫn thêm text xung quanh (markdown code block, ...) thì decode object JSON
+    đầu tiên, không scan bằng regex.
     
     Args:
         response: Raw response từ LLM
         
     Returns:
         Parsed JSON dict
+        
+    Raises:
+        json.JSONDecodeError: Nếu không tìm thấy JSON object hợp lệ
     """
-    # Loại bỏ markdown code blocks nếu có
-    json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
-    if json_match:
-        return json.loads(json_match.group(1))
+    text = response.strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        start = text.find("{")
+        if start < 0:
+            raise
+        parsed, _ = json.JSONDecoder().raw_decode(text, start)
+        return parsed
+
+
+def get_vocab_index() -> VocabIndex:
+    """
+    Lazy load index từ vựng, khởi tạo từ sounds.json
     
-    # Tìm JSON object trong response
-    json_match = re.search(r'\{.*\}', response, re.DOTALL)
-    if json_match:
-        return json.loads(json_match.group(0))
+    Returns:
+        VocabIndex instance
+    """
+    global _vocab_index
+    if _vocab_index is None:
+        _vocab_index = VocabIndex(max_distance=VOCAB_INDEX_MAX_DISTANCE)
+        _vocab_index.add_many(load_sound_vocabs())
+    return _vocab_index
+
+
+def _build_seeded_index(cached_vocabs: List[str]) -> VocabIndex:
+    index = VocabIndex(max_distance=VOCAB_INDEX_MAX_DISTANCE)
+    index.add_many(load_sound_vocabs())
+    index.add_many(cached_vocabs)
+    return index
+
+
+async def _seed_vocab_index() -> None:
+    """
+    Build index gồm sounds.json và các từ đã có trong MongoDB cache rồi thay index hiện tại
+
+    Build chạy trong thread (vài giây CPU với hàng chục nghìn từ) trên một index
+    riêng: request trong lúc build dùng index sounds.json đầy đủ, không thấy index
+    đang build dở.
+    """
+    global _vocab_index, _vocab_index_seeded
+    cached_vocabs = await get_cached_vocabs(VOCAB_INDEX_SEED_LIMIT)
+    index = await asyncio.to_thread(_build_seeded_index, cached_vocabs)
+    index.add_many(_vocab_index_pending)
+    _vocab_index_pending.clear()
+    _vocab_index = index
+    _vocab_index_seeded = True
+
+
+def _on_vocab_index_seeded(task: "asyncio.Task[None]") -> None:
+    global _vocab_index_seeding
+    _vocab_index_seeding = None
+    _vocab_index_pending.clear()
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Warning: Cannot seed vocab index from cache: {task.exception()}")
+
+
+def _get_seeded_vocab_index() -> VocabIndex:
+    """
+    Index hiện tại, bắt đầu build nền index có các từ trong cache (một lần mỗi worker)
+
+    Không chờ build xong: trước đó trả index sounds.json.
+    """
+    global _vocab_index_seeding
+    index = get_vocab_index()
+    if not _vocab_index_seeded and _vocab_index_seeding is None:
+        _vocab_index_seeding = asyncio.get_running_loop().create_task(_seed_vocab_index())
+        _vocab_index_seeding.add_done_callback(_on_vocab_index_seeded)
+    return index
+
+
+async def suggest_vocabs(query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Gợi ý từ vựng đã biết cho autocomplete và sửa lỗi chính tả
+    
+    Args:
+        query: Text người dùng đang gõ
+        limit: Số gợi ý tối đa
+        
+    Returns:
+        List dict {vocab, distance, kind}, exact/prefix trước rồi tới fuzzy
+    """
+    index = _get_seeded_vocab_index()
+    return [
+        {"vocab": index.display(key), "distance": distance, "kind": kind}
+        for key, distance, kind in index.suggest(query, limit=limit)
+    ]
+
+
+async def _canonical_vocab(vocab: str) -> str:
+    """
+    Từ đã biết tương ứng với vocab (nếu bật VOCAB_CANONICALIZE_LOOKUPS và chắc chắn),
+    ngược lại trả về vocab
+    """
+    if not CANONICALIZE_LOOKUPS:
+        return vocab
+    index = _get_seeded_vocab_index()
+    canonical = index.canonicalize(vocab)
+    if canonical is None or _generate_cache_key(canonical, "") == _generate_cache_key(vocab, ""):
+        return vocab
+    return canonical
+
+
+async def _get_or_generate(vocab: str, language: str) -> Dict[str, Any]:
+    """
+    Xử lý cache miss: thử từ đã biết gần nhất (nếu bật canonicalize), sau đó gọi LLM
+    (một lần cho mỗi key)
+    """
+    canonical = await _canonical_vocab(vocab)
+    if canonical != vocab:
+        cached_data = await _get_cached_or_refresh(canonical, language)
+        if cached_data:
+            return cached_data
+        vocab = canonical
     
-    # Nếu không tìm thấy, thử parse toàn bộ response
-    return json.loads(response.strip())
+    cache_key = _generate_cache_key(vocab, language)
+    return await _inflight.do(cache_key, lambda: _generate_vocab_info(vocab, language))
+
+
+async def check_vocab_resolvable(vocab: str, language: str) -> None:
+    """
+    Từ chối nhanh (không gọi LLM) từ vựng đã biết là không generate được
+    hoặc không qua được kiểm tra plausibility
+
+    Raises:
+        UnresolvableVocabError: Nếu còn negative entry hoặc input bị từ chối
+    """
+    _raise_if_negative(vocab, language)
+    if not PLAUSIBILITY_FILTER_ENABLED:
+        return
+    
+    index = _get_seeded_vocab_index()
+    issue = index.plausibility_issue(vocab, max_length=VOCAB_MAX_LENGTH, max_words=VOCAB_MAX_WORDS)
+    if issue is not None:
+        _generation_stats["rejected_inputs"] += 1
+        detail = f"Từ vựng không hợp lệ: {issue}"
+        # Kiểm tra lại rẻ nên chỉ nhớ trong L1, không ghi MongoDB
+        await save_negative_cache_entry(vocab, language, FAILURE_REJECTED_INPUT, detail, persist=False)
+        raise UnresolvableVocabError(FAILURE_REJECTED_INPUT, detail)
+
+
+def _raise_if_negative(vocab: str, language: str) -> None:
+    """
+    Raise UnresolvableVocabError nếu key đang có negative entry
+    """
+    negative = get_negative_cache_entry(vocab, language)
+    if negative is not None:
+        _generation_stats["negative_hits"] += 1
+        raise UnresolvableVocabError(negative["reason"], negative["detail"])
+
+
+def _error_event(error: Exception) -> Dict[str, Any]:
+    """
+    Data của event "error" khi stream, kèm loại lỗi nếu là UnresolvableVocabError
+    """
+    data: Dict[str, Any] = {"detail": str(error)}
+    if isinstance(error, UnresolvableVocabError):
+        data["reason"] = error.reason
+    return data
+
+
+def get_generation_stats() -> Dict[str, Any]:
+    """
+    Thống kê generate: tỉ lệ parse/validation failure và số lần repair
+    """
+    stats = dict(_generation_stats)
+    llm_calls = stats["llm_calls"]
+    stats["parse_failure_rate"] = round(stats["parse_failures"] / llm_calls, 4) if llm_calls else 0.0
+    stats["validation_failure_rate"] = round(stats["validation_failures"] / llm_calls, 4) if llm_calls else 0.0
+    return stats
 
 
 async def get_vocab_info(vocab: str, language: str) -> Dict[str, Any]:
     """
     Lấy thông tin từ vựng từ cache hoặc LLM
     
+    Các cache miss đồng thời cho cùng (vocab, language) chỉ gọi LLM một lần,
+    mọi request cùng chờ một kết quả.
+    
     Args:
         vocab: Từ vựng cần tra cứu
         language: Ngôn ngữ trả về
@@ -55,48 +360,679 @@ async def get_vocab_info(vocab: str, language: str) -> Dict[str, Any]:
         Dict chứa thông tin từ vựng (examples, synonyms, origin)
         
     Raises:
-        ValueError: Nếu không thể parse response từ LLM
+        UnresolvableVocabError: Nếu input bị từ chối hoặc LLM không trả về dữ liệu
+            hợp lệ (được nhớ trong NEGATIVE_CACHE_SECONDS, các lần sau trả lỗi ngay)
         Exception: Nếu có lỗi khi gọi LLM
     """
-    # Kiểm tra cache trước
-    cached_data = get_cached_vocab_info(vocab, language)
+    # Kiểm tra cache trước (entry stale vẫn được trả về ngay, refresh nền)
+    cached_data = await _get_cached_or_refresh(vocab, language)
 
     if cached_data:
         return cached_data
     
-    # Nếu không có cache, gọi LLM
-    prompt = get_vocab_info_prompt(vocab, language)
+    # Nếu không có cache, gọi LLM (một lần cho mỗi key)
+    return await _get_or_generate(vocab, language)
+
+
+async def get_vocab_info_payload(vocab: str, language: str) -> bytes:
+    """
+    Lấy thông tin từ vựng dạng JSON bytes, sẵn sàng trả thẳng cho client
+    
+    Cache hit trả về bytes đã serialize lúc lưu, không validate/serialize lại;
+    validate đầy đủ chỉ chạy trên write path (khi gọi LLM).
+    
+    Args:
+        vocab: Từ vựng cần tra cứu
+        language: Ngôn ngữ trả về
+        
+    Returns:
+        UTF-8 JSON bytes của VocabInfoResponse
+        
+    Raises:
+        ValueError: Nếu không thể parse response từ LLM
+        Exception: Nếu có lỗi khi gọi LLM
+    """
+    payload = await get_cached_vocab_info_payload(vocab, language)
+    if payload is not None:
+        return payload
+    
+    result = await _get_or_generate(vocab, language)
+    return encode_payload(result)
+
+
+async def get_cached_vocab_info_payload(vocab: str, language: str) -> Optional[bytes]:
+    """
+    JSON bytes của vocab info nếu đã có trong cache, không gọi LLM
+    
+    Entry stale vẫn được trả về và refresh nền như get_vocab_info_payload.
+    
+    Args:
+        vocab: Từ vựng cần tra cứu
+        language: Ngôn ngữ trả về
+        
+    Returns:
+        UTF-8 JSON bytes của VocabInfoResponse, None nếu cache miss
+    """
+    cached_entry = await get_cached_vocab_entry(vocab, language)
+    if not cached_entry:
+        return None
+    _refresh_if_stale(vocab, language, cached_entry)
+    return cached_entry.payload
+
+
+async def _get_cached_or_refresh(vocab: str, language: str) -> Optional[Dict[str, Any]]:
+    """
+    Lấy data từ cache; nếu entry stale thì vẫn trả về ngay và refresh nền
+    """
+    cached_entry = await get_cached_vocab_entry(vocab, language)
+    if not cached_entry:
+        return None
+    _refresh_if_stale(vocab, language, cached_entry)
+    return cached_entry.data
+
+
+def _refresh_if_stale(vocab: str, language: str, cached_entry: CacheEntry) -> None:
+    """
+    Lên lịch generate lại entry nếu stale (prompt version/model đổi, hoặc quá fresh_until)
+    
+    Refresh chạy nền với số lượng giới hạn; khi đã đủ REFRESH_CONCURRENCY thì
+    bỏ qua, entry sẽ được refresh ở lần hit sau.
+    """
+    if not is_entry_stale(cached_entry, VOCAB_INFO_PROMPT_VERSION, _get_model_name()):
+        return
+    _generation_stats["stale_hits"] += 1
+    
+    cache_key = _generate_cache_key(vocab, language)
+    if cache_key in _inflight:
+        return
+    if len(_refresh_tasks) >= REFRESH_CONCURRENCY:
+        _generation_stats["refreshes_skipped"] += 1
+        return
+    
+    task = asyncio.ensure_future(_inflight.do(cache_key, lambda: _refresh_vocab_info(vocab, language)))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def _refresh_vocab_info(vocab: str, language: str) -> Optional[Dict[str, Any]]:
+    """
+    Generate lại entry stale, lỗi chỉ được log (request đã được trả bằng entry cũ)
+    """
+    _generation_stats["background_refreshes"] += 1
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+    try:
+        if DISTRIBUTED_LEASE_ENABLED and not await acquire_generation_lease(vocab, language, owner, LEASE_TTL_SECONDS):
+            # Worker khác đang generate key này
+            return None
+        # Request đã được trả bằng entry cũ, nhường LLM budget cho call tương tác
+        with llm_priority(Priority.BACKGROUND):
+            return await _call_llm_and_cache(vocab, language)
+    except Exception as e:
+        print(f"Warning: Background refresh failed for '{vocab}' ({language}): {e}")
+        return None
+    finally:
+        if DISTRIBUTED_LEASE_ENABLED:
+            await release_generation_lease(vocab, language, owner)
+
+
+async def _save_generated(vocab: str, language: str, result_dict: Dict[str, Any]) -> None:
+    """
+    Lưu kết quả LLM vào cache kèm prompt version và model đã dùng
+    """
+    if _vocab_index is not None:
+        _vocab_index.add(vocab)
+    if _vocab_index_seeding is not None:
+        _vocab_index_pending.append(vocab)
+    await save_vocab_info_to_cache(
+        vocab,
+        language,
+        result_dict,
+        prompt_version=VOCAB_INFO_PROMPT_VERSION,
+        model=_get_model_name(),
+    )
+
+
+async def iter_vocab_info_batch(
+    vocabs: List[str],
+    language: str,
+    concurrency: int = BATCH_CONCURRENCY,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Lấy thông tin nhiều từ vựng, yield từng kết quả ngay khi có
+    
+    Cache hit được lấy bằng một query duy nhất và yield trước, các từ còn lại
+    được generate song song (tối đa `concurrency` LLM call cùng lúc).
+    
+    Args:
+        vocabs: Danh sách từ vựng
+        language: Ngôn ngữ trả về
+        concurrency: Số LLM call đồng thời tối đa
+        
+    Yields:
+        Dict {vocab, result, error, cached} cho mỗi từ (theo thứ tự hoàn thành)
+    """
+    # Các cách viết cùng cache key ("Abide_by", "abide by") chỉ tra cache/generate một lần,
+    # mỗi cách viết trong input vẫn có item riêng
+    spellings_by_key: Dict[str, List[str]] = {}
+    for vocab in dict.fromkeys(vocabs):
+        spellings_by_key.setdefault(_generate_cache_key(vocab, language), []).append(vocab)
+    key_by_vocab = {spellings[0]: cache_key for cache_key, spellings in spellings_by_key.items()}
+    unique_vocabs = list(key_by_vocab)
+    cached = await get_cached_vocab_entries_many(unique_vocabs, language)
+    
+    misses = []
+    for vocab in unique_vocabs:
+        if vocab in cached:
+            _refresh_if_stale(vocab, language, cached[vocab])
+            for spelling in spellings_by_key[key_by_vocab[vocab]]:
+                yield {"vocab": spelling, "result": cached[vocab].data, "error": None, "cached": True}
+        else:
+            misses.append(vocab)
+    
+    if not misses:
+        return
+    
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    
+    async def generate(vocab: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                result = await _inflight.do(key_by_vocab[vocab], lambda: _generate_vocab_info(vocab, language))
+                return {"vocab": vocab, "result": result, "error": None, "cached": False}
+            except Exception as e:
+                return {"vocab": vocab, "result": None, "error": str(e), "cached": False}
+    
+    tasks = [asyncio.ensure_future(generate(vocab)) for vocab in misses]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            item = await next_done
+            for spelling in spellings_by_key[key_by_vocab[item["vocab"]]]:
+                yield {**item, "vocab": spelling}
+    finally:
+        # Client ngắt stream giữa chừng thì không generate tiếp
+        for task in tasks:
+            task.cancel()
+
+
+# Hàm gọi LLM và lưu cache cho một (vocab, language)
+GenerateFn = Callable[[str, str], Awaitable[Dict[str, Any]]]
+
+
+async def _generate_vocab_info(vocab: str, language: str, generate: Optional[GenerateFn] = None) -> Dict[str, Any]:
+    """
+    Generate vocab info, lỗi không generate được (parse/validation) được ghi
+    vào negative cache để các request sau không gọi lại LLM
+
+    Args:
+        generate: Hàm gọi LLM (mặc định _call_llm_and_cache, stream dùng _stream_llm_and_cache)
+    """
+    await check_vocab_resolvable(vocab, language)
+    try:
+        return await _generate_with_lease(vocab, language, generate or _call_llm_and_cache)
+    except UnresolvableVocabError as e:
+        await save_negative_cache_entry(vocab, language, e.reason, str(e))
+        raise
+
+
+async def _generate_with_lease(vocab: str, language: str, generate: GenerateFn) -> Dict[str, Any]:
+    """
+    Generate vocab info, có lease giữa các worker nếu VOCAB_DISTRIBUTED_LEASE bật
+    """
+    if not DISTRIBUTED_LEASE_ENABLED:
+        return await generate(vocab, language)
+    
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+    if not await acquire_generation_lease(vocab, language, owner, LEASE_TTL_SECONDS):
+        # Worker khác đang generate, chờ kết quả xuất hiện trong cache
+        cached_data = await _wait_for_cached_vocab_info(vocab, language, LEASE_TTL_SECONDS)
+        if cached_data:
+            return cached_data
+        if not await acquire_generation_lease(vocab, language, owner, LEASE_TTL_SECONDS):
+            print(f"Warning: Generation lease for '{vocab}' still held, generating anyway")
+    
+    try:
+        # Worker khác có thể vừa generate xong trước khi mình giành được lease
+        cached_data = await get_cached_vocab_info(vocab, language)
+        if cached_data:
+            return cached_data
+        return await generate(vocab, language)
+    finally:
+        await release_generation_lease(vocab, language, owner)
+
+
+async def _wait_for_cached_vocab_info(vocab: str, language: str, timeout: float) -> Optional[Dict[str, Any]]:
+    """
+    Poll cache cho tới khi có dữ liệu hoặc hết timeout
+
+    Raises:
+        UnresolvableVocabError: Nếu worker giữ lease generate thất bại và đã
+            ghi negative entry (không chờ hết timeout rồi gọi LLM lại)
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        await asyncio.sleep(LEASE_POLL_INTERVAL_SECONDS)
+        # Tra MongoDB cũng nạp negative entry (nếu có) vào L1
+        cached_data = await get_cached_vocab_info(vocab, language)
+        if cached_data:
+            return cached_data
+        _raise_if_negative(vocab, language)
+    return None
+
+
+def _get_model_name() -> str:
+    return os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o-mini")
+
+
+def _build_messages(prompt: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": "You are a helpful language expert."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _build_response_format(
+    fields: Optional[List[str]] = None,
+    model: Type[BaseModel] = VocabInfoResponse,
+) -> Optional[Dict[str, Any]]:
+    if not STRUCTURED_OUTPUT_ENABLED:
+        return None
+    return _cached_response_format(model, tuple(sorted(fields)) if fields else None)
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_response_format(model: Type[BaseModel], fields: Optional[Tuple[str, ...]]) -> Dict[str, Any]:
+    """
+    response_format theo (model, fields), chỉ build schema strict một lần (không được sửa dict trả về)
+    """
+    name = "vocab_info_multi" if model is MultilingualVocabInfo else "vocab_info"
+    return build_response_format(model, name, list(fields) if fields else None)
+
+
+def _record_usage(usage: Any, slot: Optional[LLMSlot] = None) -> None:
+    """
+    Ghi nhận token usage (và chi phí ước lượng) của một LLM call nếu response có usage,
+    hiệu chỉnh TPM budget của scheduler theo usage thật
+    """
+    if usage is None:
+        return
+    prompt_tokens = usage.prompt_tokens or 0
+    completion_tokens = usage.completion_tokens or 0
+    record_llm_usage(_get_model_name(), prompt_tokens, completion_tokens)
+    if slot is not None:
+        slot.record_usage(prompt_tokens + completion_tokens)
+
+
+def _estimate_call_tokens(messages: List[Dict[str, str]]) -> int:
+    """
+    Token ước lượng của một LLM call (prompt + completion dự kiến) cho TPM budget
+    """
+    return sum(estimate_tokens(message["content"]) for message in messages) + LLM_EXPECTED_COMPLETION_TOKENS
+
+
+async def _complete(messages: List[Dict[str, str]], response_format: Optional[Dict[str, Any]]) -> str:
+    """
+    Gọi LLM một lần (qua llm_scheduler, retry khi 429/5xx) và trả về nội dung text
+    """
+    kwargs = {"response_format": response_format} if response_format else {}
+    _generation_stats["llm_calls"] += 1
+    
+    async def call(slot: LLMSlot) -> Any:
+        with LLM_IN_FLIGHT.track_inprogress(), STAGE_SECONDS.time(stage="llm_call"):
+            resp = await _get_client().chat.completions.create(
+                model=_get_model_name(),
+                messages=messages,
+                timeout=LLM_TIMEOUT_SECONDS,
+                **kwargs,
+            )
+        _record_usage(resp.usage, slot)
+        return resp
+    
+    resp = await get_llm_scheduler().run(call, estimated_tokens=_estimate_call_tokens(messages))
+    # Lấy nội dung từ response
+    response_text = resp.choices[0].message.content
+    if not response_text:
+        # Lỗi tạm thời (không phải ValueError): không được nhớ trong negative cache
+        raise RuntimeError("LLM response không có nội dung")
+    return response_text
+
+
+async def _parse_with_repair(
+    messages: List[Dict[str, str]],
+    response_text: str,
+    model: Type[BaseModel] = VocabInfoResponse,
+) -> BaseModel:
+    """
+    Parse và validate response, re-ask LLM chỉ cho các field lỗi (tối đa LLM_MAX_REPAIRS lần)
+    
+    Args:
+        messages: Messages đã gửi cho LLM
+        response_text: Nội dung LLM trả về
+        model: Pydantic model để validate (mặc định VocabInfoResponse)
+        
+    Returns:
+        Model instance đã validate
+        
+    Raises:
+        json.JSONDecodeError: Nếu vẫn không parse được JSON sau khi repair
+        ValidationError: Nếu vẫn không hợp lệ sau khi repair
+    """
+    data: Dict[str, Any] = {}
+    # None nghĩa là cần cả document
+    invalid_fields: Optional[List[str]] = None
+    
+    for attempt in range(LLM_MAX_REPAIRS + 1):
+        try:
+            with STAGE_SECONDS.time(stage="json_parse"):
+                parsed = _extract_json_from_response(response_text)
+            if not isinstance(parsed, dict):
+                raise json.JSONDecodeError("Expected a JSON object", response_text, 0)
+        except json.JSONDecodeError as e:
+            _generation_stats["parse_failures"] += 1
+            LLM_PARSE_FAILURES.inc(reason=FAILURE_PARSE_ERROR)
+            error: Exception = e
+        else:
+            # Khi repair, LLM chỉ trả về các field lỗi, merge vào document trước
+            data.update(parsed)
+            try:
+                with STAGE_SECONDS.time(stage="validation"):
+                    validated_data = model(**data)
+                if attempt:
+                    _generation_stats["repaired"] += 1
+                    LLM_REPAIRS.inc(result="repaired")
+                return validated_data
+            except ValidationError as e:
+                _generation_stats["validation_failures"] += 1
+                LLM_PARSE_FAILURES.inc(reason=FAILURE_VALIDATION_ERROR)
+                invalid_fields = sorted({str(err["loc"][0]) for err in e.errors() if err["loc"]}) or None
+                error = e
+        
+        if attempt >= LLM_MAX_REPAIRS:
+            break
+        
+        _generation_stats["repair_attempts"] += 1
+        LLM_REPAIRS.inc(result="attempted")
+        messages = messages + [
+            {"role": "assistant", "content": response_text},
+            {"role": "user", "content": get_vocab_info_repair_prompt(invalid_fields, str(error))},
+        ]
+        response_text = await _complete(messages, _build_response_format(invalid_fields, model))
+    
+    _generation_stats["failed"] += 1
+    LLM_REPAIRS.inc(result="failed")
+    raise error
+
+
+async def _call_llm_and_cache(vocab: str, language: str) -> Dict[str, Any]:
+    """
+    Gọi LLM, validate kết quả và lưu vào cache
+    """
+    messages = _build_messages(get_vocab_info_prompt(vocab, language_name(language)))
     
     try:
-        # Gọi LLM - sử dụng Azure OpenAI client
-        model_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o-mini")
-        resp = client.chat.completions.create(
-            model=model_name,
-            messages=[
-                {"role": "system", "content": "You are a helpful language expert."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        # Lấy nội dung từ response
-        response_text = resp.choices[0].message.content
-        if not response_text:
-            raise ValueError("LLM response không có nội dung")
-        
-        # Parse JSON từ response
-        parsed_data = _extract_json_from_response(response_text)
-        
-        # Validate với Pydantic model
-        validated_data = VocabInfoResponse(**parsed_data)
+        _generation_stats["generations"] += 1
+        # Gọi LLM - sử dụng Azure OpenAI client, output bị ràng buộc theo JSON schema
+        response_text = await _complete(messages, _build_response_format())
+        
+        # Parse + validate với Pydantic model, repair các field lỗi nếu cần
+        validated_data = await _parse_with_repair(messages, response_text)
         
         # Convert về dict để lưu cache
-        result_dict = validated_data.model_dump()
+        result_dict = validated_data.model_dump(mode="json")
         
         # Lưu vào cache
-        save_vocab_info_to_cache(vocab, language, result_dict)
+        await _save_generated(vocab, language, result_dict)
+        
+        return result_dict
+        
+    except json.JSONDecodeError as e:
+        raise UnresolvableVocabError(FAILURE_PARSE_ERROR, f"Không thể parse JSON từ LLM response: {e}")
+    except ValidationError as e:
+        raise UnresolvableVocabError(FAILURE_VALIDATION_ERROR, f"Dữ liệu từ LLM không hợp lệ: {e}")
+    except Exception as e:
+        raise Exception(f"Lỗi khi gọi LLM: {e}")
+
+
+async def get_vocab_info_multi(vocab: str, languages: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Lấy thông tin một từ vựng cho nhiều ngôn ngữ
+    
+    Các ngôn ngữ chưa có cache được generate trong MỘT LLM call: câu ví dụ và từ
+    đồng nghĩa chỉ sinh một lần, phần dịch/giải thích được localize cho từng
+    ngôn ngữ. Kết quả mỗi ngôn ngữ được lưu thành document cache riêng.
+    
+    Args:
+        vocab: Từ vựng cần tra cứu
+        languages: Các ngôn ngữ trả về
+        
+    Returns:
+        Dict language (như trong input) -> thông tin từ vựng
+        
+    Raises:
+        UnresolvableVocabError: Nếu input bị từ chối hoặc LLM không trả về dữ liệu hợp lệ
+        Exception: Nếu có lỗi khi gọi LLM
+    """
+    # Các alias của cùng một ngôn ngữ ("vi", "Vietnamese") dùng chung một kết quả
+    by_canonical: Dict[str, str] = {}
+    for language in languages:
+        by_canonical.setdefault(canonical_language(language), language)
+    unique_languages = list(by_canonical.values())
+    cached = await asyncio.gather(*(_get_cached_or_refresh(vocab, language) for language in unique_languages))
+    results = {language: data for language, data in zip(unique_languages, cached) if data}
+    
+    missing = [language for language in unique_languages if language not in results]
+    if len(missing) == 1:
+        results[missing[0]] = await get_vocab_info(vocab, missing[0])
+    elif missing:
+        multi_key = "|".join(sorted(_generate_cache_key(vocab, language) for language in missing))
+        results.update(await _inflight.do(multi_key, lambda: _generate_vocab_info_multi(vocab, missing)))
+    
+    return {language: results[by_canonical[canonical_language(language)]] for language in languages}
+
+
+async def _generate_vocab_info_multi(vocab: str, languages: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Generate vocab info cho nhiều ngôn ngữ, cùng negative cache và lease như _generate_vocab_info
+
+    Ngôn ngữ đang được worker khác generate (lease) thì chờ kết quả của worker đó,
+    hết lease mà chưa có thì generate riêng như /api/vocab/info.
+    """
+    for language in languages:
+        await check_vocab_resolvable(vocab, language)
+    if not DISTRIBUTED_LEASE_ENABLED:
+        return await _generate_languages(vocab, languages)
+
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+    acquired = [
+        language
+        for language in languages
+        if await acquire_generation_lease(vocab, language, owner, LEASE_TTL_SECONDS)
+    ]
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        # Worker khác có thể vừa generate xong trước khi mình giành được lease
+        cached = await asyncio.gather(*(get_cached_vocab_info(vocab, language) for language in acquired))
+        results.update({language: data for language, data in zip(acquired, cached) if data})
+        to_generate = [language for language in acquired if language not in results]
+        if to_generate:
+            results.update(await _generate_languages(vocab, to_generate))
+    finally:
+        for language in acquired:
+            await release_generation_lease(vocab, language, owner)
+
+    held = [language for language in languages if language not in acquired]
+    waited = await asyncio.gather(*(
+        _wait_for_cached_vocab_info(vocab, language, LEASE_TTL_SECONDS) for language in held
+    ))
+    for language, data in zip(held, waited):
+        if not data:
+            data = await _inflight.do(
+                _generate_cache_key(vocab, language),
+                lambda language=language: _generate_vocab_info(vocab, language),
+            )
+        results[language] = data
+    return results
+
+
+async def _generate_languages(vocab: str, languages: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Một LLM call cho các ngôn ngữ (multi prompt nếu nhiều hơn một), lỗi không
+    generate được được ghi vào negative cache của từng ngôn ngữ
+    """
+    try:
+        if len(languages) == 1:
+            return {languages[0]: await _call_llm_and_cache(vocab, languages[0])}
+        return await _call_llm_multi_and_cache(vocab, languages)
+    except UnresolvableVocabError as e:
+        for language in languages:
+            await save_negative_cache_entry(vocab, language, e.reason, str(e))
+        raise
+
+
+async def _call_llm_multi_and_cache(vocab: str, languages: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Gọi LLM một lần cho nhiều ngôn ngữ, tách kết quả và lưu cache theo từng ngôn ngữ
+    """
+    names = {language: language_name(language) for language in languages}
+    messages = _build_messages(get_vocab_info_multi_prompt(vocab, list(names.values())))
+    
+    try:
+        _generation_stats["generations"] += 1
+        response_text = await _complete(messages, _build_response_format(model=MultilingualVocabInfo))
+        multilingual = await _parse_with_repair(messages, response_text, MultilingualVocabInfo)
+        
+        results = {}
+        for language in languages:
+            try:
+                localized = multilingual.localize(names[language])
+            except ValueError as e:
+                # Thiếu nội dung cho một ngôn ngữ: dữ liệu không hợp lệ như ValidationError
+                raise UnresolvableVocabError(FAILURE_VALIDATION_ERROR, f"Dữ liệu từ LLM không hợp lệ: {e}")
+            result_dict = localized.model_dump(mode="json")
+            await _save_generated(vocab, language, result_dict)
+            results[language] = result_dict
+        return results
+        
+    except UnresolvableVocabError:
+        raise
+    except json.JSONDecodeError as e:
+        raise UnresolvableVocabError(FAILURE_PARSE_ERROR, f"Không thể parse JSON từ LLM response: {e}")
+    except ValidationError as e:
+        raise UnresolvableVocabError(FAILURE_VALIDATION_ERROR, f"Dữ liệu từ LLM không hợp lệ: {e}")
+    except Exception as e:
+        raise Exception(f"Lỗi khi gọi LLM: {e}")
+
+
+async def stream_vocab_info(vocab: str, language: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Lấy thông tin từ vựng dạng stream, trả về từng phần ngay khi LLM viết xong
+    
+    - Cache hit: một event "complete" duy nhất
+    - Cache miss: các event "example", "synonym", "origin" theo thứ tự LLM viết,
+      sau đó là "complete" với document đầy đủ (đã validate và lưu cache)
+    - Lỗi: event "error" (kèm "reason" nếu là lỗi được nhớ trong negative cache)
+    
+    Lần generate được đăng ký trong _inflight (và lease nếu bật) như request
+    thường: request khác cùng key, stream hay không, chờ chung một LLM call.
+    Nếu key đang được generate bởi request khác thì chỉ có event "complete".
+    
+    Args:
+        vocab: Từ vựng cần tra cứu
+        language: Ngôn ngữ trả về
+        
+    Yields:
+        Tuple (tên event, data dict)
+    """
+    cached_data = await _get_cached_or_refresh(vocab, language)
+    if cached_data:
+        yield "complete", cached_data
+        return
+    
+    cache_key = _generate_cache_key(vocab, language)
+    events: asyncio.Queue = asyncio.Queue()
+    generation = asyncio.ensure_future(_inflight.do(
+        cache_key,
+        lambda: _generate_vocab_info(vocab, language, lambda v, l: _stream_llm_and_cache(v, l, events)),
+    ))
+    next_event: Optional[asyncio.Future] = None
+    try:
+        while not generation.done():
+            next_event = asyncio.ensure_future(events.get())
+            await asyncio.wait({next_event, generation}, return_when=asyncio.FIRST_COMPLETED)
+            if next_event.done():
+                yield next_event.result()
+            else:
+                next_event.cancel()
+        while not events.empty():
+            yield events.get_nowait()
+        result = generation.result()
+    except Exception as e:
+        yield "error", _error_event(e)
+        return
+    finally:
+        if next_event is not None:
+            next_event.cancel()
+        # Client ngắt stream: generate vẫn chạy tiếp trong _inflight và lưu cache
+        generation.cancel()
+    yield "complete", result
+
+
+async def _stream_llm_and_cache(
+    vocab: str,
+    language: str,
+    events: "asyncio.Queue[Tuple[str, Dict[str, Any]]]",
+) -> Dict[str, Any]:
+    """
+    Gọi LLM dạng stream, đưa từng phần đã parse vào events, validate kết quả và lưu vào cache
+    
+    Lỗi được map giống _call_llm_and_cache.
+    """
+    parser = VocabInfoStreamParser()
+    messages = _build_messages(get_vocab_info_prompt(vocab, language_name(language)))
+    response_format = _build_response_format()
+    kwargs = {"response_format": response_format} if response_format else {}
+    scheduler = get_llm_scheduler()
+    try:
+        _generation_stats["generations"] += 1
+        _generation_stats["llm_calls"] += 1
+        attempt = 0
+        while True:
+            try:
+                # Giữ slot của scheduler trong suốt stream
+                async with scheduler.slot(estimated_tokens=_estimate_call_tokens(messages)) as slot:
+                    with LLM_IN_FLIGHT.track_inprogress(), STAGE_SECONDS.time(stage="llm_call"):
+                        stream = await _get_client().chat.completions.create(
+                            model=_get_model_name(),
+                            messages=messages,
+                            timeout=LLM_TIMEOUT_SECONDS,
+                            stream=True,
+                            **kwargs,
+                        )
+                        async for chunk in stream:
+                            # Chunk cuối có thể mang usage (khi provider hỗ trợ), không có choices
+                            _record_usage(getattr(chunk, "usage", None), slot)
+                            # Azure có thể gửi chunk không có choices (content filter results)
+                            if not chunk.choices or not chunk.choices[0].delta.content:
+                                continue
+                            for event, item in parser.feed(chunk.choices[0].delta.content):
+                                events.put_nowait((event, item.model_dump(mode="json")))
+                break
+            except Exception as e:
+                # Chỉ retry khi client chưa nhận được phần nào của stream
+                if parser.text or not await scheduler.backoff(e, attempt):
+                    raise
+                attempt += 1
         
+        if not parser.text:
+            raise RuntimeError("LLM response không có nội dung")
+        validated_data = await _parse_with_repair(messages, parser.text)
+        result_dict = validated_data.model_dump(mode="json")
+        await _save_generated(vocab, language, result_dict)
         return result_dict
         
     except json.JSONDecodeError as e:
-        raise ValueError(f"Không thể parse JSON từ LLM response: {e}")
+        raise UnresolvableVocabError(FAILURE_PARSE_ERROR, f"Không thể parse JSON từ LLM response: {e}")
+    except ValidationError as e:
+        raise UnresolvableVocabError(FAILURE_VALIDATION_ERROR, f"Dữ liệu từ LLM không hợp lệ: {e}")
     except Exception as e:
         raise Exception(f"Lỗi khi gọi LLM: {e}")
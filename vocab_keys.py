@@ -0,0 +1,144 @@
+"""
+Chuẩn hoá vocab và language trước khi tạo cache key
+
+Cùng một yêu cầu có thể được gửi dưới nhiều dạng: "Vietnamese", "vietnamese ",
+"vi", "Tiếng Việt", "VI-vn" là cùng một ngôn ngữ; "abide by", "abide_by" (dạng
+trong sounds.json) và "ａｂｉｄｅ　ｂｙ" (full-width) là cùng một từ. Mỗi dạng
+khác nhau từng tạo document cache và lần generate riêng.
+
+- Vocab: Unicode NFKC (full-width/compatibility -> dạng chuẩn), chữ thường,
+  khoảng trắng và "_" liên tiếp gộp thành một khoảng trắng
+- Language: bảng alias -> mã BCP-47 ("vi", "zh-Hans", ...); ngôn ngữ không có
+  trong bảng giữ dạng đã chuẩn hoá (NFKC, chữ thường, gộp khoảng trắng)
+"""
+import re
+import unicodedata
+from typing import Dict, Optional, Tuple
+
+_SEPARATOR_RE = re.compile(r"[\s_]+")
+# Tag dạng "vi-VN", "zh_Hant_TW" (đã chữ thường, "_" -> "-")
+_LANGUAGE_TAG_RE = re.compile(r"^[a-z]{2,3}(-[a-z0-9]{2,8})+$")
+
+# Mã BCP-47 -> (tên tiếng Anh dùng trong prompt, các alias khác ngoài mã và tên)
+_LANGUAGES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "en": ("English", ("tiếng anh", "tieng anh", "英语", "英語", "英文", "영어")),
+    "vi": ("Vietnamese", ("tiếng việt", "tieng viet", "việt", "viet", "越南语", "ベトナム語")),
+    "ja": ("Japanese", ("tiếng nhật", "tieng nhat", "日本語", "にほんご", "日语")),
+    "ko": ("Korean", ("tiếng hàn", "tieng han", "한국어", "韩语", "韓国語")),
+    "zh-Hans": (
+        "Simplified Chinese",
+        ("zh", "chinese", "mandarin", "tiếng trung", "tieng trung", "中文", "汉语", "简体中文", "zh-cn", "zh-sg"),
+    ),
+    "zh-Hant": (
+        "Traditional Chinese",
+        ("繁體中文", "繁体中文", "zh-tw", "zh-hk", "zh-mo"),
+    ),
+    "fr": ("French", ("tiếng pháp", "tieng phap", "français", "francais")),
+    "de": ("German", ("tiếng đức", "tieng duc", "deutsch")),
+    "es": ("Spanish", ("tiếng tây ban nha", "tieng tay ban nha", "español", "espanol")),
+    "pt": ("Portuguese", ("tiếng bồ đào nha", "tieng bo dao nha", "português", "portugues")),
+    "it": ("Italian", ("tiếng ý", "tieng y", "italiano")),
+    "ru": ("Russian", ("tiếng nga", "tieng nga", "русский")),
+    "th": ("Thai", ("tiếng thái", "tieng thai", "ภาษาไทย", "ไทย")),
+    "id": ("Indonesian", ("bahasa indonesia",)),
+    "ms": ("Malay", ("bahasa melayu",)),
+    "hi": ("Hindi", ("हिन्दी", "हिंदी")),
+    "ar": ("Arabic", ("العربية",)),
+    "nl": ("Dutch", ("nederlands",)),
+    "tr": ("Turkish", ("türkçe", "turkce")),
+    "pl": ("Polish", ("polski",)),
+    "fil": ("Filipino", ("tagalog", "tl")),
+}
+
+
+def _fold(text: str) -> str:
+    """
+    NFKC, bỏ khoảng trắng hai đầu, gộp khoảng trắng/"_" thành một khoảng trắng
+    """
+    return _SEPARATOR_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def _build_alias_index() -> Dict[str, str]:
+    aliases = {}
+    for code, (name, others) in _LANGUAGES.items():
+        for alias in (code, name, *others):
+            aliases[_fold(alias).casefold()] = code
+    return aliases
+
+
+_LANGUAGE_ALIASES = _build_alias_index()
+
+
+def canonical_vocab(vocab: str) -> str:
+    """
+    Dạng chuẩn của từ vựng dùng trong cache key
+
+    Args:
+        vocab: Từ vựng người dùng nhập (ví dụ: " Abide_by", "ａｂｉｄｅ　ｂｙ")
+
+    Returns:
+        Từ vựng đã chuẩn hoá (ví dụ: "abide by")
+    """
+    return _fold(vocab).lower()
+
+
+def language_code(language: str) -> Optional[str]:
+    """
+    Mã BCP-47 của ngôn ngữ nếu nhận ra được
+
+    Tra bảng alias (mã, tên tiếng Anh, tên bản địa, tên tiếng Việt); tag có
+    region ("vi-VN", "en_US") dùng primary subtag, riêng tiếng Trung phân biệt
+    giản thể/phồn thể theo script/region.
+
+    Args:
+        language: Ngôn ngữ như trong request
+
+    Returns:
+        Mã BCP-47, None nếu không có trong bảng
+    """
+    folded = _fold(language).casefold()
+    code = _LANGUAGE_ALIASES.get(folded)
+    if code is not None:
+        return code
+
+    tag = unicodedata.normalize("NFKC", language).strip().casefold().replace("_", "-")
+    if not _LANGUAGE_TAG_RE.match(tag):
+        return None
+    subtags = tag.split("-")
+    if subtags[0] == "zh":
+        return "zh-Hant" if subtags[1] in ("hant", "tw", "hk", "mo") else "zh-Hans"
+    return _LANGUAGE_ALIASES.get(subtags[0])
+
+
+def canonical_language(language: str) -> str:
+    """
+    Dạng chuẩn của ngôn ngữ dùng trong cache key: mã BCP-47, hoặc tên đã chuẩn hoá
+    nếu không có trong bảng alias
+    """
+    return language_code(language) or _fold(language).lower()
+
+
+def language_name(language: str) -> str:
+    """
+    Tên ngôn ngữ đưa vào prompt: tên tiếng Anh nếu nhận ra được, để mọi alias
+    của một ngôn ngữ cho cùng một kết quả
+    """
+    code = language_code(language)
+    return _LANGUAGES[code][0] if code is not None else _fold(language)
+
+
+def cache_key(vocab: str, language: str) -> str:
+    """
+    Cache key của (vocab, language) sau khi chuẩn hoá
+
+    Returns:
+        Cache key dạng: "{vocab}_{language}" (ví dụ: "abide by_vi")
+    """
+    return f"{canonical_vocab(vocab)}_{canonical_language(language)}"
+
+
+def legacy_cache_key(vocab: str, language: str) -> str:
+    """
+    Cache key trước khi có chuẩn hoá (chỉ dùng cho migration)
+    """
+    return f"{vocab.lower().strip()}_{language.lower().strip()}"
@@ -0,0 +1,401 @@
+"""
+Router cho vocab info và audio
+
+Module này không import agno (agent, AgentOS) để cold start của các endpoint
+vocab/audio không phải load agent stack, xem api/index.py.
+"""
+import hashlib
+import json
+import math
+import os
+import sys
+from typing import Optional, Union
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    PlainTextResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
+from audio_service import (
+    AUDIO_BASE_URL,
+    AUDIO_CACHE_MAX_AGE,
+    get_audio_filename,
+    get_audio_path,
+    get_audio_url,
+)
+from jobs import (
+    ASYNC_JOBS_DEFAULT,
+    FINISHED_STATUSES,
+    JOB_MAX_WAIT_SECONDS,
+    JOB_POLL_INTERVAL_SECONDS,
+    enqueue_vocab_job,
+    ensure_job_workers,
+    get_vocab_job,
+    wait_for_vocab_job,
+)
+from llm_scheduler import get_llm_scheduler
+from metrics import render_metrics
+from models.audio import AudioResolveItem, AudioResolveRequest, AudioResolveResponse
+from sound_words import resolve_sound_key
+from models.vocab_info import (
+    VocabInfoBatchItem,
+    VocabInfoBatchRequest,
+    VocabInfoBatchResponse,
+    VocabInfoMultiRequest,
+    VocabInfoMultiResponse,
+    VocabInfoRequest,
+    VocabInfoResponse,
+    VocabJobResponse,
+    VocabSuggestItem,
+    VocabSuggestResponse,
+)
+from vocab_info_service import (
+    UnresolvableVocabError,
+    check_vocab_resolvable,
+    get_cached_vocab_info_payload,
+    get_generation_stats,
+    get_vocab_info_multi,
+    get_vocab_info_payload,
+    iter_vocab_info_batch,
+    stream_vocab_info,
+    suggest_vocabs,
+)
+from vocab_cache import get_cache_health, get_l1_stats
+
+# HTTP cache cho GET vocab info: max-age cho client, s-maxage cho CDN/edge (Vercel)
+HTTP_CACHE_MAX_AGE = int(os.getenv("VOCAB_HTTP_CACHE_MAX_AGE", "86400"))
+HTTP_CACHE_S_MAXAGE = int(os.getenv("VOCAB_HTTP_CACHE_S_MAXAGE", "604800"))
+HTTP_CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("VOCAB_HTTP_CACHE_STALE_WHILE_REVALIDATE", "86400"))
+
+router = APIRouter()
+
+
+def _prefers_async(prefer: Optional[str]) -> bool:
+    """
+    Cache miss có chuyển thành job (202) không: VOCAB_ASYNC_JOBS hoặc header "Prefer: respond-async"
+    """
+    if ASYNC_JOBS_DEFAULT:
+        return True
+    return bool(prefer) and any(
+        token.strip().lower() == "respond-async" for token in prefer.split(",")
+    )
+
+
+def _job_response(job: dict, status_code: int = 200) -> JSONResponse:
+    """
+    JSON của job, kèm Location/Retry-After khi job chưa xong
+    """
+    headers = {"Cache-Control": "no-store"}
+    if job["status"] not in FINISHED_STATUSES:
+        headers["Location"] = f"/api/vocab/jobs/{job['job_id']}"
+        headers["Retry-After"] = str(max(1, math.ceil(JOB_POLL_INTERVAL_SECONDS)))
+    return JSONResponse(
+        status_code=status_code,
+        content=VocabJobResponse(**job).model_dump(mode="json"),
+        headers=headers,
+    )
+
+
+def _unprocessable(error: ValueError) -> HTTPException:
+    """
+    422 cho input/dữ liệu LLM không hợp lệ, header X-Vocab-Error cho biết loại lỗi
+    (parse_error, validation_error, rejected_input) nếu lỗi được nhớ trong negative cache
+    """
+    headers = {"X-Vocab-Error": error.reason} if isinstance(error, UnresolvableVocabError) else None
+    return HTTPException(status_code=422, detail=str(error), headers=headers)
+
+
+async def _get_payload_or_job(vocab: str, language: str, prefer: Optional[str]) -> Union[bytes, Response]:
+    """
+    JSON bytes của vocab info; ở chế độ job, cache miss trả về 202 + job thay vì chờ LLM
+    
+    Không enqueue được (chưa cấu hình MongoDB, breaker mở) thì generate đồng bộ như cũ.
+    """
+    if _prefers_async(prefer):
+        payload = await get_cached_vocab_info_payload(vocab, language)
+        if payload is not None:
+            return payload
+        # Từ đã biết là không generate được thì trả 422 ngay, không tạo job
+        await check_vocab_resolvable(vocab, language)
+        job = await enqueue_vocab_job(vocab, language)
+        if job is not None:
+            return _job_response(job, status_code=202)
+    return await get_vocab_info_payload(vocab, language)
+
+
+@router.post("/api/vocab/info", response_model=VocabInfoResponse)
+async def vocab_info_endpoint(request: VocabInfoRequest, prefer: Optional[str] = Header(default=None)):
+    """
+    API endpoint để lấy thông tin từ vựng (examples, synonyms, origin)
+    
+    - Kiểm tra cache trước
+    - Nếu không có cache, gọi LLM và lưu vào cache
+    - Trả về thông tin bằng ngôn ngữ được chỉ định
+    - Header `Prefer: respond-async` (hoặc VOCAB_ASYNC_JOBS=true): cache miss trả về
+      202 + job ID ngay, kết quả lấy qua GET /api/vocab/jobs/{job_id}
+    
+    Response là JSON bytes đã serialize sẵn trong cache (đã validate khi lưu),
+    nên không đi qua response_model validation lần nữa.
+    """
+    try:
+        payload = await _get_payload_or_job(request.vocab, request.language, prefer)
+    except ValueError as e:
+        raise _unprocessable(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Lỗi server: {str(e)}")
+    if isinstance(payload, Response):
+        return payload
+    return Response(content=payload, media_type="application/json")
+
+
+def _payload_etag(payload: bytes) -> str:
+    """
+    Strong ETag từ JSON bytes của vocab info
+    """
+    return '"' + hashlib.sha256(payload).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    So khớp header If-None-Match (có thể là danh sách, weak hoặc "*") với ETag
+    """
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+@router.get("/api/vocab/info/{language}/{vocab:path}", response_model=VocabInfoResponse)
+async def vocab_info_get_endpoint(
+    language: str,
+    vocab: str,
+    if_none_match: Optional[str] = Header(default=None),
+    prefer: Optional[str] = Header(default=None),
+):
+    """
+    Biến thể GET của /api/vocab/info, cache được ở client và CDN
+    
+    - Trả về strong ETag (hash của JSON bytes trong cache) và Cache-Control dài hạn
+    - `If-None-Match` khớp ETag thì trả về 304 không có body
+    - Chế độ job như POST /api/vocab/info (202 không được cache)
+    """
+    try:
+        payload = await _get_payload_or_job(vocab, language, prefer)
+    except ValueError as e:
+        raise _unprocessable(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Lỗi server: {str(e)}")
+    if isinstance(payload, Response):
+        return payload
+    
+    etag = _payload_etag(payload)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": (
+            f"public, max-age={HTTP_CACHE_MAX_AGE}, s-maxage={HTTP_CACHE_S_MAXAGE}, "
+            f"stale-while-revalidate={HTTP_CACHE_STALE_WHILE_REVALIDATE}"
+        ),
+    }
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
+
+
+@router.get("/api/vocab/jobs/{job_id}", response_model=VocabJobResponse)
+async def vocab_job_endpoint(job_id: str, wait: float = Query(0, ge=0, le=JOB_MAX_WAIT_SECONDS)):
+    """
+    Trạng thái job generate vocab info (từ 202 của /api/vocab/info)
+    
+    - `wait=0`: trả về trạng thái hiện tại (poll)
+    - `wait>0`: long-poll, chờ tối đa `wait` giây cho tới khi job done/failed
+    - Job done có `result` là VocabInfoResponse; job chưa xong có header Retry-After
+    """
+    try:
+        job = await get_vocab_job(job_id)
+        if job is not None and job["status"] not in FINISHED_STATUSES:
+            # Worker trong process (nếu bật) cũng được khởi động khi có request status
+            ensure_job_workers()
+            if wait > 0:
+                job = await wait_for_vocab_job(job_id, wait)
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Không tìm thấy job")
+    return _job_response(job)
+
+
+@router.post("/api/vocab/info/stream")
+async def vocab_info_stream_endpoint(request: VocabInfoRequest):
+    """
+    API endpoint lấy thông tin từ vựng dạng Server-Sent Events
+    
+    - Cache hit: một event `complete` với toàn bộ thông tin
+    - Cache miss: các event `example`, `synonym`, `origin` ngay khi LLM viết xong
+      từng phần, cuối cùng là `complete` (document đầy đủ, đã lưu cache)
+    - Lỗi: event `error`
+    """
+    async def sse_events():
+        async for event, data in stream_vocab_info(request.vocab, request.language):
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    
+    return StreamingResponse(
+        sse_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/api/vocab/info/batch", response_model=VocabInfoBatchResponse)
+async def vocab_info_batch_endpoint(request: VocabInfoBatchRequest, stream: bool = False):
+    """
+    API endpoint để lấy thông tin nhiều từ vựng trong một request
+    
+    - Cache hit được lấy bằng một query duy nhất
+    - Các từ chưa có cache được generate song song (giới hạn concurrency)
+    - Lỗi được trả về theo từng item, không làm hỏng cả batch
+    - `stream=true`: trả về NDJSON, mỗi dòng là một item ngay khi có kết quả
+    """
+    if stream:
+        async def item_lines():
+            async for item in iter_vocab_info_batch(request.vocabs, request.language):
+                yield VocabInfoBatchItem(**item).model_dump_json() + "\n"
+        
+        return StreamingResponse(item_lines(), media_type="application/x-ndjson")
+    
+    items_by_vocab = {}
+    async for item in iter_vocab_info_batch(request.vocabs, request.language):
+        items_by_vocab[item["vocab"]] = VocabInfoBatchItem(**item)
+    return VocabInfoBatchResponse(
+        language=request.language,
+        items=[items_by_vocab[vocab] for vocab in request.vocabs],
+    )
+
+
+@router.post("/api/vocab/info/multi", response_model=VocabInfoMultiResponse)
+async def vocab_info_multi_endpoint(request: VocabInfoMultiRequest):
+    """
+    API endpoint lấy thông tin một từ vựng cho nhiều ngôn ngữ
+    
+    - Ngôn ngữ đã có cache được trả về ngay
+    - Các ngôn ngữ còn lại được generate trong một LLM call duy nhất
+    - Mỗi ngôn ngữ được lưu cache riêng (dùng chung với /api/vocab/info)
+    """
+    try:
+        results = await get_vocab_info_multi(request.vocab, request.languages)
+        return VocabInfoMultiResponse(
+            vocab=request.vocab,
+            # Một item cho mỗi ngôn ngữ trong request, kể cả khi trùng nhau
+            items=[VocabInfoResponse(**results[language]) for language in request.languages],
+        )
+    except ValueError as e:
+        raise _unprocessable(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Lỗi server: {str(e)}")
+
+
+@router.get("/api/vocab/suggest", response_model=VocabSuggestResponse)
+async def vocab_suggest_endpoint(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """
+    Gợi ý từ vựng đã biết (sounds.json + cache) cho autocomplete và lỗi chính tả
+    
+    - Prefix match ("acc" -> accept, access, ...) trước, fuzzy match ("accomodate" -> accommodate) sau
+    - Chỉ tra index trong bộ nhớ, không gọi LLM
+    """
+    items = await suggest_vocabs(q, limit=limit)
+    return VocabSuggestResponse(query=q, items=[VocabSuggestItem(**item) for item in items])
+
+
+@router.get("/api/audio/{vocab:path}")
+async def audio_endpoint(vocab: str):
+    """
+    Phát âm của từ vựng (mp3)
+    
+    - Không phân biệt hoa thường, khoảng trắng hay "_" (ví dụ: "Abide by" -> abide_by.mp3)
+    - Hỗ trợ HTTP Range (seek/phát dần trên mobile)
+    - Từ không có trong sounds.json trả về 404 ngay, không chạm tới disk
+    """
+    filename = get_audio_filename(vocab)
+    if filename is None:
+        raise HTTPException(status_code=404, detail="Không có audio cho từ vựng này")
+    
+    cache_headers = {"Cache-Control": f"public, max-age={AUDIO_CACHE_MAX_AGE}"}
+    if AUDIO_BASE_URL:
+        # File nằm trên CDN/static host: redirect để không phải stream qua Python
+        return RedirectResponse(get_audio_url(vocab), status_code=307, headers=cache_headers)
+    
+    path = get_audio_path(filename)
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="Không tìm thấy file audio")
+    return FileResponse(path, media_type="audio/mpeg", stat_result=stat_result, headers=cache_headers)
+
+
+@router.post("/api/audio/resolve", response_model=AudioResolveResponse)
+async def audio_resolve_endpoint(request: AudioResolveRequest):
+    """
+    Resolve audio cho cả một deck trong một request
+    
+    - Mỗi từ trả về sound key và URL để phát, null nếu không có audio
+    """
+    items = []
+    for vocab in request.vocabs:
+        items.append(AudioResolveItem(
+            vocab=vocab,
+            key=resolve_sound_key(vocab),
+            url=get_audio_url(vocab),
+        ))
+    return AudioResolveResponse(items=items)
+
+
+@router.get("/api/vocab/stats")
+async def vocab_stats_endpoint():
+    """
+    Thống kê vocab info: hit/miss của L1 trong process, parse failure và repair của LLM,
+    hàng đợi/concurrency của LLM scheduler, prompt token (ước lượng) của vocab_agent
+    trước/sau khi giới hạn history
+    """
+    stats = {
+        "l1_cache": get_l1_stats(),
+        "mongodb_cache": get_cache_health(),
+        "generation": get_generation_stats(),
+        "llm_scheduler": get_llm_scheduler().get_stats(),
+    }
+    # Chỉ có khi agent đã được load trong worker này (không import agno chỉ để lấy stats)
+    agent_context = sys.modules.get("agent_context")
+    if agent_context is not None:
+        stats["agent_context"] = agent_context.get_context_stats()
+    return stats
+
+
+@router.get("/api/vocab/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """
+    Metrics dạng Prometheus text format của worker hiện tại
+    
+    (/metrics đã thuộc về AgentOS nên endpoint nằm dưới /api/vocab)
+    
+    - Cache hit/miss/error theo tier (l1, mongo), latency theo stage, token và chi phí LLM,
+      số request/LLM call đang chạy
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/api/vocab/health")
+async def vocab_health_endpoint():
+    """
+    Health của vocab info service
+    
+    - `degraded` khi circuit breaker của MongoDB cache đang mở (mọi request đi thẳng LLM)
+    """
+    cache_health = get_cache_health()
+    degraded = cache_health["configured"] and cache_health["breaker"]["state"] != "closed"
+    return {"status": "degraded" if degraded else "ok", "mongodb_cache": cache_health}